@@ -0,0 +1,484 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.query_builder.functions import Max, Round, Sum
+from frappe.utils import (
+	add_days,
+	add_months,
+	cstr,
+	flt,
+	get_last_day,
+	getdate,
+	now,
+	nowdate,
+)
+
+SNAPSHOT_CACHE_KEY = "account_balance_snapshot_date"
+
+
+class AccountBalanceSnapshot(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		account: DF.Link | None
+		account_currency: DF.Link | None
+		balance: DF.Currency
+		balance_in_account_currency: DF.Currency
+		company: DF.Link | None
+		cost_center: DF.Link | None
+		party: DF.DynamicLink | None
+		party_type: DF.Link | None
+		period_end_date: DF.Date | None
+	# end: auto-generated types
+
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Account Balance Snapshot", ["company", "period_end_date"])
+	frappe.db.add_index("Account Balance Snapshot", ["account", "period_end_date"])
+	frappe.db.add_unique(
+		"Account Balance Snapshot",
+		["company", "account", "cost_center", "party_type", "party", "period_end_date"],
+		constraint_name="unique_snapshot_key",
+	)
+
+
+def build_account_balance_snapshots():
+	"""Snapshot account balances as on the last day of previous month.
+	Called monthly via hooks.py"""
+	period_end_date = get_last_day(add_months(nowdate(), -1))
+	for company in frappe.get_all("Company", pluck="name"):
+		make_account_balance_snapshot(company, period_end_date)
+
+
+def make_account_balance_snapshot(company, period_end_date):
+	"""Build the snapshot of `period_end_date` incrementally from the previous snapshot of the company.
+
+	Every account, cost center and party with a non zero balance gets a row, so a snapshot is
+	complete on its own. Balances are the sum of debit - credit of all GL entries till `period_end_date`,
+	rounded per entry to the currency precision like `get_balance_on`."""
+	period_end_date = getdate(period_end_date)
+	if frappe.db.exists("Account Balance Snapshot", {"company": company, "period_end_date": period_end_date}):
+		return
+
+	previous_period_end_date = get_snapshot_date(company, add_days(period_end_date, -1))
+
+	balances = {}
+	if previous_period_end_date:
+		for row in frappe.get_all(
+			"Account Balance Snapshot",
+			filters={"company": company, "period_end_date": previous_period_end_date},
+			fields=[
+				"account",
+				"cost_center",
+				"party_type",
+				"party",
+				"account_currency",
+				"balance",
+				"balance_in_account_currency",
+			],
+		):
+			balances[get_key(row)] = row
+
+	from_date = add_days(previous_period_end_date, 1) if previous_period_end_date else None
+	for row in get_balances_from_gl(company, period_end_date, from_date=from_date):
+		if balance := balances.get(get_key(row)):
+			balance.balance = flt(balance.balance) + flt(row.balance)
+			balance.balance_in_account_currency = flt(balance.balance_in_account_currency) + flt(
+				row.balance_in_account_currency
+			)
+		else:
+			balances[get_key(row)] = row
+
+	insert_snapshot_rows(company, period_end_date, balances.values())
+	frappe.cache.hdel(SNAPSHOT_CACHE_KEY, company)
+
+
+def get_key(row):
+	return (row.account, cstr(row.cost_center), cstr(row.party_type), cstr(row.party))
+
+
+def get_balances_from_gl(company, to_date, from_date=None, accounts=None):
+	"""Balance of every account, cost center and party from GL entries posted in [from_date, to_date]"""
+	from erpnext.accounts.utils import get_currency_precision
+
+	precision = get_currency_precision()
+	gle = frappe.qb.DocType("GL Entry")
+	query = (
+		frappe.qb.from_(gle)
+		.select(
+			gle.account,
+			gle.cost_center,
+			gle.party_type,
+			gle.party,
+			Max(gle.account_currency).as_("account_currency"),
+			(Sum(Round(gle.debit, precision)) - Sum(Round(gle.credit, precision))).as_("balance"),
+			(
+				Sum(Round(gle.debit_in_account_currency, precision))
+				- Sum(Round(gle.credit_in_account_currency, precision))
+			).as_("balance_in_account_currency"),
+		)
+		.where((gle.company == company) & (gle.is_cancelled == 0) & (gle.posting_date <= to_date))
+		.groupby(gle.account, gle.cost_center, gle.party_type, gle.party)
+	)
+
+	if from_date:
+		query = query.where(gle.posting_date >= from_date)
+
+	if accounts:
+		query = query.where(gle.account.isin(accounts))
+
+	return query.run(as_dict=True)
+
+
+def insert_snapshot_rows(company, period_end_date, rows):
+	"""Insert `rows` in the snapshot of `period_end_date`.
+
+	Missing cost center and party are stored as empty strings (not NULL) so that the unique key
+	of the snapshot applies to them."""
+	user = frappe.session.user
+	timestamp = now()
+
+	fields = [
+		"name",
+		"creation",
+		"modified",
+		"owner",
+		"modified_by",
+		"account",
+		"cost_center",
+		"party_type",
+		"party",
+		"company",
+		"period_end_date",
+		"account_currency",
+		"balance",
+		"balance_in_account_currency",
+	]
+	values = [
+		(
+			frappe.generate_hash(length=10),
+			timestamp,
+			timestamp,
+			user,
+			user,
+			row.account,
+			cstr(row.cost_center),
+			cstr(row.party_type),
+			cstr(row.party),
+			company,
+			period_end_date,
+			row.account_currency,
+			flt(row.balance),
+			flt(row.balance_in_account_currency),
+		)
+		for row in rows
+		if flt(row.balance) or flt(row.balance_in_account_currency)
+	]
+
+	frappe.db.bulk_insert("Account Balance Snapshot", fields=fields, values=values)
+
+
+def get_snapshot_date(company, posting_date=None):
+	"""Latest snapshot of the company on or before `posting_date`"""
+	if not posting_date:
+		return frappe.cache.hget(
+			SNAPSHOT_CACHE_KEY, company, lambda: get_snapshot_date(company, "9999-12-31") or ""
+		)
+
+	table = frappe.qb.DocType("Account Balance Snapshot")
+	result = (
+		frappe.qb.from_(table)
+		.select(Max(table.period_end_date))
+		.where((table.company == company) & (table.period_end_date <= posting_date))
+	).run()
+
+	return result[0][0] if result and result[0][0] else None
+
+
+def update_account_balance_snapshots(gl_entries, sign=1):
+	"""Apply GL entries posted on or before the latest snapshot of their company to the snapshots.
+
+	Called when GL entries are added (sign 1) or cancelled / deleted (sign -1).
+	Entries after the latest snapshot are read from the GL by `get_balance_from_snapshot`."""
+	from erpnext.accounts.utils import get_currency_precision
+
+	precision = None
+	deltas = {}
+	for gle in gl_entries:
+		gle = frappe._dict(gle)
+		if gle.is_cancelled:
+			continue
+
+		last_snapshot_date = get_snapshot_date(gle.company)
+		if not last_snapshot_date or getdate(gle.posting_date) > getdate(last_snapshot_date):
+			continue
+
+		precision = precision or get_currency_precision()
+		posting_date = getdate(gle.posting_date)
+		delta = deltas.setdefault(
+			(gle.company, *get_key(gle), posting_date),
+			frappe._dict(
+				company=gle.company,
+				account=gle.account,
+				cost_center=gle.cost_center,
+				party_type=gle.party_type,
+				party=gle.party,
+				account_currency=gle.account_currency
+				or frappe.get_cached_value("Account", gle.account, "account_currency"),
+				posting_date=posting_date,
+				balance=0.0,
+				balance_in_account_currency=0.0,
+			),
+		)
+
+		delta.balance += sign * (flt(gle.debit, precision) - flt(gle.credit, precision))
+		delta.balance_in_account_currency += sign * (
+			flt(gle.debit_in_account_currency, precision) - flt(gle.credit_in_account_currency, precision)
+		)
+
+	for delta in deltas.values():
+		if delta.balance or delta.balance_in_account_currency:
+			apply_delta_to_snapshots(delta)
+
+
+def apply_delta_to_snapshots(delta):
+	"""Add `delta` to the rows of its key in every snapshot on or after its posting date.
+
+	Existing rows are updated at once, rows missing in some of the snapshots are inserted. A row
+	inserted concurrently by another transaction is updated instead."""
+	table = frappe.qb.DocType("Account Balance Snapshot")
+	add_delta_to_snapshot_rows(delta, table.period_end_date >= delta.posting_date)
+
+	missing_period_end_dates = (
+		frappe.qb.from_(table)
+		.select(table.period_end_date)
+		.distinct()
+		.where(
+			(table.company == delta.company)
+			& (table.period_end_date >= delta.posting_date)
+			& table.period_end_date.notin(
+				frappe.qb.from_(table)
+				.select(table.period_end_date)
+				.where(get_key_condition(table, delta) & (table.period_end_date >= delta.posting_date))
+			)
+		)
+	).run(pluck=True)
+
+	for period_end_date in missing_period_end_dates:
+		try:
+			frappe.db.savepoint("insert_snapshot_row")
+			insert_snapshot_rows(delta.company, period_end_date, [delta])
+		except Exception as e:
+			if not frappe.db.is_unique_key_violation(e):
+				raise
+
+			frappe.db.rollback(save_point="insert_snapshot_row")  # preserve transaction in postgres
+			add_delta_to_snapshot_rows(delta, table.period_end_date == period_end_date)
+
+
+def add_delta_to_snapshot_rows(delta, period_condition):
+	table = frappe.qb.DocType("Account Balance Snapshot")
+	(
+		frappe.qb.update(table)
+		.set(table.balance, table.balance + flt(delta.balance))
+		.set(
+			table.balance_in_account_currency,
+			table.balance_in_account_currency + flt(delta.balance_in_account_currency),
+		)
+		.set(table.modified, now())
+		.set(table.modified_by, frappe.session.user)
+		.where(get_key_condition(table, delta) & period_condition)
+	).run()
+
+
+def get_key_condition(table, row):
+	return (
+		(table.company == row.company)
+		& (table.account == row.account)
+		& (table.cost_center == cstr(row.cost_center))
+		& (table.party_type == cstr(row.party_type))
+		& (table.party == cstr(row.party))
+	)
+
+
+def get_balance_from_snapshot(company, conditions, to_date=None, from_date=None, in_account_currency=True):
+	"""Balance of GL entries in [from_date, to_date] matching `conditions`, computed as
+	snapshot balance + GL entries posted after the snapshot.
+
+	`conditions` are SQL conditions on the `gle` alias, they must only refer to columns present in
+	both GL Entry and Account Balance Snapshot (account, cost center, party and company).
+	Returns None if there is no snapshot to start from."""
+	closing_balance = get_cumulative_balance(company, conditions, to_date, in_account_currency)
+	if closing_balance is None or not from_date:
+		return closing_balance
+
+	opening_balance = get_cumulative_balance(
+		company, conditions, add_days(from_date, -1), in_account_currency
+	)
+	if opening_balance is None:
+		return None
+
+	return closing_balance - opening_balance
+
+
+def get_cumulative_balance(company, conditions, to_date=None, in_account_currency=True):
+	from erpnext.accounts.utils import get_currency_precision
+
+	if not get_snapshot_date(company):
+		return None
+
+	period_end_date = get_snapshot_date(company, to_date)
+	if not period_end_date:
+		return None
+
+	if in_account_currency:
+		balance_field, debit_field, credit_field = (
+			"balance_in_account_currency",
+			"debit_in_account_currency",
+			"credit_in_account_currency",
+		)
+	else:
+		balance_field, debit_field, credit_field = "balance", "debit", "credit"
+
+	conditions = ["gle.company = %(company)s", *conditions]
+	values = {
+		"company": company,
+		"period_end_date": period_end_date,
+		"to_date": to_date,
+		"precision": get_currency_precision(),
+	}
+
+	snapshot_balance = frappe.db.sql(
+		f"""
+		SELECT sum({balance_field})
+		FROM `tabAccount Balance Snapshot` gle
+		WHERE gle.period_end_date = %(period_end_date)s and {" and ".join(conditions)}""",
+		values,
+	)[0][0]
+
+	if to_date:
+		conditions.append("gle.posting_date <= %(to_date)s")
+
+	gl_balance = frappe.db.sql(
+		f"""
+		SELECT sum(round({debit_field}, %(precision)s)) - sum(round({credit_field}, %(precision)s))
+		FROM `tabGL Entry` gle
+		WHERE gle.is_cancelled = 0 and gle.posting_date > %(period_end_date)s and {" and ".join(conditions)}""",
+		values,
+	)[0][0]
+
+	return flt(snapshot_balance) + flt(gl_balance)
+
+
+def reconcile_account_balance_snapshots(period_closing_voucher):
+	"""Compare snapshot balances of balance sheet accounts with the Account Closing Balance of
+	the Period Closing Voucher and rebuild the snapshots of accounts that don't match.
+	Returns the rebuilt accounts."""
+	from erpnext.accounts.utils import get_currency_precision
+
+	pcv = frappe.db.get_value(
+		"Period Closing Voucher",
+		period_closing_voucher,
+		["company", "period_end_date", "closing_account_head"],
+		as_dict=True,
+	)
+	period_end_date = get_snapshot_date(pcv.company, pcv.period_end_date)
+	if not period_end_date:
+		return []
+
+	acb = frappe.qb.DocType("Account Closing Balance")
+	account = frappe.qb.DocType("Account")
+	closing_balances = dict(
+		frappe.qb.from_(acb)
+		.inner_join(account)
+		.on(acb.account == account.name)
+		.select(acb.account, Sum(acb.debit) - Sum(acb.credit))
+		.where(
+			(acb.period_closing_voucher == period_closing_voucher)
+			& (acb.is_period_closing_voucher_entry == 0)
+			& (account.report_type == "Balance Sheet")
+			& (acb.account != pcv.closing_account_head)
+		)
+		.groupby(acb.account)
+		.run()
+	)
+
+	precision = get_currency_precision()
+	balances = get_balance_sheet_balances(pcv.company, period_end_date, pcv.period_end_date, precision)
+	mismatched_accounts = [
+		account_name
+		for account_name in sorted(set(balances) | set(closing_balances))
+		if account_name != pcv.closing_account_head
+		and flt(flt(balances.get(account_name)) - flt(closing_balances.get(account_name)), precision)
+	]
+
+	if mismatched_accounts:
+		rebuild_account_balance_snapshots(pcv.company, mismatched_accounts)
+
+	return mismatched_accounts
+
+
+def get_balance_sheet_balances(company, period_end_date, to_date, precision):
+	"""Balance of every balance sheet account as on `to_date`, from the snapshot of `period_end_date`
+	and the GL entries posted after it, with one grouped query each"""
+	table = frappe.qb.DocType("Account Balance Snapshot")
+	account = frappe.qb.DocType("Account")
+	balances = {}
+	for account_name, balance in (
+		frappe.qb.from_(table)
+		.inner_join(account)
+		.on(table.account == account.name)
+		.select(table.account, Sum(table.balance))
+		.where(
+			(table.company == company)
+			& (table.period_end_date == period_end_date)
+			& (account.report_type == "Balance Sheet")
+		)
+		.groupby(table.account)
+		.run()
+	):
+		balances[account_name] = flt(balance)
+
+	gle = frappe.qb.DocType("GL Entry")
+	for account_name, balance in (
+		frappe.qb.from_(gle)
+		.inner_join(account)
+		.on(gle.account == account.name)
+		.select(gle.account, Sum(Round(gle.debit, precision)) - Sum(Round(gle.credit, precision)))
+		.where(
+			(gle.company == company)
+			& (gle.is_cancelled == 0)
+			& (gle.posting_date > period_end_date)
+			& (gle.posting_date <= to_date)
+			& (account.report_type == "Balance Sheet")
+		)
+		.groupby(gle.account)
+		.run()
+	):
+		balances[account_name] = flt(balances.get(account_name)) + flt(balance)
+
+	return balances
+
+
+def rebuild_account_balance_snapshots(company, accounts):
+	"""Rebuild snapshot rows of `accounts` from the GL"""
+	table = frappe.qb.DocType("Account Balance Snapshot")
+	period_end_dates = (
+		frappe.qb.from_(table).select(table.period_end_date).distinct().where(table.company == company)
+	).run(pluck=True)
+
+	frappe.qb.from_(table).delete().where((table.company == company) & (table.account.isin(accounts))).run()
+
+	for period_end_date in period_end_dates:
+		insert_snapshot_rows(
+			company, period_end_date, get_balances_from_gl(company, period_end_date, accounts=accounts)
+		)
@@ -0,0 +1,118 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests import IntegrationTestCase, UnitTestCase
+from frappe.utils import add_days, add_months, get_last_day, nowdate
+
+from erpnext.accounts.doctype.account_balance_snapshot.account_balance_snapshot import (
+	SNAPSHOT_CACHE_KEY,
+	apply_delta_to_snapshots,
+	make_account_balance_snapshot,
+	rebuild_account_balance_snapshots,
+)
+from erpnext.accounts.doctype.journal_entry.test_journal_entry import make_journal_entry
+from erpnext.accounts.utils import get_balance_on
+
+# On IntegrationTestCase, the doctype test records and all
+# link-field test record depdendencies are recursively loaded
+# Use these module variables to add/remove to/from that list
+EXTRA_TEST_RECORD_DEPENDENCIES = []  # eg. ["User"]
+IGNORE_TEST_RECORD_DEPENDENCIES = []  # eg. ["User"]
+
+
+class UnitTestAccountBalanceSnapshot(UnitTestCase):
+	"""
+	Unit tests for AccountBalanceSnapshot.
+	Use this class for testing individual functions and methods.
+	"""
+
+	pass
+
+
+class IntegrationTestAccountBalanceSnapshot(IntegrationTestCase):
+	def setUp(self):
+		self.company = "_Test Company"
+		self.bank = "_Test Bank - _TC"
+		self.cash = "_Test Cash - _TC"
+		self.period_end_date = get_last_day(add_months(nowdate(), -1))
+		frappe.db.delete("Account Balance Snapshot", {"company": self.company})
+		frappe.cache.hdel(SNAPSHOT_CACHE_KEY, self.company)
+
+	def tearDown(self):
+		frappe.db.rollback()
+		frappe.cache.hdel(SNAPSHOT_CACHE_KEY, self.company)
+
+	def make_journal_entry(self, amount, posting_date):
+		return make_journal_entry(self.bank, self.cash, amount, posting_date=posting_date, submit=True)
+
+	def test_balance_from_snapshot(self):
+		backdated = add_days(self.period_end_date, -3)
+		self.make_journal_entry(100, backdated)
+
+		# without snapshots the balance is computed from the GL
+		balance = get_balance_on(self.bank)
+		period_end_balance = get_balance_on(self.bank, self.period_end_date)
+
+		make_account_balance_snapshot(self.company, self.period_end_date)
+		self.assertTrue(frappe.db.exists("Account Balance Snapshot", {"account": self.bank}))
+		self.assertEqual(get_balance_on(self.bank), balance)
+		self.assertEqual(get_balance_on(self.bank, self.period_end_date), period_end_balance)
+		self.assertEqual(
+			get_balance_on(self.bank, nowdate(), start_date=add_days(self.period_end_date, 1)),
+			balance - period_end_balance,
+		)
+
+		# entries after the snapshot are read from the GL
+		self.make_journal_entry(50, nowdate())
+		self.assertEqual(get_balance_on(self.bank), balance + 50)
+
+		# backdated entries update the snapshot
+		backdated_entry = self.make_journal_entry(30, backdated)
+		self.assertEqual(get_balance_on(self.bank), balance + 80)
+		self.assertEqual(get_balance_on(self.bank, self.period_end_date), period_end_balance + 30)
+
+		backdated_entry.cancel()
+		self.assertEqual(get_balance_on(self.bank), balance + 50)
+		self.assertEqual(get_balance_on(self.bank, self.period_end_date), period_end_balance)
+
+	def test_rebuild_snapshot(self):
+		self.make_journal_entry(100, add_days(self.period_end_date, -3))
+		period_end_balance = get_balance_on(self.bank, self.period_end_date)
+		make_account_balance_snapshot(self.company, self.period_end_date)
+
+		frappe.db.sql(
+			"""update `tabAccount Balance Snapshot` set balance = balance + 10,
+			balance_in_account_currency = balance_in_account_currency + 10
+			where account = %s""",
+			self.bank,
+		)
+		self.assertEqual(get_balance_on(self.bank, self.period_end_date), period_end_balance + 10)
+
+		rebuild_account_balance_snapshots(self.company, [self.bank])
+		self.assertEqual(get_balance_on(self.bank, self.period_end_date), period_end_balance)
+
+	def test_delta_upserts_snapshot_row(self):
+		self.make_journal_entry(100, add_days(self.period_end_date, -3))
+		make_account_balance_snapshot(self.company, self.period_end_date)
+
+		delta = frappe._dict(
+			company=self.company,
+			account=self.bank,
+			cost_center="_Test Cost Center 2 - _TC",
+			account_currency="INR",
+			posting_date=add_days(self.period_end_date, -1),
+			balance=10.0,
+			balance_in_account_currency=10.0,
+		)
+		apply_delta_to_snapshots(delta)
+		apply_delta_to_snapshots(delta)
+
+		rows = frappe.get_all(
+			"Account Balance Snapshot",
+			filters={"account": self.bank, "cost_center": delta.cost_center},
+			fields=["balance", "party"],
+		)
+		self.assertEqual(len(rows), 1)
+		self.assertEqual(rows[0].balance, 20)
+		self.assertEqual(rows[0].party, "")
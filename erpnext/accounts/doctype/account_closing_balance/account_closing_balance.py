@@ -8,6 +8,7 @@ from frappe.utils import cint, cstr
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_accounting_dimensions,
 )
+from erpnext.utilities.bulk_insert import insert_docs, set_creation, validate_docs
 
 
 class AccountClosingBalance(Document):
@@ -45,6 +46,7 @@ def make_closing_entries(closing_entries, voucher_name, company, closing_date):
 
 	merged_entries = aggregate_with_last_account_closing_balance(combined_entries, accounting_dimensions)
 
+	closing_balances = []
 	for _key, value in merged_entries.items():
 		cle = frappe.new_doc("Account Closing Balance")
 		cle.update(value)
@@ -53,11 +55,16 @@ def make_closing_entries(closing_entries, voucher_name, company, closing_date):
 			{
 				"period_closing_voucher": voucher_name,
 				"closing_date": closing_date,
+				"docstatus": 1,
 			}
 		)
-		cle.flags.ignore_permissions = True
-		cle.flags.ignore_links = True
-		cle.submit()
+		cle.set_new_name()
+		closing_balances.append(cle)
+
+	# one row per account and dimensions
+	validate_docs(closing_balances)
+	set_creation(closing_balances)
+	insert_docs(closing_balances)
 
 
 def aggregate_with_last_account_closing_balance(entries, accounting_dimensions):
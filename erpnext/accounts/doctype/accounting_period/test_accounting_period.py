@@ -4,13 +4,14 @@ import unittest
 
 import frappe
 from frappe.tests import IntegrationTestCase
-from frappe.utils import add_months, nowdate
+from frappe.utils import add_months, getdate, nowdate
 
 from erpnext.accounts.doctype.accounting_period.accounting_period import (
 	ClosedAccountingPeriod,
 	OverlapError,
 )
 from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+from erpnext.accounts.period_resolver import VERSION_CACHE_KEY, IntervalIndex, get_period_resolver
 
 EXTRA_TEST_RECORD_DEPENDENCIES = ["Item"]
 
@@ -37,6 +38,47 @@ class TestAccountingPeriod(IntegrationTestCase):
 		doc = create_sales_invoice(do_not_save=1, cost_center="_Test Company - _TC", warehouse="Stores - _TC")
 		self.assertRaises(ClosedAccountingPeriod, doc.save)
 
+	def test_closed_period_cache_invalidation(self):
+		resolver = get_period_resolver()
+		self.assertIsNone(resolver.find_closed_accounting_period("_Test Company", "Sales Invoice", nowdate()))
+
+		ap1 = create_accounting_period(period_name="Test Accounting Period 3")
+		ap1.save()
+		self.assertEqual(
+			get_period_resolver().find_closed_accounting_period("_Test Company", "Sales Invoice", nowdate()),
+			ap1.name,
+		)
+		self.assertIsNone(
+			get_period_resolver().find_closed_accounting_period("_Test Company", "Journal Entry", nowdate())
+		)
+
+		ap1.delete()
+		self.assertIsNone(
+			get_period_resolver().find_closed_accounting_period("_Test Company", "Sales Invoice", nowdate())
+		)
+
+	def test_period_resolver_version_evicted(self):
+		resolver = get_period_resolver()
+
+		frappe.cache.delete_value(VERSION_CACHE_KEY)
+		frappe.local.period_resolver = None
+		self.assertIsNot(get_period_resolver(), resolver)
+		self.assertTrue(frappe.cache.get_value(VERSION_CACHE_KEY))
+
+	def test_interval_index(self):
+		index = IntervalIndex(
+			[
+				(getdate("2018-01-01"), getdate("2018-12-31"), "year"),
+				(getdate("2018-04-01"), getdate("2018-04-30"), "april"),
+				(getdate("2018-06-01"), getdate("2018-06-30"), "june"),
+			]
+		)
+		self.assertEqual(index.find(getdate("2018-04-15")), "april")
+		self.assertEqual(index.find(getdate("2018-05-15")), "year")
+		self.assertEqual(index.find(getdate("2018-06-30")), "june")
+		self.assertIsNone(index.find(getdate("2019-01-01")))
+		self.assertIsNone(index.find(getdate("2017-12-31")))
+
 	def tearDown(self):
 		for d in frappe.get_all("Accounting Period"):
 			frappe.delete_doc("Accounting Period", d.name)
@@ -89,6 +89,9 @@ class GLEntry(Document):
 			self.validate_currency()
 
 	def on_update(self):
+		if self.flags.validated_in_bulk:
+			return
+
 		adv_adj = self.flags.adv_adj
 		if not self.flags.from_repost and self.voucher_type != "Period Closing Voucher":
 			self.validate_account_details(adv_adj)
@@ -96,32 +99,33 @@ class GLEntry(Document):
 			validate_balance_type(self.account, adv_adj)
 			validate_frozen_account(self.account, adv_adj)
 
-			if (
-				self.voucher_type == "Journal Entry"
-				and frappe.get_cached_value("Journal Entry", self.voucher_no, "voucher_type")
-				== "Exchange Gain Or Loss"
-			):
-				return
-
-			if frappe.get_cached_value("Account", self.account, "account_type") not in [
-				"Receivable",
-				"Payable",
-			]:
-				# Update outstanding amt on against voucher
-				if (
-					self.against_voucher_type
-					in ["Journal Entry", "Sales Invoice", "Purchase Invoice", "Fees"]
-					and self.against_voucher
-					and self.flags.update_outstanding == "Yes"
-					and not frappe.flags.is_reverse_depr_entry
-				):
-					update_outstanding_amt(
-						self.account,
-						self.party_type,
-						self.party,
-						self.against_voucher_type,
-						self.against_voucher,
-					)
+			if self.updates_outstanding_amount():
+				update_outstanding_amt(
+					self.account,
+					self.party_type,
+					self.party,
+					self.against_voucher_type,
+					self.against_voucher,
+				)
+
+	def updates_outstanding_amount(self):
+		"""Whether the outstanding amount of the against voucher is updated on submit"""
+		if (
+			self.voucher_type == "Journal Entry"
+			and frappe.get_cached_value("Journal Entry", self.voucher_no, "voucher_type")
+			== "Exchange Gain Or Loss"
+		):
+			return False
+
+		if frappe.get_cached_value("Account", self.account, "account_type") in ["Receivable", "Payable"]:
+			return False
+
+		return bool(
+			self.against_voucher_type in ["Journal Entry", "Sales Invoice", "Purchase Invoice", "Fees"]
+			and self.against_voucher
+			and self.flags.update_outstanding == "Yes"
+			and not frappe.flags.is_reverse_depr_entry
+		)
 
 	def check_mandatory(self):
 		mandatory = ["account", "voucher_type", "voucher_no", "company"]
@@ -221,15 +225,18 @@ class GLEntry(Document):
 				)
 			)
 
-	def validate_account_details(self, adv_adj):
+	def validate_account_details(self, adv_adj, account_details=None):
 		"""Account must be ledger, active and not freezed"""
 
-		ret = frappe.db.sql(
-			"""select is_group, docstatus, company
+		ret = (
+			account_details
+			or frappe.db.sql(
+				"""select is_group, docstatus, company
 			from tabAccount where name=%s""",
-			self.account,
-			as_dict=1,
-		)[0]
+				self.account,
+				as_dict=1,
+			)[0]
+		)
 
 		if ret.is_group == 1:
 			frappe.throw(
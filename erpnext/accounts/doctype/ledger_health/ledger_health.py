@@ -18,6 +18,7 @@ class LedgerHealth(Document):
 		debit_credit_mismatch: DF.Check
 		general_and_payment_ledger_mismatch: DF.Check
 		name: DF.Int | None
+		payment_ledger_outstanding_mismatch: DF.Check
 		voucher_no: DF.Data | None
 		voucher_type: DF.Data | None
 	# end: auto-generated types
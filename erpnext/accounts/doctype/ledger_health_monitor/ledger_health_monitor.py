@@ -23,6 +23,7 @@ class LedgerHealthMonitor(Document):
 		enable_health_monitor: DF.Check
 		general_and_payment_ledger_mismatch: DF.Check
 		monitor_for_last_x_days: DF.Int
+		payment_ledger_outstanding_mismatch: DF.Check
 	# end: auto-generated types
 
 	pass
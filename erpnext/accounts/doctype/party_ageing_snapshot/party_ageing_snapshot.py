@@ -0,0 +1,402 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import qb
+from frappe.model.document import Document
+from frappe.query_builder import Case
+from frappe.query_builder.functions import Coalesce, IfNull, Max, Min, Round, Sum
+from frappe.utils import add_days, cstr, flt, getdate, now, nowdate
+
+SNAPSHOT_CACHE_KEY = "party_ageing_snapshot_date"
+
+# default ranges of the Accounts Receivable / Payable Summary reports, ageing is based on due date
+AGEING_RANGES = (30, 60, 90, 120)
+
+AMOUNT_FIELDS = ("invoiced", "paid", "credit_note", "outstanding", "outstanding_in_account_currency")
+
+
+class PartyAgeingSnapshot(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		account: DF.Link | None
+		account_currency: DF.Link | None
+		account_type: DF.Literal["Receivable", "Payable"]
+		ageing_bucket: DF.Int
+		ageing_date: DF.Date | None
+		company: DF.Link | None
+		credit_note: DF.Currency
+		invoiced: DF.Currency
+		outstanding: DF.Currency
+		outstanding_in_account_currency: DF.Currency
+		paid: DF.Currency
+		party: DF.DynamicLink | None
+		party_type: DF.Link | None
+	# end: auto-generated types
+
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Party Ageing Snapshot", ["company", "party_type", "party"])
+
+
+def build_party_ageing_snapshots():
+	"""Age the open vouchers of every company as on today.
+	Called daily via hooks.py"""
+	for company in frappe.get_all("Company", pluck="name"):
+		# the snapshot is deleted by make_party_ageing_snapshot before the first read of its
+		# transaction, so that the ledger is read after the changes committed while waiting for it
+		frappe.db.commit()
+		make_party_ageing_snapshot(company, nowdate())
+		frappe.db.commit()
+
+
+def make_party_ageing_snapshot(company, ageing_date):
+	"""Replace the snapshot of the company with the ageing of its open vouchers as on `ageing_date`.
+
+	Deleting the snapshot locks it till commit, changes of other transactions are applied to the
+	snapshot after it is rebuilt, see `apply_party_ageing_changes`."""
+	frappe.db.delete("Party Ageing Snapshot", {"company": company})
+	insert_snapshot_rows(company, ageing_date, get_ageing_from_payment_ledger(company, ageing_date))
+
+	# replaced, not cleared, so that concurrent reads can not cache the date being replaced
+	frappe.cache.hset(SNAPSHOT_CACHE_KEY, company, getdate(ageing_date))
+	frappe.db.after_rollback.add(clear_ageing_snapshot_date)
+
+
+def clear_ageing_snapshot_date():
+	frappe.cache.delete_value(SNAPSHOT_CACHE_KEY)
+
+
+def lock_party_ageing_snapshot(company, party_type, party):
+	"""Lock the snapshot rows of the party till commit, returns the date they are aged on"""
+	table = qb.DocType("Party Ageing Snapshot")
+	ageing_dates = (
+		qb.from_(table)
+		.select(table.ageing_date)
+		.where((table.company == company) & (table.party_type == party_type) & (table.party == party))
+		.for_update()
+	).run(pluck=True)
+
+	return ageing_dates[0] if ageing_dates else None
+
+
+def get_key(row):
+	return (row.account, cstr(row.party_type), cstr(row.party), row.ageing_bucket)
+
+
+def get_ageing_from_payment_ledger(company, ageing_date):
+	"""Invoiced, paid, credit note and outstanding amounts of open vouchers per account, party and
+	ageing bucket, classified the way the Accounts Receivable report does.
+
+	A voucher is aged from its due date, or posting date if it has none. Bucket 0 holds vouchers
+	not due on `ageing_date`, see `get_ageing_bucket`."""
+	ageing_date = getdate(ageing_date)
+	vouchers_query = get_open_vouchers_query(company, ageing_date)
+
+	bucket = Case().when(vouchers_query.entry_date > ageing_date, 0)
+	for idx, days in enumerate(AGEING_RANGES):
+		bucket = bucket.when(vouchers_query.entry_date >= add_days(ageing_date, -days), idx + 1)
+	bucket = bucket.else_(len(AGEING_RANGES) + 1).as_("ageing_bucket")
+
+	group_by = [
+		vouchers_query.company,
+		vouchers_query.account_type,
+		vouchers_query.account,
+		vouchers_query.party_type,
+		vouchers_query.party,
+		bucket,
+	]
+
+	return (
+		qb.from_(vouchers_query)
+		.select(
+			*group_by,
+			Max(vouchers_query.account_currency).as_("account_currency"),
+			*(Sum(vouchers_query.field(field)).as_(field) for field in AMOUNT_FIELDS),
+		)
+		.groupby(*group_by)
+		.run(as_dict=True)
+	)
+
+
+def get_ageing_bucket(entry_date, ageing_date):
+	"""Bucket of a voucher dated `entry_date`, same as in `get_ageing_from_payment_ledger`"""
+	entry_date, ageing_date = getdate(entry_date), getdate(ageing_date)
+	if entry_date > ageing_date:
+		return 0
+
+	for idx, days in enumerate(AGEING_RANGES):
+		if entry_date >= add_days(ageing_date, -days):
+			return idx + 1
+
+	return len(AGEING_RANGES) + 1
+
+
+def get_voucher_amounts(company, vouchers):
+	"""Amounts of the against vouchers in `vouchers` per posting date, see `get_open_vouchers`"""
+	if not vouchers:
+		return []
+
+	ple = qb.DocType("Payment Ledger Entry")
+	return (
+		get_voucher_amounts_query(company)
+		.where(ple.against_voucher_no.isin(list(vouchers)))
+		.groupby(ple.posting_date)
+		.run(as_dict=True)
+	)
+
+
+def get_open_vouchers(voucher_amounts, ageing_date):
+	"""Vouchers of `voucher_amounts` open as on `ageing_date`, same as `get_open_vouchers_query`"""
+	from erpnext.accounts.utils import get_currency_precision
+
+	precision = get_currency_precision()
+	ageing_date = getdate(ageing_date)
+
+	vouchers = {}
+	for row in voucher_amounts:
+		if getdate(row.posting_date) > ageing_date:
+			continue
+
+		key = (row.account, row.party_type, row.party, row.against_voucher_type, row.against_voucher_no)
+		voucher = vouchers.get(key)
+		if not voucher:
+			vouchers[key] = frappe._dict(row, **{field: flt(row[field]) for field in AMOUNT_FIELDS})
+			continue
+
+		voucher.due_date = min(filter(None, (voucher.due_date, row.due_date)), default=None)
+		voucher.posting_date = min(voucher.posting_date, row.posting_date)
+		for field in AMOUNT_FIELDS:
+			voucher[field] += flt(row[field])
+
+	open_vouchers = []
+	for voucher in vouchers.values():
+		if flt(voucher.outstanding, precision) and flt(voucher.outstanding_in_account_currency, precision):
+			voucher.entry_date = voucher.due_date or voucher.posting_date
+			open_vouchers.append(voucher)
+
+	return open_vouchers
+
+
+def get_open_vouchers_query(company, ageing_date):
+	"""Amounts and ageing date of the vouchers open as on `ageing_date`"""
+	from erpnext.accounts.utils import get_currency_precision
+
+	precision = get_currency_precision()
+	ple = qb.DocType("Payment Ledger Entry")
+
+	return (
+		get_voucher_amounts_query(company)
+		.where(ple.posting_date <= ageing_date)
+		.having(
+			(Round(Sum(ple.amount), precision) != 0)
+			& (Round(Sum(ple.amount_in_account_currency), precision) != 0)
+		)
+	)
+
+
+def get_voucher_amounts_query(company):
+	ple = qb.DocType("Payment Ledger Entry")
+
+	is_payment = ple.voucher_type.isin(["Journal Entry", "Payment Entry"]) & (
+		ple.voucher_no != ple.against_voucher_no
+	)
+	is_credit_note = ple.voucher_type.isin(["Sales Invoice", "Purchase Invoice"]) & (
+		ple.voucher_no != ple.against_voucher_no
+	)
+	is_self = (ple.voucher_type == ple.against_voucher_type) & (ple.voucher_no == ple.against_voucher_no)
+	group_by = [
+		ple.company,
+		ple.account_type,
+		ple.account,
+		ple.party_type,
+		ple.party,
+		ple.against_voucher_type,
+		ple.against_voucher_no,
+	]
+
+	due_date = Min(Case().when(is_self, IfNull(ple.due_date, ple.posting_date)))
+
+	return (
+		qb.from_(ple)
+		.select(
+			*group_by,
+			Max(ple.account_currency).as_("account_currency"),
+			due_date.as_("due_date"),
+			Min(ple.posting_date).as_("posting_date"),
+			Coalesce(due_date, Min(ple.posting_date)).as_("entry_date"),
+			Sum(Case().when((ple.amount > 0) & is_payment.negate(), ple.amount).else_(0)).as_("invoiced"),
+			Sum(
+				Case()
+				.when((ple.amount > 0) & is_payment, ple.amount * -1)
+				.when((ple.amount <= 0) & is_credit_note.negate(), ple.amount * -1)
+				.else_(0)
+			).as_("paid"),
+			Sum(Case().when((ple.amount <= 0) & is_credit_note, ple.amount * -1).else_(0)).as_("credit_note"),
+			Sum(ple.amount).as_("outstanding"),
+			Sum(ple.amount_in_account_currency).as_("outstanding_in_account_currency"),
+		)
+		.where((ple.company == company) & (ple.delinked == 0))
+		.groupby(*group_by)
+	)
+
+
+def insert_snapshot_rows(company, ageing_date, rows):
+	user = frappe.session.user
+	timestamp = now()
+
+	fields = [
+		"name",
+		"creation",
+		"modified",
+		"owner",
+		"modified_by",
+		"company",
+		"ageing_date",
+		"account",
+		"account_type",
+		"party_type",
+		"party",
+		"ageing_bucket",
+		"account_currency",
+		*AMOUNT_FIELDS,
+	]
+	values = [
+		(
+			frappe.generate_hash(length=10),
+			timestamp,
+			timestamp,
+			user,
+			user,
+			company,
+			ageing_date,
+			row.account,
+			row.account_type,
+			row.party_type,
+			row.party,
+			row.ageing_bucket,
+			row.account_currency,
+			*(flt(row[field]) for field in AMOUNT_FIELDS),
+		)
+		for row in rows
+	]
+
+	frappe.db.bulk_insert("Party Ageing Snapshot", fields=fields, values=values)
+
+
+def get_ageing_snapshot_date(company):
+	"""Date the snapshot of the company is aged on"""
+	return frappe.cache.hget(
+		SNAPSHOT_CACHE_KEY,
+		company,
+		lambda: frappe.db.get_value("Party Ageing Snapshot", {"company": company}, "ageing_date") or "",
+	)
+
+
+def track_party_ageing_changes(pl_entries):
+	"""Remember the open against vouchers of Payment Ledger Entries about to be linked, delinked
+	or deleted. The snapshot is updated with the change in their ageing when the transaction is
+	committed, see `apply_party_ageing_changes`."""
+	changes = getattr(frappe.local, "party_ageing_changes", None)
+	if changes is None:
+		changes = frappe.local.party_ageing_changes = {}
+
+	vouchers = {}
+	for entry in pl_entries:
+		entry = frappe._dict(entry)
+		if not get_ageing_snapshot_date(entry.company):
+			continue
+
+		tracked = changes.get(entry.company)
+		if not tracked or entry.against_voucher_no not in tracked.vouchers:
+			vouchers.setdefault(entry.company, set()).add(entry.against_voucher_no)
+
+	if not vouchers:
+		return
+
+	if not changes:
+		frappe.db.before_commit.add(apply_party_ageing_changes)
+		frappe.db.after_rollback.add(clear_party_ageing_changes)
+
+	for company, company_vouchers in vouchers.items():
+		tracked = changes.setdefault(company, frappe._dict(vouchers=set(), voucher_amounts=[]))
+		tracked.vouchers.update(company_vouchers)
+		# aged when applied, the snapshot may be rebuilt on another date in the meantime
+		tracked.voucher_amounts.extend(get_voucher_amounts(company, company_vouchers))
+
+
+def add_ageing(ageing, open_vouchers, ageing_date, sign=1):
+	"""Add the amounts of `open_vouchers` aged on `ageing_date` to `ageing`, per snapshot key"""
+	for row in open_vouchers:
+		row = frappe._dict(row, ageing_bucket=get_ageing_bucket(row.entry_date, ageing_date))
+		total = ageing.setdefault(get_key(row), frappe._dict(row, **dict.fromkeys(AMOUNT_FIELDS, 0.0)))
+		for field in AMOUNT_FIELDS:
+			total[field] += sign * flt(row[field])
+
+
+def apply_party_ageing_changes():
+	"""Apply the change in ageing of the vouchers tracked in this transaction to the snapshot.
+
+	Snapshot rows of the affected parties are locked first, so a rebuild running concurrently either
+	sees the changes of this transaction or is complete before the deltas are applied. Snapshot rows
+	are read with locking reads, which see the latest committed snapshot."""
+	changes = getattr(frappe.local, "party_ageing_changes", None) or {}
+	frappe.local.party_ageing_changes = None
+
+	for company in sorted(changes):
+		tracked = changes[company]
+		voucher_amounts = get_voucher_amounts(company, tracked.vouchers)
+
+		parties = {(row.party_type, row.party) for row in tracked.voucher_amounts + voucher_amounts}
+		ageing_date = None
+		for party_type, party in sorted(parties):
+			ageing_date = lock_party_ageing_snapshot(company, party_type, party) or ageing_date
+
+		# parties without snapshot rows are aged on the date of the snapshot, set before its commit
+		ageing_date = ageing_date or get_ageing_snapshot_date(company)
+		if not ageing_date:
+			continue
+
+		ageing = {}
+		add_ageing(ageing, get_open_vouchers(tracked.voucher_amounts, ageing_date), ageing_date, sign=-1)
+		add_ageing(ageing, get_open_vouchers(voucher_amounts, ageing_date), ageing_date)
+		for delta in ageing.values():
+			if any(flt(delta[field]) for field in AMOUNT_FIELDS):
+				apply_delta_to_snapshot(company, ageing_date, delta)
+
+
+def clear_party_ageing_changes():
+	frappe.local.party_ageing_changes = None
+
+
+def apply_delta_to_snapshot(company, ageing_date, delta):
+	table = qb.DocType("Party Ageing Snapshot")
+	name = (
+		qb.from_(table)
+		.select(table.name)
+		.where(
+			(table.company == company)
+			& (table.account == delta.account)
+			& (IfNull(table.party_type, "") == cstr(delta.party_type))
+			& (IfNull(table.party, "") == cstr(delta.party))
+			& (table.ageing_bucket == delta.ageing_bucket)
+		)
+		.limit(1)
+		.for_update()
+	).run(pluck=True)
+
+	if name:
+		query = qb.update(table).where(table.name == name[0])
+		for field in AMOUNT_FIELDS:
+			query = query.set(table[field], table[field] + delta[field])
+		query.run()
+	else:
+		insert_snapshot_rows(company, ageing_date, [delta])
@@ -0,0 +1,129 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests import IntegrationTestCase
+from frappe.utils import add_days, today
+
+from erpnext.accounts.doctype.party_ageing_snapshot.party_ageing_snapshot import (
+	SNAPSHOT_CACHE_KEY,
+	apply_party_ageing_changes,
+	make_party_ageing_snapshot,
+	track_party_ageing_changes,
+)
+from erpnext.accounts.doctype.payment_entry.payment_entry import get_payment_entry
+from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+from erpnext.accounts.party import get_dashboard_info
+from erpnext.accounts.report.accounts_receivable_summary.accounts_receivable_summary import execute
+from erpnext.accounts.test.accounts_mixin import AccountsTestMixin
+
+SNAPSHOT_FIELDS = ["account", "party", "ageing_bucket", "invoiced", "paid", "credit_note", "outstanding"]
+
+
+class IntegrationTestPartyAgeingSnapshot(AccountsTestMixin, IntegrationTestCase):
+	def setUp(self):
+		self.create_company()
+		self.create_customer()
+		self.create_item()
+		self.clear_old_entries()
+		frappe.db.delete("Party Ageing Snapshot", {"company": self.company})
+		frappe.cache.hdel(SNAPSHOT_CACHE_KEY, self.company)
+
+	def tearDown(self):
+		frappe.db.rollback()
+		frappe.local.party_ageing_changes = None
+		frappe.cache.hdel(SNAPSHOT_CACHE_KEY, self.company)
+
+	def create_sales_invoice(self, posting_date, rate):
+		return create_sales_invoice(
+			item=self.item,
+			company=self.company,
+			customer=self.customer,
+			debit_to=self.debit_to,
+			posting_date=posting_date,
+			due_date=posting_date,
+			parent_cost_center=self.cost_center,
+			cost_center=self.cost_center,
+			rate=rate,
+			price_list_rate=rate,
+		)
+
+	def get_summary(self):
+		filters = {
+			"company": self.company,
+			"report_date": today(),
+			"ageing_based_on": "Due Date",
+			"range": "30, 60, 90, 120",
+			"party_type": "Customer",
+			"party": [self.customer],
+		}
+		return execute(filters)[1]
+
+	def get_snapshot(self):
+		return frappe.get_all(
+			"Party Ageing Snapshot",
+			filters={"company": self.company},
+			fields=SNAPSHOT_FIELDS,
+			order_by="ageing_bucket",
+		)
+
+	def test_summary_from_snapshot(self):
+		self.create_sales_invoice(add_days(today(), -45), 300)
+		si = self.create_sales_invoice(today(), 200)
+
+		summary = self.get_summary()
+		dashboard_info = get_dashboard_info("Customer", self.customer)
+
+		make_party_ageing_snapshot(self.company, today())
+		self.assertEqual(
+			[(row.ageing_bucket, row.outstanding) for row in self.get_snapshot()], [(1, 200.0), (2, 300.0)]
+		)
+		self.assertEqual(self.get_summary(), summary)
+		self.assertEqual(get_dashboard_info("Customer", self.customer), dashboard_info)
+
+		# same day payments are applied to the snapshot as deltas on commit
+		pe = get_payment_entry(si.doctype, si.name)
+		pe.paid_amount = 50
+		pe.references[0].allocated_amount = 50
+		pe.save().submit()
+		apply_party_ageing_changes()
+
+		incremental = self.get_snapshot()
+		make_party_ageing_snapshot(self.company, today())
+		self.assertEqual(incremental, self.get_snapshot())
+		self.assertEqual(incremental[0].outstanding, 150.0)
+
+	def test_snapshot_rebuilt_on_another_date(self):
+		si = self.create_sales_invoice(add_days(today(), -20), 300)
+		make_party_ageing_snapshot(self.company, today())
+
+		# the snapshot is rebuilt on the next days before the tracked changes are committed
+		track_party_ageing_changes(
+			frappe.get_all(
+				"Payment Ledger Entry",
+				filters={"voucher_no": si.name},
+				fields=["company", "against_voucher_no"],
+			)
+		)
+		make_party_ageing_snapshot(self.company, add_days(today(), 20))
+		rebuilt = self.get_snapshot()
+		self.assertEqual([(row.ageing_bucket, row.outstanding) for row in rebuilt], [(2, 300.0)])
+
+		apply_party_ageing_changes()
+		self.assertEqual(self.get_snapshot(), rebuilt)
+
+	def test_future_vouchers_not_in_snapshot(self):
+		self.create_sales_invoice(add_days(today(), -45), 300)
+		make_party_ageing_snapshot(self.company, today())
+		snapshot = self.get_snapshot()
+		self.assertEqual([(row.ageing_bucket, row.outstanding) for row in snapshot], [(2, 300.0)])
+
+		# vouchers posted after the ageing date are left out, like in the summary as on that date
+		summary = self.get_summary()
+		self.create_sales_invoice(add_days(today(), 10), 200)
+		apply_party_ageing_changes()
+		self.assertEqual(self.get_snapshot(), snapshot)
+		self.assertEqual(self.get_summary(), summary)
+
+		make_party_ageing_snapshot(self.company, today())
+		self.assertEqual(self.get_snapshot(), snapshot)
@@ -0,0 +1,302 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import qb
+from frappe.model.document import Document
+from frappe.query_builder import Criterion
+from frappe.query_builder.functions import IfNull, Max, Sum
+from frappe.utils import cstr, flt, now
+
+from erpnext.accounts.doctype.party_ageing_snapshot.party_ageing_snapshot import track_party_ageing_changes
+
+SUMMARY_FIELDS = {"company", "account", "account_type", "party_type", "party"}
+
+
+class PaymentLedgerOutstanding(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		account: DF.Link | None
+		account_currency: DF.Link | None
+		account_type: DF.Literal["Receivable", "Payable"]
+		company: DF.Link | None
+		outstanding: DF.Currency
+		outstanding_in_account_currency: DF.Currency
+		party: DF.DynamicLink | None
+		party_type: DF.Link | None
+		voucher_no: DF.DynamicLink | None
+		voucher_type: DF.Link | None
+	# end: auto-generated types
+
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Payment Ledger Outstanding", ["voucher_no", "voucher_type"])
+	frappe.db.add_index("Payment Ledger Outstanding", ["company", "party_type", "party"])
+
+
+def get_key(row):
+	return (
+		row.company,
+		row.account,
+		cstr(row.party_type),
+		cstr(row.party),
+		row.against_voucher_type,
+		row.against_voucher_no,
+	)
+
+
+def get_payment_ledger_amounts(criterion, group_by_voucher=False):
+	"""Sum of linked Payment Ledger Entries matching `criterion` per against voucher, account and party"""
+	ple = qb.DocType("Payment Ledger Entry")
+	group_by = [
+		ple.company,
+		ple.account,
+		ple.account_type,
+		ple.party_type,
+		ple.party,
+		ple.against_voucher_type,
+		ple.against_voucher_no,
+	]
+	if group_by_voucher:
+		group_by += [ple.voucher_type, ple.voucher_no]
+
+	return (
+		qb.from_(ple)
+		.select(
+			*group_by,
+			Max(ple.account_currency).as_("account_currency"),
+			Sum(ple.amount).as_("amount"),
+			Sum(ple.amount_in_account_currency).as_("amount_in_account_currency"),
+		)
+		.where(ple.delinked == 0)
+		.where(criterion)
+		.groupby(*group_by)
+		.run(as_dict=True)
+	)
+
+
+def update_payment_ledger_outstanding(pl_entries, sign=1):
+	"""Apply the amounts of Payment Ledger Entries to the outstanding of their against voucher.
+
+	Called when entries are linked (sign 1) or delinked / deleted (sign -1), in the same
+	transaction as the change to the Payment Ledger."""
+	track_party_ageing_changes(pl_entries)
+
+	deltas = {}
+	for entry in pl_entries:
+		entry = frappe._dict(entry)
+		delta = deltas.setdefault(
+			get_key(entry),
+			frappe._dict(
+				company=entry.company,
+				account=entry.account,
+				account_type=entry.account_type,
+				party_type=entry.party_type,
+				party=entry.party,
+				voucher_type=entry.against_voucher_type,
+				voucher_no=entry.against_voucher_no,
+				account_currency=entry.account_currency,
+				outstanding=0.0,
+				outstanding_in_account_currency=0.0,
+			),
+		)
+		delta.outstanding += sign * flt(entry.amount)
+		delta.outstanding_in_account_currency += sign * flt(entry.amount_in_account_currency)
+
+	for delta in deltas.values():
+		apply_delta_to_outstanding(delta)
+
+
+def get_key_condition(table, row):
+	return (
+		(table.voucher_no == row.voucher_no)
+		& (table.voucher_type == row.voucher_type)
+		& (table.company == row.company)
+		& (table.account == row.account)
+		& (IfNull(table.party_type, "") == cstr(row.party_type))
+		& (IfNull(table.party, "") == cstr(row.party))
+	)
+
+
+def apply_delta_to_outstanding(delta):
+	table = qb.DocType("Payment Ledger Outstanding")
+	name = (
+		qb.from_(table).select(table.name).where(get_key_condition(table, delta)).limit(1).for_update()
+	).run(pluck=True)
+
+	if name:
+		(
+			qb.update(table)
+			.set(table.outstanding, table.outstanding + delta.outstanding)
+			.set(
+				table.outstanding_in_account_currency,
+				table.outstanding_in_account_currency + delta.outstanding_in_account_currency,
+			)
+			.where(table.name == name[0])
+		).run()
+	else:
+		insert_outstanding_rows([delta])
+
+
+def insert_outstanding_rows(rows):
+	user = frappe.session.user
+	timestamp = now()
+
+	fields = [
+		"name",
+		"creation",
+		"modified",
+		"owner",
+		"modified_by",
+		"company",
+		"account",
+		"account_type",
+		"party_type",
+		"party",
+		"voucher_type",
+		"voucher_no",
+		"account_currency",
+		"outstanding",
+		"outstanding_in_account_currency",
+	]
+	values = [
+		(
+			frappe.generate_hash(length=10),
+			timestamp,
+			timestamp,
+			user,
+			user,
+			row.company,
+			row.account,
+			row.account_type,
+			row.party_type,
+			row.party,
+			row.voucher_type,
+			row.voucher_no,
+			row.account_currency,
+			flt(row.outstanding),
+			flt(row.outstanding_in_account_currency),
+		)
+		for row in rows
+	]
+
+	frappe.db.bulk_insert("Payment Ledger Outstanding", fields=fields, values=values)
+
+
+def delete_payment_ledger_entries(criterion):
+	"""Delete Payment Ledger Entries matching `criterion` and remove them from the outstanding"""
+	ple = qb.DocType("Payment Ledger Entry")
+	update_payment_ledger_outstanding(get_payment_ledger_amounts(criterion), sign=-1)
+	qb.from_(ple).delete().where(criterion).run()
+
+
+def get_outstanding_from_payment_ledger(company=None):
+	"""Outstanding rows as computed from the Payment Ledger"""
+	ple = qb.DocType("Payment Ledger Entry")
+	criterion = ple.company == company if company else Criterion.all([])
+
+	rows = []
+	for row in get_payment_ledger_amounts(criterion):
+		rows.append(
+			frappe._dict(
+				company=row.company,
+				account=row.account,
+				account_type=row.account_type,
+				party_type=row.party_type,
+				party=row.party,
+				voucher_type=row.against_voucher_type,
+				voucher_no=row.against_voucher_no,
+				account_currency=row.account_currency,
+				outstanding=row.amount,
+				outstanding_in_account_currency=row.amount_in_account_currency,
+			)
+		)
+
+	return rows
+
+
+def rebuild_payment_ledger_outstanding(company=None):
+	"""Rebuild the outstanding of all vouchers of `company` from the Payment Ledger"""
+	table = qb.DocType("Payment Ledger Outstanding")
+	query = qb.from_(table).delete()
+	if company:
+		query = query.where(table.company == company)
+	query.run()
+
+	insert_outstanding_rows(get_outstanding_from_payment_ledger(company))
+
+
+def check_payment_ledger_outstanding(company, repair=True):
+	"""Compare the outstanding of vouchers of `company` with the Payment Ledger.
+
+	Returns the mismatched rows as computed from the Payment Ledger, rows that only exist in
+	Payment Ledger Outstanding are returned with zero outstanding. If `repair` is set, the
+	outstanding of mismatched vouchers is rebuilt."""
+	from erpnext.accounts.utils import get_currency_precision
+
+	precision = get_currency_precision()
+
+	def key(row):
+		return (row.account, cstr(row.party_type), cstr(row.party), row.voucher_type, row.voucher_no)
+
+	expected = {key(row): row for row in get_outstanding_from_payment_ledger(company)}
+
+	stored = {}
+	for row in frappe.get_all(
+		"Payment Ledger Outstanding",
+		filters={"company": company},
+		fields=[
+			"company",
+			"account",
+			"account_type",
+			"party_type",
+			"party",
+			"voucher_type",
+			"voucher_no",
+			"account_currency",
+			"outstanding",
+			"outstanding_in_account_currency",
+		],
+	):
+		if stored_row := stored.get(key(row)):
+			stored_row.outstanding = flt(stored_row.outstanding) + flt(row.outstanding)
+			stored_row.outstanding_in_account_currency = flt(
+				stored_row.outstanding_in_account_currency
+			) + flt(row.outstanding_in_account_currency)
+		else:
+			stored[key(row)] = row
+
+	mismatches = []
+	for row_key in expected.keys() | stored.keys():
+		expected_row = expected.get(row_key)
+		stored_row = stored.get(row_key) or frappe._dict(outstanding=0, outstanding_in_account_currency=0)
+		if not expected_row:
+			expected_row = frappe._dict(stored_row, outstanding=0.0, outstanding_in_account_currency=0.0)
+
+		if flt(flt(expected_row.outstanding) - flt(stored_row.outstanding), precision) or flt(
+			flt(expected_row.outstanding_in_account_currency)
+			- flt(stored_row.outstanding_in_account_currency),
+			precision,
+		):
+			mismatches.append(expected_row)
+
+	if repair and mismatches:
+		repair_outstanding(company, mismatches)
+
+	return mismatches
+
+
+def repair_outstanding(company, rows):
+	table = qb.DocType("Payment Ledger Outstanding")
+	for row in rows:
+		(qb.from_(table).delete().where(get_key_condition(table, row))).run()
+
+	insert_outstanding_rows(rows)
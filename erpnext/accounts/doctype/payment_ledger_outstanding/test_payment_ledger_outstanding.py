@@ -0,0 +1,112 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe import qb
+from frappe.tests import IntegrationTestCase, UnitTestCase
+from frappe.utils import flt, nowdate
+
+from erpnext.accounts.doctype.payment_entry.payment_entry import get_payment_entry
+from erpnext.accounts.doctype.payment_ledger_outstanding.payment_ledger_outstanding import (
+	check_payment_ledger_outstanding,
+	get_outstanding_from_payment_ledger,
+)
+from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+from erpnext.accounts.utils import QueryPaymentLedger
+
+# On IntegrationTestCase, the doctype test records and all
+# link-field test record depdendencies are recursively loaded
+# Use these module variables to add/remove to/from that list
+EXTRA_TEST_RECORD_DEPENDENCIES = []  # eg. ["User"]
+IGNORE_TEST_RECORD_DEPENDENCIES = []  # eg. ["User"]
+
+
+class UnitTestPaymentLedgerOutstanding(UnitTestCase):
+	"""
+	Unit tests for PaymentLedgerOutstanding.
+	Use this class for testing individual functions and methods.
+	"""
+
+	pass
+
+
+class IntegrationTestPaymentLedgerOutstanding(IntegrationTestCase):
+	def setUp(self):
+		self.company = "_Test Company"
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def get_outstanding(self, voucher_no):
+		"""Outstanding of the voucher from Payment Ledger Outstanding and from the Payment Ledger"""
+		stored = flt(
+			frappe.db.get_value(
+				"Payment Ledger Outstanding",
+				{"voucher_no": voucher_no},
+				"sum(outstanding_in_account_currency)",
+			)
+		)
+		computed = sum(
+			flt(row.outstanding_in_account_currency)
+			for row in get_outstanding_from_payment_ledger(self.company)
+			if row.voucher_no == voucher_no
+		)
+		return stored, computed
+
+	def make_payment(self, si, amount):
+		pe = get_payment_entry(si.doctype, si.name, party_amount=amount, bank_account="_Test Bank - _TC")
+		pe.reference_no = "1"
+		pe.reference_date = nowdate()
+		return pe.submit()
+
+	def test_outstanding_follows_payment_ledger(self):
+		si = create_sales_invoice(qty=1, rate=300)
+		self.assertEqual(self.get_outstanding(si.name), (300, 300))
+
+		pe = self.make_payment(si, 100)
+		self.assertEqual(self.get_outstanding(si.name), (200, 200))
+		self.assertEqual(frappe.db.get_value(si.doctype, si.name, "outstanding_amount"), 200)
+
+		pe.cancel()
+		self.assertEqual(self.get_outstanding(si.name), (300, 300))
+		self.assertEqual(frappe.db.get_value(si.doctype, si.name, "outstanding_amount"), 300)
+
+		si.reload()
+		si.cancel()
+		self.assertEqual(self.get_outstanding(si.name), (0, 0))
+		self.assertEqual(check_payment_ledger_outstanding(self.company, repair=False), [])
+
+	def test_repair_outstanding(self):
+		si = create_sales_invoice(qty=1, rate=300)
+		frappe.db.set_value(
+			"Payment Ledger Outstanding",
+			{"voucher_no": si.name},
+			{"outstanding": 50, "outstanding_in_account_currency": 50},
+		)
+		self.assertEqual(self.get_outstanding(si.name), (50, 300))
+
+		mismatches = check_payment_ledger_outstanding(self.company)
+		self.assertEqual([(row.voucher_no, row.outstanding) for row in mismatches], [(si.name, 300)])
+		self.assertEqual(self.get_outstanding(si.name), (300, 300))
+		self.assertEqual(check_payment_ledger_outstanding(self.company), [])
+
+	def test_voucher_outstandings_from_summary(self):
+		si = create_sales_invoice(qty=1, rate=300)
+		self.make_payment(si, 120)
+
+		ple = qb.DocType("Payment Ledger Entry")
+		vouchers = [frappe._dict(voucher_type=si.doctype, voucher_no=si.name)]
+		common_filter = [ple.company == self.company, ple.party == si.customer]
+
+		from_summary = QueryPaymentLedger().get_voucher_outstandings(vouchers, common_filter=common_filter)
+		# filters on fields outside of the summary compute the outstanding from the Payment Ledger
+		from_ledger = QueryPaymentLedger().get_voucher_outstandings(
+			vouchers, common_filter=[*common_filter, ple.posting_date.isnotnull()]
+		)
+
+		self.assertEqual(len(from_summary), 1)
+		self.assertEqual(from_summary[0].outstanding_in_account_currency, 180)
+		self.assertEqual(
+			[(row.outstanding, row.outstanding_in_account_currency, row.paid_amount) for row in from_summary],
+			[(row.outstanding, row.outstanding_in_account_currency, row.paid_amount) for row in from_ledger],
+		)
@@ -6,9 +6,12 @@ import copy
 
 import frappe
 from frappe import _
-from frappe.query_builder.functions import Sum
-from frappe.utils import add_days, flt, formatdate, getdate
+from frappe.query_builder.functions import Max, Sum
+from frappe.utils import add_days, add_months, flt, formatdate, get_first_day, get_last_day, getdate
 
+from erpnext.accounts.doctype.account_balance_snapshot.account_balance_snapshot import (
+	reconcile_account_balance_snapshots,
+)
 from erpnext.accounts.doctype.account_closing_balance.account_closing_balance import (
 	make_closing_entries,
 )
@@ -18,6 +21,13 @@ from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
 from erpnext.accounts.utils import get_account_currency, get_fiscal_year
 from erpnext.controllers.accounts_controller import AccountsController
 
+# closing of companies with more GL entries is processed in background jobs, one per month of the period
+BACKGROUND_CLOSING_THRESHOLD = 100_000
+# month balances of vouchers whose jobs never complete are dropped from the cache after a day
+BALANCES_CACHE_EXPIRY = 24 * 60 * 60
+# months with more balance rows are not kept in the cache, they are aggregated again on closing
+MAX_CACHED_BALANCES = 50_000
+
 
 class PeriodClosingVoucher(AccountsController):
 	# begin: auto-generated types
@@ -136,15 +146,12 @@ class PeriodClosingVoucher(AccountsController):
 		self.ignore_linked_doctypes = ("GL Entry", "Stock Ledger Entry", "Payment Ledger Entry")
 		self.block_if_future_closing_voucher_exists()
 		self.db_set("gle_processing_status", "In Progress")
+		frappe.cache.delete_value(get_balances_cache_key(self.name))
 		self.cancel_gl_entries()
 
 	def make_gl_entries(self):
-		if frappe.db.estimate_count("GL Entry") > 100_000:
-			frappe.enqueue(
-				process_gl_and_closing_entries,
-				doc=self,
-				timeout=1800,
-			)
+		if frappe.db.estimate_count("GL Entry") > BACKGROUND_CLOSING_THRESHOLD:
+			enqueue_period_balances(self)
 			frappe.msgprint(
 				_(
 					"The GL Entries and closing balances will be processed in the background, it can take a few minutes."
@@ -242,17 +249,14 @@ class PeriodClosingVoucher(AccountsController):
 		"""Get balance for dimension-wise pl accounts"""
 		self.get_accounting_dimension_fields()
 		acc_bal_dict = frappe._dict()
-		gl_entries = []
 
-		with frappe.db.unbuffered_cursor():
-			gl_entries = self.get_gl_entries_for_current_period(report_type, as_iterator=True)
-			for gle in gl_entries:
-				acc_bal_dict = self.set_account_balance_dict(gle, acc_bal_dict)
+		for balance in self.get_period_balances():
+			if balance.report_type == report_type:
+				acc_bal_dict = self.set_account_balance_dict(balance, acc_bal_dict)
 
 		if report_type == "Balance Sheet" and self.is_first_period_closing_voucher():
-			opening_entries = self.get_gl_entries_for_current_period(report_type, only_opening_entries=True)
-			for gle in opening_entries:
-				acc_bal_dict = self.set_account_balance_dict(gle, acc_bal_dict)
+			for balance in self.get_account_balances(only_opening_entries=True):
+				acc_bal_dict = self.set_account_balance_dict(balance, acc_bal_dict)
 
 		return acc_bal_dict
 
@@ -260,41 +264,67 @@ class PeriodClosingVoucher(AccountsController):
 		default_dimensions = ["cost_center", "finance_book", "project"]
 		self.accounting_dimension_fields = default_dimensions + get_accounting_dimensions()
 
-	def get_gl_entries_for_current_period(self, report_type, only_opening_entries=False, as_iterator=False):
-		date_condition = ""
+	def get_period_balances(self):
+		"""Balances of the period, combining the months aggregated by background jobs (if any)"""
+		if hasattr(self, "period_balances"):
+			return self.period_balances
+
+		cache_key = get_balances_cache_key(self.name)
+		months = get_months(self.period_start_date, self.period_end_date)
+		month_balances = [frappe.cache.hget(cache_key, str(from_date)) for from_date, _to_date in months]
+
+		if not any(balances is not None for balances in month_balances):
+			self.period_balances = self.get_account_balances(self.period_start_date, self.period_end_date)
+			return self.period_balances
+
+		self.period_balances = []
+		for (from_date, to_date), balances in zip(months, month_balances, strict=True):
+			if balances is None:
+				balances = self.get_account_balances(from_date, to_date)
+
+			self.period_balances.extend(balances)
+
+		return self.period_balances
+
+	def get_account_balances(self, from_date=None, to_date=None, only_opening_entries=False):
+		"""Balances of the accounts of the company per accounting dimensions, aggregated in SQL"""
+		if not hasattr(self, "accounting_dimension_fields"):
+			self.get_accounting_dimension_fields()
+
+		gle = frappe.qb.DocType("GL Entry")
+		account = frappe.qb.DocType("Account")
+		dimensions = [gle[dimension] for dimension in self.accounting_dimension_fields]
+
+		query = (
+			frappe.qb.from_(gle)
+			.inner_join(account)
+			.on(account.name == gle.account)
+			.select(
+				account.report_type,
+				gle.account,
+				Max(gle.account_currency).as_("account_currency"),
+				Sum(gle.debit_in_account_currency).as_("debit_in_account_currency"),
+				Sum(gle.credit_in_account_currency).as_("credit_in_account_currency"),
+				Sum(gle.debit).as_("debit"),
+				Sum(gle.credit).as_("credit"),
+				*dimensions,
+			)
+			.where(
+				(gle.company == self.company)
+				& (gle.voucher_type != "Period Closing Voucher")
+				& (gle.is_cancelled == 0)
+			)
+			.groupby(account.report_type, gle.account, *dimensions)
+		)
+
 		if only_opening_entries:
-			date_condition = "is_opening = 'Yes'"
+			query = query.where((gle.is_opening == "Yes") & (account.report_type == "Balance Sheet"))
 		else:
-			date_condition = f"posting_date BETWEEN '{self.period_start_date}' AND '{self.period_end_date}' and is_opening = 'No'"
-
-		# nosemgrep
-		return frappe.db.sql(
-			"""
-			SELECT
-				name,
-				posting_date,
-				account,
-				account_currency,
-				debit_in_account_currency,
-				credit_in_account_currency,
-				debit,
-				credit,
-				{}
-			FROM `tabGL Entry`
-			WHERE
-				{}
-				AND company = %s
-				AND voucher_type != 'Period Closing Voucher'
-				AND EXISTS(SELECT name FROM `tabAccount` WHERE name = account AND report_type = %s)
-				AND is_cancelled = 0
-			""".format(
-				", ".join(self.accounting_dimension_fields),
-				date_condition,
-			),
-			(self.company, report_type),
-			as_dict=1,
-			as_iterator=as_iterator,
-		)
+			query = query.where(
+				(gle.posting_date >= from_date) & (gle.posting_date <= to_date) & (gle.is_opening == "No")
+			)
+
+		return query.run(as_dict=True)
 
 	def set_account_balance_dict(self, gle, acc_bal_dict):
 		key = self.get_key(gle)
@@ -434,6 +464,79 @@ class PeriodClosingVoucher(AccountsController):
 		)
 
 
+def enqueue_period_balances(doc):
+	"""Aggregate the balances of each month of the period in its own background job,
+	the job completing the last month makes the GL entries and the closing balances"""
+	frappe.cache.delete_value(get_balances_cache_key(doc.name))
+
+	for from_date, to_date in get_months(doc.period_start_date, doc.period_end_date):
+		frappe.enqueue(
+			process_period_balances,
+			queue="long",
+			timeout=1800,
+			job_id=f"period_closing_voucher::{doc.name}::{from_date}",
+			enqueue_after_commit=True,
+			now=frappe.flags.in_test,
+			name=doc.name,
+			from_date=from_date,
+			to_date=to_date,
+		)
+
+
+def process_period_balances(name, from_date, to_date):
+	doc = frappe.get_doc("Period Closing Voucher", name)
+	if doc.gle_processing_status != "In Progress":
+		return
+
+	cache_key = get_balances_cache_key(name)
+	try:
+		balances = doc.get_account_balances(from_date, to_date)
+		# the month is marked as done in any case, None is aggregated again by `get_period_balances`
+		frappe.cache.hset(
+			cache_key, str(from_date), balances if len(balances) <= MAX_CACHED_BALANCES else None
+		)
+		frappe.cache.expire(frappe.cache.make_key(cache_key), BALANCES_CACHE_EXPIRY)
+	except Exception as e:
+		frappe.db.rollback()
+		frappe.log_error(e)
+		frappe.db.set_value(doc.doctype, doc.name, "gle_processing_status", "Failed")
+		return
+
+	months = get_months(doc.period_start_date, doc.period_end_date)
+	completed = len(frappe.cache.hkeys(cache_key))
+	frappe.publish_progress(
+		completed * 100 / (len(months) + 1),
+		title=_("Closing Period"),
+		doctype=doc.doctype,
+		docname=doc.name,
+		description=_("Aggregated {0} of {1} months").format(completed, len(months)),
+	)
+
+	if completed < len(months):
+		return
+
+	# more than one job can see all the months completed, only the first one closes the period
+	if (
+		frappe.db.get_value(doc.doctype, doc.name, "gle_processing_status", for_update=True) == "In Progress"
+	) and not frappe.db.exists("GL Entry", {"voucher_type": doc.doctype, "voucher_no": doc.name}):
+		process_gl_and_closing_entries(doc)
+
+
+def get_months(from_date, to_date):
+	"""Split the period into calendar months, as (from_date, to_date) tuples"""
+	months = []
+	from_date, to_date = getdate(from_date), getdate(to_date)
+	while from_date <= to_date:
+		months.append((from_date, min(get_last_day(from_date), to_date)))
+		from_date = add_months(get_first_day(from_date), 1)
+
+	return months
+
+
+def get_balances_cache_key(name):
+	return f"period_closing_balances::{name}"
+
+
 def process_gl_and_closing_entries(doc):
 	from erpnext.accounts.general_ledger import make_gl_entries
 
@@ -446,6 +549,14 @@ def process_gl_and_closing_entries(doc):
 		make_closing_entries(closing_entries, doc.name, doc.company, doc.period_end_date)
 
 		frappe.db.set_value(doc.doctype, doc.name, "gle_processing_status", "Completed")
+		frappe.cache.delete_value(get_balances_cache_key(doc.name))
+		frappe.enqueue(
+			reconcile_account_balance_snapshots,
+			queue="long",
+			enqueue_after_commit=True,
+			now=frappe.flags.in_test,
+			period_closing_voucher=doc.name,
+		)
 	except Exception as e:
 		frappe.db.rollback()
 		frappe.log_error(e)
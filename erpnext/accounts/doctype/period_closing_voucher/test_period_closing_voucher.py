@@ -1,6 +1,7 @@
 # Copyright (c) 2015, Frappe Technologies Pvt. Ltd. and Contributors
 # License: GNU General Public License v3. See license.txt
 import unittest
+from unittest.mock import patch
 
 import frappe
 from frappe.tests import IntegrationTestCase
@@ -8,6 +9,7 @@ from frappe.utils import today
 
 from erpnext.accounts.doctype.finance_book.test_finance_book import create_finance_book
 from erpnext.accounts.doctype.journal_entry.test_journal_entry import make_journal_entry
+from erpnext.accounts.doctype.period_closing_voucher.period_closing_voucher import get_months
 from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
 from erpnext.accounts.utils import get_fiscal_year
 
@@ -65,6 +67,72 @@ class TestPeriodClosingVoucher(IntegrationTestCase):
 		self.assertEqual(pcv.gle_processing_status, "Completed")
 		self.assertEqual(pcv_gle, expected_gle)
 
+	def test_closing_in_background_jobs(self):
+		frappe.db.sql("delete from `tabGL Entry` where company='Test PCV Company'")
+		frappe.db.sql("delete from `tabPeriod Closing Voucher` where company='Test PCV Company'")
+
+		company = create_company()
+		cost_center = create_cost_center("Test Cost Center 1")
+
+		for posting_date, amount, account1, account2 in (
+			("2021-01-15", 400, "Cash - TPC", "Sales - TPC"),
+			("2021-03-15", 600, "Cost of Goods Sold - TPC", "Cash - TPC"),
+			("2021-03-20", 100, "Cash - TPC", "Sales - TPC"),
+		):
+			jv = make_journal_entry(
+				posting_date=posting_date,
+				amount=amount,
+				account1=account1,
+				account2=account2,
+				cost_center=cost_center,
+				company=company,
+				save=False,
+			)
+			jv.company = company
+			jv.save()
+			jv.submit()
+
+		# every month of the period is aggregated by its own job, run inline in tests,
+		# balances of march have too many rows to be cached and are aggregated again on closing
+		with (
+			patch(
+				"erpnext.accounts.doctype.period_closing_voucher.period_closing_voucher.BACKGROUND_CLOSING_THRESHOLD",
+				-1,
+			),
+			patch(
+				"erpnext.accounts.doctype.period_closing_voucher.period_closing_voucher.MAX_CACHED_BALANCES",
+				2,
+			),
+		):
+			pcv = self.make_period_closing_voucher(posting_date="2021-03-31")
+
+		pcv_gle = frappe.db.sql(
+			"""
+			select account, debit, credit from `tabGL Entry` where voucher_no=%s order by account
+		""",
+			(pcv.name),
+		)
+		pcv.reload()
+		self.assertEqual(pcv.gle_processing_status, "Completed")
+		self.assertEqual(
+			pcv_gle,
+			(
+				("Cost of Goods Sold - TPC", 0.0, 600.0),
+				(pcv.closing_account_head, 100.0, 0.0),
+				("Sales - TPC", 500.0, 0.0),
+			),
+		)
+
+	def test_get_months(self):
+		self.assertEqual(
+			[(str(from_date), str(to_date)) for from_date, to_date in get_months("2021-01-15", "2021-03-10")],
+			[
+				("2021-01-15", "2021-01-31"),
+				("2021-02-01", "2021-02-28"),
+				("2021-03-01", "2021-03-10"),
+			],
+		)
+
 	def test_cost_center_wise_posting(self):
 		frappe.db.sql("delete from `tabGL Entry` where company='Test PCV Company'")
 		frappe.db.sql("delete from `tabPeriod Closing Voucher` where company='Test PCV Company'")
@@ -145,6 +145,17 @@ class PricingRule(Document):
 		if not self.margin_type:
 			self.margin_rate_or_amount = 0.0
 
+	def on_change(self):
+		# also called by db_set
+		from erpnext.accounts.doctype.pricing_rule.utils import clear_pricing_rule_index
+
+		clear_pricing_rule_index()
+
+	def on_trash(self):
+		from erpnext.accounts.doctype.pricing_rule.utils import clear_pricing_rule_index
+
+		clear_pricing_rule_index()
+
 	def validate_duplicate_apply_on(self):
 		if self.apply_on != "Transaction":
 			apply_on_table = apply_on_dict.get(self.apply_on)
@@ -340,6 +351,7 @@ def apply_pricing_rule(args, doc=None):
 	        "ignore_pricing_rule": "something"
 	}
 	"""
+	from erpnext.accounts.doctype.pricing_rule.utils import pricing_rule_batch
 
 	if isinstance(args, str):
 		args = json.loads(args)
@@ -358,26 +370,54 @@ def apply_pricing_rule(args, doc=None):
 	item_list = args.get("items")
 	args.pop("items")
 
-	item_code_list = tuple(item.get("item_code") for item in item_list)
-	query_items = frappe.get_all(
-		"Item",
-		fields=["item_code", "has_serial_no"],
-		filters=[["item_code", "in", item_code_list]],
-		as_list=1,
-	)
-	serialized_items = dict()
-	for item_code, val in query_items:
-		serialized_items.setdefault(item_code, val)
+	if isinstance(doc, str):
+		doc = json.loads(doc)
 
-	for item in item_list:
-		args_copy = copy.deepcopy(args)
-		args_copy.update(item)
-		data = get_pricing_rule_for_item(args_copy, doc=doc)
-		out.append(data)
+	# the document is built once for all rows
+	if doc:
+		doc = frappe.get_doc(doc)
+
+	items = get_items_for_pricing_rule(item.get("item_code") for item in item_list)
+
+	with pricing_rule_batch():
+		for item in item_list:
+			args_copy = copy.deepcopy(args)
+			args_copy.update(item)
+			set_item_args_for_pricing_rule(args_copy, items.get(args_copy.item_code))
+			data = get_pricing_rule_for_item(args_copy, doc=doc)
+			out.append(data)
 
 	return out
 
 
+def get_items_for_pricing_rule(item_codes):
+	"""Item group, brand and template of the items, fetched at once for the rows of a document"""
+	item_codes = list({item_code for item_code in item_codes if item_code})
+	if not item_codes:
+		return {}
+
+	return {
+		item.name: item
+		for item in frappe.get_all(
+			"Item",
+			fields=["name", "item_group", "brand", "variant_of"],
+			filters={"name": ("in", item_codes)},
+		)
+	}
+
+
+def set_item_args_for_pricing_rule(args, item):
+	"""Set the item details `update_args_for_pricing_rule` and `get_pricing_rules` would fetch"""
+	if not item:
+		return
+
+	if not (args.item_group and args.brand):
+		args.item_group, args.brand = item.item_group, item.brand
+
+	if "variant_of" not in args:
+		args.variant_of = item.variant_of
+
+
 def update_pricing_rule_uom(pricing_rule, args):
 	child_doc = {"Item Code": "items", "Item Group": "item_groups", "Brand": "brands"}.get(
 		pricing_rule.apply_on
@@ -396,13 +436,14 @@ def get_pricing_rule_for_item(args, doc=None, for_validate=False):
 		get_pricing_rule_items,
 		get_pricing_rules,
 		get_product_discount_rule,
+		get_transaction_doc,
 	)
 
 	if isinstance(doc, str):
 		doc = json.loads(doc)
 
 	if doc:
-		doc = frappe.get_doc(doc)
+		doc = get_transaction_doc(doc)
 
 	if args.get("is_free_item") or args.get("parenttype") == "Material Request":
 		return {}
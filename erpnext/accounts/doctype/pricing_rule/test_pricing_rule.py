@@ -1480,6 +1480,113 @@ class TestPricingRule(IntegrationTestCase):
 		debit_note.delete()
 		pi.cancel()
 
+	def test_apply_pricing_rule_for_document(self):
+		from erpnext.accounts.doctype.pricing_rule.pricing_rule import (
+			apply_pricing_rule,
+			get_pricing_rule_for_item,
+		)
+
+		pricing_rule = make_pricing_rule(discount_percentage=10, selling=1)
+		pricing_rule.db_set(
+			{"is_cumulative": 1, "valid_from": frappe.utils.nowdate(), "valid_upto": frappe.utils.nowdate()}
+		)
+		frappe.get_doc(
+			{
+				"doctype": "Pricing Rule",
+				"title": "_Test Pricing Rule for Item Group",
+				"apply_on": "Item Group",
+				"item_groups": [{"item_group": "_Test Item Group"}],
+				"currency": "INR",
+				"selling": 1,
+				"rate_or_discount": "Discount Percentage",
+				"discount_percentage": 5,
+				"priority": 2,
+				"company": "_Test Company",
+			}
+		).insert()
+
+		so = make_sales_order(item_code="_Test Item", qty=1, price_list_rate=100, do_not_submit=True)
+		so.append("items", {"item_code": "_Test Item 2", "qty": 2, "price_list_rate": 200})
+		so.append("items", {"item_code": "_Test Item", "qty": 3, "price_list_rate": 100})
+
+		args = {
+			"customer": so.customer,
+			"currency": so.currency,
+			"price_list": so.selling_price_list,
+			"company": so.company,
+			"transaction_date": so.transaction_date,
+			"doctype": so.doctype,
+			"name": so.name,
+		}
+		items = [
+			{
+				"doctype": row.doctype,
+				"name": row.name,
+				"child_docname": f"items{row.idx}",
+				"item_code": row.item_code,
+				"qty": row.qty,
+				"stock_qty": row.qty,
+				"price_list_rate": row.price_list_rate,
+				"parenttype": so.doctype,
+			}
+			for row in so.items
+		]
+
+		per_row = [
+			get_pricing_rule_for_item(
+				frappe._dict(args, transaction_type="selling", **item), doc=so.as_dict()
+			)
+			for item in items
+		]
+		batch = apply_pricing_rule({**args, "items": items}, doc=frappe.as_json(so.as_dict()))
+
+		self.assertEqual(batch, per_row)
+		self.assertEqual([row.discount_percentage for row in batch], [10, 5, 10])
+
+	def test_pricing_rule_index_invalidation(self):
+		from erpnext.accounts.doctype.pricing_rule.utils import get_pricing_rule_index
+
+		so = make_sales_order(item_code="_Test Item", qty=1, price_list_rate=100, do_not_submit=True)
+		self.assertEqual(so.items[0].discount_percentage, 0)
+
+		pricing_rule = make_pricing_rule(discount_percentage=10, selling=1)
+		self.assertIn(
+			pricing_rule.name,
+			[rule.name for rule in get_pricing_rule_index("_Test Company", "selling").rules],
+		)
+		so = make_sales_order(item_code="_Test Item", qty=1, price_list_rate=100, do_not_submit=True)
+		self.assertEqual(so.items[0].discount_percentage, 10)
+
+		pricing_rule.discount_percentage = 25
+		pricing_rule.save()
+		so = make_sales_order(item_code="_Test Item", qty=1, price_list_rate=100, do_not_submit=True)
+		self.assertEqual(so.items[0].discount_percentage, 25)
+
+		pricing_rule.delete()
+		so = make_sales_order(item_code="_Test Item", qty=1, price_list_rate=100, do_not_submit=True)
+		self.assertEqual(so.items[0].discount_percentage, 0)
+
+	def test_pricing_rule_index_rebuilt_on_db_set(self):
+		from erpnext.accounts.doctype.pricing_rule.utils import (
+			bump_pricing_rule_index_version,
+			get_pricing_rule_index,
+		)
+
+		def get_indexed_rules():
+			return [rule.name for rule in get_pricing_rule_index("_Test Company", "selling").rules]
+
+		pricing_rule = make_pricing_rule(discount_percentage=10, selling=1)
+		# as on commit, the index is shared with other transactions from here on
+		bump_pricing_rule_index_version()
+		self.addCleanup(bump_pricing_rule_index_version)
+		self.assertIn(pricing_rule.name, get_indexed_rules())
+
+		pricing_rule.db_set("disable", 1)
+		self.assertNotIn(pricing_rule.name, get_indexed_rules())
+
+		bump_pricing_rule_index_version()
+		self.assertNotIn(pricing_rule.name, get_indexed_rules())
+
 
 EXTRA_TEST_RECORD_DEPENDENCIES = ["UTM Campaign"]
 
@@ -7,10 +7,11 @@
 import copy
 import json
 import math
+from contextlib import contextmanager
 
 import frappe
 from frappe import _, bold
-from frappe.utils import cint, flt, fmt_money, get_link_to_form, getdate, today
+from frappe.utils import cint, cstr, flt, fmt_money, get_link_to_form, getdate, today
 
 from erpnext.setup.doctype.item_group.item_group import get_child_item_groups
 from erpnext.stock.doctype.warehouse.warehouse import get_child_warehouses
@@ -22,17 +23,31 @@ class MultiplePricingRuleConflict(frappe.ValidationError):
 
 
 apply_on_table = {"Item Code": "items", "Item Group": "item_groups", "Brand": "brands"}
+apply_on_fields = {"Item Code": "item_code", "Item Group": "item_group", "Brand": "brand"}
+
+selling_doctypes = [
+	"Quotation",
+	"Quotation Item",
+	"Sales Order",
+	"Sales Order Item",
+	"Delivery Note",
+	"Delivery Note Item",
+	"Sales Invoice",
+	"Sales Invoice Item",
+	"POS Invoice",
+	"POS Invoice Item",
+]
 
 
 def get_pricing_rules(args, doc=None):
 	pricing_rules = []
-	values = {}
 
-	if not frappe.db.exists("Pricing Rule", {"disable": 0, args.transaction_type: 1}):
+	index = get_pricing_rule_index(args.company, args.transaction_type)
+	if not index.rules:
 		return
 
 	for apply_on in ["Item Code", "Item Group", "Brand"]:
-		pricing_rules.extend(_get_pricing_rules(apply_on, args, values))
+		pricing_rules.extend(_get_pricing_rules(apply_on, args, index))
 		if pricing_rules and pricing_rules[0].has_priority:
 			continue
 
@@ -99,78 +114,182 @@ def filter_pricing_rule_based_on_condition(pricing_rules, doc=None):
 	return filtered_pricing_rules
 
 
-def _get_pricing_rules(apply_on, args, values):
+def _get_pricing_rules(apply_on, args, index):
 	apply_on_field = frappe.scrub(apply_on)
 
 	if not args.get(apply_on_field):
 		return []
 
-	child_doc = f"`tabPricing Rule {apply_on}`"
+	if apply_on_field == "item_code" and "variant_of" not in args:
+		args.variant_of = frappe.get_cached_value("Item", args.item_code, "variant_of")
 
-	conditions = item_variant_condition = item_conditions = ""
-	values[apply_on_field] = args.get(apply_on_field)
-	if apply_on_field in ["item_code", "brand"]:
-		item_conditions = f"{child_doc}.{apply_on_field}= %({apply_on_field})s"
+	if not args.price_list:
+		args.price_list = None
 
-		if apply_on_field == "item_code":
-			if args.get("uom", None):
-				item_conditions += (
-					" and ({child_doc}.uom='{item_uom}' or IFNULL({child_doc}.uom, '')='')".format(
-						child_doc=child_doc, item_uom=args.get("uom")
-					)
-				)
-			if "variant_of" not in args:
-				args.variant_of = frappe.get_cached_value("Item", args.item_code, "variant_of")
-
-			if args.variant_of:
-				item_variant_condition = f" or {child_doc}.item_code=%(variant_of)s "
-				values["variant_of"] = args.variant_of
-	elif apply_on_field == "item_group":
-		item_conditions = _get_tree_conditions(args, "Item Group", child_doc, False)
-		if args.get("uom", None):
-			item_conditions += " and ({child_doc}.uom='{item_uom}' or IFNULL({child_doc}.uom, '')='')".format(
-				child_doc=child_doc, item_uom=args.get("uom")
+	return index.get_pricing_rules(apply_on_field, args)
+
+
+INDEX_VERSION_CACHE_KEY = "pricing_rule_index_version"
+
+# site -> {"version": ..., (company, transaction_type): PricingRuleIndex}
+_pricing_rule_indexes = {}
+
+
+def get_pricing_rule_index(company, transaction_type):
+	"""Index of the enabled pricing rules of the company for selling or buying.
+
+	Indexes are kept per process and rebuilt when the version in redis changes, it is bumped once
+	a transaction changing or deleting a Pricing Rule is committed. The version is compared once per
+	request or job. A transaction that changed pricing rules uses indexes of its own, built on every
+	call (once per `pricing_rule_batch`), so that they see its uncommitted changes."""
+	key = (company or "", transaction_type)
+
+	if getattr(frappe.local, "pricing_rules_changed", False):
+		batch = frappe.flags.pricing_rule_batch
+		if not batch:
+			return PricingRuleIndex(company, transaction_type)
+
+		if key not in batch.indexes:
+			batch.indexes[key] = PricingRuleIndex(company, transaction_type)
+		return batch.indexes[key]
+
+	indexes = getattr(frappe.local, "pricing_rule_indexes", None)
+	if indexes is None:
+		version = frappe.cache.get_value(INDEX_VERSION_CACHE_KEY)
+		if not version:
+			# evicted, indexes built under any previous version may be stale
+			version = bump_pricing_rule_index_version()
+
+		indexes = _pricing_rule_indexes.get(frappe.local.site)
+		if not indexes or indexes["version"] != version:
+			indexes = _pricing_rule_indexes[frappe.local.site] = {"version": version}
+
+		frappe.local.pricing_rule_indexes = indexes
+
+	if key not in indexes:
+		indexes[key] = PricingRuleIndex(company, transaction_type)
+
+	return indexes[key]
+
+
+def clear_pricing_rule_index():
+	"""Rebuild pricing rule indexes in all processes, called when a Pricing Rule is changed (saved or
+	updated with `db_set`) or deleted. Must be called by code updating pricing rules or their rows
+	with `frappe.db.set_value` or SQL."""
+	frappe.local.pricing_rules_changed = True
+	frappe.db.after_commit.add(bump_pricing_rule_index_version)
+	frappe.db.after_rollback.add(reset_pricing_rule_index)
+
+
+def bump_pricing_rule_index_version():
+	version = frappe.generate_hash(length=10)
+	frappe.cache.set_value(INDEX_VERSION_CACHE_KEY, version)
+	reset_pricing_rule_index()
+	return version
+
+
+def reset_pricing_rule_index():
+	frappe.local.pricing_rules_changed = False
+	frappe.local.pricing_rule_indexes = None
+
+
+class PricingRuleIndex:
+	"""Pricing rules with their apply on rows, indexed by the item code, item group or brand of the
+	rows and by the other item code, item group or brand of the rules"""
+
+	def __init__(self, company, transaction_type):
+		self.rules = [
+			rule
+			for rule in frappe.get_all(
+				"Pricing Rule", filters={"disable": 0, transaction_type: 1}, fields=["*"]
 			)
+			if not company or cstr(rule.company) in (company, "")
+		]
+		self.by_value = {field: {} for field in apply_on_fields}
+		self.by_other_value = {field: {} for field in apply_on_fields}
+
+		rules = {rule.name: rule for rule in self.rules}
+		for apply_on, field in apply_on_fields.items():
+			rows = {}
+			if rules:
+				for row in frappe.get_all(
+					f"Pricing Rule {apply_on}",
+					filters={"parent": ("in", list(rules))},
+					fields=["name", "parent", field, "uom"],
+					order_by="idx",
+				):
+					entry = (rules[row.parent], row)
+					rows.setdefault(row.parent, []).append(entry)
+					self.by_value[field].setdefault(row.get(field), []).append(entry)
+
+			for rule in self.rules:
+				if rule.apply_rule_on_other is not None and rule.get(f"other_{field}"):
+					self.by_other_value[field].setdefault(rule.get(f"other_{field}"), []).extend(
+						rows.get(rule.name, [])
+					)
 
-	conditions += get_other_conditions(conditions, values, args)
-	warehouse_conditions = _get_tree_conditions(args, "Warehouse", "`tabPricing Rule`")
-	if warehouse_conditions:
-		warehouse_conditions = f" and {warehouse_conditions}"
+	def get_pricing_rules(self, field, args):
+		"""Pricing rules matching `args` through their `field` rows, with the row's `field` and uom,
+		in the order of priority desc, name desc"""
+		value = args.get(field)
+		values = [value]
+		if field == "item_group":
+			values = get_tree_values("Item Group", value)
 
-	if not args.price_list:
-		args.price_list = None
+		entries = {}
 
-	conditions += " and ifnull(`tabPricing Rule`.for_price_list, '') in (%(price_list)s, '')"
-	values["price_list"] = args.get("price_list")
-
-	pricing_rules = (
-		frappe.db.sql(
-			"""select `tabPricing Rule`.*,
-			{child_doc}.{apply_on_field}, {child_doc}.uom
-		from `tabPricing Rule`, {child_doc}
-		where ({item_conditions} or (`tabPricing Rule`.apply_rule_on_other is not null
-			and `tabPricing Rule`.{apply_on_other_field}=%({apply_on_field})s) {item_variant_condition})
-			and {child_doc}.parent = `tabPricing Rule`.name
-			and `tabPricing Rule`.disable = 0 and
-			`tabPricing Rule`.{transaction_type} = 1 {warehouse_cond} {conditions}
-		order by `tabPricing Rule`.priority desc,
-			`tabPricing Rule`.name desc""".format(
-				child_doc=child_doc,
-				apply_on_field=apply_on_field,
-				item_conditions=item_conditions,
-				item_variant_condition=item_variant_condition,
-				transaction_type=args.transaction_type,
-				warehouse_cond=warehouse_conditions,
-				apply_on_other_field=f"other_{apply_on_field}",
-				conditions=conditions,
-			),
-			values,
-			as_dict=1,
-		)
-		or []
-	)
+		def add_entries(values, with_uom=False):
+			for value in values:
+				for rule, row in self.by_value[field].get(value, []):
+					if with_uom and args.get("uom") and cstr(row.uom) not in (args.get("uom"), ""):
+						continue
+					entries.setdefault(row.name, (rule, row))
+
+		add_entries(values, with_uom=field in ("item_code", "item_group"))
+		if field == "item_code" and args.variant_of:
+			add_entries([args.variant_of])
+
+		for rule, row in self.by_other_value[field].get(value, []):
+			entries.setdefault(row.name, (rule, row))
+
+		pricing_rules = []
+		matches = {}
+		for rule, row in entries.values():
+			if rule.name not in matches:
+				matches[rule.name] = pricing_rule_matches(rule, args)
+
+			if matches[rule.name]:
+				pricing_rules.append(frappe._dict(rule, **{field: row.get(field), "uom": row.uom}))
 
-	return pricing_rules
+		return sorted(pricing_rules, key=lambda rule: (cstr(rule.priority), rule.name), reverse=True)
+
+
+def pricing_rule_matches(rule, args):
+	"""Python version of the conditions of `get_other_conditions` and the warehouse and price list
+	conditions of a pricing rule"""
+	for field in ["company", "customer", "supplier", "campaign", "sales_partner"]:
+		if cstr(rule.get(field)) not in (args.get(field) or "", ""):
+			return False
+
+	for parenttype in ["Customer Group", "Territory", "Supplier Group", "Warehouse"]:
+		field = frappe.scrub(parenttype)
+		if args.get(field) and cstr(rule.get(field)) not in [
+			*get_tree_values(parenttype, args.get(field)),
+			"",
+		]:
+			return False
+
+	if args.get("transaction_date") and not (
+		getdate(rule.valid_from or "2000-01-01")
+		<= getdate(args.get("transaction_date"))
+		<= getdate(rule.valid_upto or "2500-12-31")
+	):
+		return False
+
+	if not cint(rule.selling if args.get("doctype") in selling_doctypes else rule.buying):
+		return False
+
+	return cstr(rule.for_price_list) in (args.price_list or "", "")
 
 
 def apply_multiple_pricing_rules(pricing_rules):
@@ -191,29 +310,7 @@ def _get_tree_conditions(args, parenttype, table, allow_blank=True):
 		if key in frappe.flags.tree_conditions:
 			return frappe.flags.tree_conditions[key]
 
-		try:
-			lft, rgt = frappe.db.get_value(parenttype, args.get(field), ["lft", "rgt"])
-		except TypeError:
-			frappe.throw(_("Invalid {0}").format(args.get(field)))
-
-		parent_groups = frappe.db.sql_list(
-			"""select name from `tab{}`
-			where lft<={} and rgt>={}""".format(parenttype, "%s", "%s"),
-			(lft, rgt),
-		)
-
-		if parenttype in ["Customer Group", "Item Group", "Territory"]:
-			parent_field = f"parent_{frappe.scrub(parenttype)}"
-			root_name = frappe.db.get_list(
-				parenttype,
-				{"is_group": 1, parent_field: ("is", "not set")},
-				"name",
-				as_list=1,
-				ignore_permissions=True,
-			)
-
-			if root_name and root_name[0][0]:
-				parent_groups.append(root_name[0][0])
+		parent_groups = list(get_tree_values(parenttype, args.get(field)))
 
 		if parent_groups:
 			if allow_blank:
@@ -226,6 +323,43 @@ def _get_tree_conditions(args, parenttype, table, allow_blank=True):
 	return condition
 
 
+def get_tree_values(parenttype, value):
+	"""`value` and its ancestors in the tree of `parenttype`, along with the root of
+	Customer Group, Item Group and Territory trees"""
+	if not frappe.flags.tree_values:
+		frappe.flags.tree_values = {}
+	key = (parenttype, value)
+	if key in frappe.flags.tree_values:
+		return frappe.flags.tree_values[key]
+
+	try:
+		lft, rgt = frappe.db.get_value(parenttype, value, ["lft", "rgt"])
+	except TypeError:
+		frappe.throw(_("Invalid {0}").format(value))
+
+	parent_groups = frappe.db.sql_list(
+		"""select name from `tab{}`
+		where lft<={} and rgt>={}""".format(parenttype, "%s", "%s"),
+		(lft, rgt),
+	)
+
+	if parenttype in ["Customer Group", "Item Group", "Territory"]:
+		parent_field = f"parent_{frappe.scrub(parenttype)}"
+		root_name = frappe.db.get_list(
+			parenttype,
+			{"is_group": 1, parent_field: ("is", "not set")},
+			"name",
+			as_list=1,
+			ignore_permissions=True,
+		)
+
+		if root_name and root_name[0][0]:
+			parent_groups.append(root_name[0][0])
+
+	frappe.flags.tree_values[key] = parent_groups
+	return parent_groups
+
+
 def get_other_conditions(conditions, values, args):
 	for field in ["company", "customer", "supplier", "campaign", "sales_partner"]:
 		if args.get(field):
@@ -244,18 +378,7 @@ def get_other_conditions(conditions, values, args):
 			and ifnull(`tabPricing Rule`.valid_upto, '2500-12-31')"""
 		values["transaction_date"] = args.get("transaction_date")
 
-	if args.get("doctype") in [
-		"Quotation",
-		"Quotation Item",
-		"Sales Order",
-		"Sales Order Item",
-		"Delivery Note",
-		"Delivery Note Item",
-		"Sales Invoice",
-		"Sales Invoice Item",
-		"POS Invoice",
-		"POS Invoice Item",
-	]:
+	if args.get("doctype") in selling_doctypes:
 		conditions += """ and ifnull(`tabPricing Rule`.selling, 0) = 1"""
 	else:
 		conditions += """ and ifnull(`tabPricing Rule`.buying, 0) = 1"""
@@ -497,9 +620,22 @@ def get_qty_and_rate_for_other_item(doc, pr_doc, pricing_rules, row_item):
 def get_qty_amount_data_for_cumulative(pr_doc, doc, items=None):
 	if items is None:
 		items = []
-	sum_qty, sum_amt = [0, 0]
 	doctype = doc.get("parenttype") or doc.doctype
 
+	batch = frappe.flags.pricing_rule_batch
+	if batch:
+		key = (pr_doc.name, doctype, tuple(sorted(cstr(item) for item in items)))
+		if key not in batch.cumulative:
+			batch.cumulative[key] = _get_qty_amount_data_for_cumulative(pr_doc, doctype, items)
+
+		return list(batch.cumulative[key])
+
+	return _get_qty_amount_data_for_cumulative(pr_doc, doctype, items)
+
+
+def _get_qty_amount_data_for_cumulative(pr_doc, doctype, items):
+	sum_qty, sum_amt = [0, 0]
+
 	date_field = (
 		"transaction_date" if frappe.get_meta(doctype).has_field("transaction_date") else "posting_date"
 	)
@@ -545,6 +681,34 @@ def get_qty_amount_data_for_cumulative(pr_doc, doc, items=None):
 	return [sum_qty, sum_amt]
 
 
+@contextmanager
+def pricing_rule_batch():
+	"""Resolve pricing rules for the rows of a document in one pass: cumulative totals of a rule
+	are computed once and the document is built once"""
+	if frappe.flags.pricing_rule_batch:
+		yield
+		return
+
+	frappe.flags.pricing_rule_batch = frappe._dict(indexes={}, cumulative={}, doc=None)
+	try:
+		yield
+	finally:
+		frappe.flags.pricing_rule_batch = None
+
+
+def get_transaction_doc(doc):
+	"""Document of the posted transaction, built once per `pricing_rule_batch`"""
+	batch = frappe.flags.pricing_rule_batch
+	if batch and batch.doc and batch.doc[0] is doc:
+		return batch.doc[1]
+
+	transaction = frappe.get_doc(doc)
+	if batch:
+		batch.doc = (doc, transaction)
+
+	return transaction
+
+
 def apply_pricing_rule_on_transaction(doc):
 	conditions = "apply_on = 'Transaction'"
 
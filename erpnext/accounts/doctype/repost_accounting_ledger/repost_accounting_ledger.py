@@ -150,6 +150,7 @@ class RepostAccountingLedger(Document):
 @frappe.whitelist()
 def start_repost(account_repost_doc=str) -> None:
 	from erpnext.accounts.general_ledger import make_reverse_gl_entries
+	from erpnext.accounts.utils import _delete_accounting_ledger_entries
 
 	frappe.flags.through_repost_accounting_ledger = True
 	if account_repost_doc:
@@ -163,12 +164,7 @@ def start_repost(account_repost_doc=str) -> None:
 				doc = frappe.get_doc(x.voucher_type, x.voucher_no)
 
 				if repost_doc.delete_cancelled_entries:
-					frappe.db.delete(
-						"GL Entry", filters={"voucher_type": doc.doctype, "voucher_no": doc.name}
-					)
-					frappe.db.delete(
-						"Payment Ledger Entry", filters={"voucher_type": doc.doctype, "voucher_no": doc.name}
-					)
+					_delete_accounting_ledger_entries(doc.doctype, doc.name, doc.company)
 
 				if doc.doctype in ["Sales Invoice", "Purchase Invoice"]:
 					if not repost_doc.delete_cancelled_entries:
@@ -7,10 +7,14 @@ import copy
 import frappe
 from frappe import _
 from frappe.model.meta import get_field_precision
+from frappe.query_builder.functions import Sum
 from frappe.utils import cint, flt, formatdate, get_link_to_form, getdate, now
 from frappe.utils.dashboard import cache_source
 
 import erpnext
+from erpnext.accounts.doctype.account_balance_snapshot.account_balance_snapshot import (
+	update_account_balance_snapshots,
+)
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_accounting_dimensions,
 )
@@ -19,8 +23,12 @@ from erpnext.accounts.doctype.accounting_dimension_filter.accounting_dimension_f
 )
 from erpnext.accounts.doctype.accounting_period.accounting_period import ClosedAccountingPeriod
 from erpnext.accounts.doctype.budget.budget import validate_expense_against_budget
-from erpnext.accounts.utils import create_payment_ledger_entry
+from erpnext.accounts.doctype.gl_entry.gl_entry import update_outstanding_amt, validate_frozen_account
+from erpnext.accounts.party import validate_party_gle_currency
+from erpnext.accounts.period_resolver import get_period_resolver
+from erpnext.accounts.utils import create_payment_ledger_entry, get_fiscal_year
 from erpnext.exceptions import InvalidAccountDimensionError, MandatoryAccountDimensionError
+from erpnext.utilities.bulk_insert import insert_docs, set_creation, validate_docs
 
 
 def make_gl_entries(
@@ -142,31 +150,15 @@ def validate_disabled_accounts(gl_map):
 
 
 def validate_accounting_period(gl_map):
-	accounting_periods = frappe.db.sql(
-		""" SELECT
-			ap.name as name
-		FROM
-			`tabAccounting Period` ap, `tabClosed Document` cd
-		WHERE
-			ap.name = cd.parent
-			AND ap.company = %(company)s
-			AND cd.closed = 1
-			AND cd.document_type = %(voucher_type)s
-			AND %(date)s between ap.start_date and ap.end_date
-			""",
-		{
-			"date": gl_map[0].posting_date,
-			"company": gl_map[0].company,
-			"voucher_type": gl_map[0].voucher_type,
-		},
-		as_dict=1,
+	accounting_period = get_period_resolver().find_closed_accounting_period(
+		gl_map[0].company, gl_map[0].voucher_type, gl_map[0].posting_date
 	)
 
-	if accounting_periods:
+	if accounting_period:
 		frappe.throw(
 			_(
 				"You cannot create or cancel any accounting entries with in the closed Accounting Period {0}"
-			).format(frappe.bold(accounting_periods[0].name)),
+			).format(frappe.bold(accounting_period)),
 			ClosedAccountingPeriod,
 		)
 
@@ -280,12 +272,14 @@ def merge_similar_entries(gl_map, precision=None):
 
 	# filter zero debit and credit entries
 	merged_gl_map = filter(
-		lambda x: flt(x.debit, precision) != 0
-		or flt(x.credit, precision) != 0
-		or (
-			x.voucher_type == "Journal Entry"
-			and frappe.get_cached_value("Journal Entry", x.voucher_no, "voucher_type")
-			== "Exchange Gain Or Loss"
+		lambda x: (
+			flt(x.debit, precision) != 0
+			or flt(x.credit, precision) != 0
+			or (
+				x.voucher_type == "Journal Entry"
+				and frappe.get_cached_value("Journal Entry", x.voucher_no, "voucher_type")
+				== "Exchange Gain Or Loss"
+			)
 		),
 		merged_gl_map,
 	)
@@ -382,9 +376,18 @@ def save_entries(gl_map, adv_adj, update_outstanding, from_repost=False):
 		if gl_map[0]["voucher_type"] != "Period Closing Voucher":
 			validate_against_pcv(is_opening, gl_map[0]["posting_date"], gl_map[0]["company"])
 
-	for entry in gl_map:
-		validate_allowed_dimensions(entry, dimension_filter_map)
-		make_entry(entry, adv_adj, update_outstanding, from_repost)
+	if (
+		len(gl_map) > 1
+		and frappe.db.get_single_value("Accounts Settings", "bulk_insert_gl_entries")
+		and not has_budget_checks(gl_map[0]["company"])
+	):
+		make_entries_in_bulk(gl_map, dimension_filter_map, adv_adj, update_outstanding, from_repost)
+	else:
+		for entry in gl_map:
+			validate_allowed_dimensions(entry, dimension_filter_map)
+			make_entry(entry, adv_adj, update_outstanding, from_repost)
+
+	update_account_balance_snapshots(gl_map)
 
 
 def make_entry(args, adv_adj, update_outstanding, from_repost=False):
@@ -401,6 +404,178 @@ def make_entry(args, adv_adj, update_outstanding, from_repost=False):
 		validate_expense_against_budget(args)
 
 
+def make_entries_in_bulk(gl_map, dimension_filter_map, adv_adj, update_outstanding, from_repost=False):
+	"""Bulk version of `make_entry` for all the entries of a voucher.
+
+	Checks depending only on the account, party or posting date run once per distinct value and
+	the entries are inserted with a multi-row insert. Balances of accounts are checked entry by
+	entry as on the per-row path, outstanding amounts are updated once per against voucher.
+	Validation hooks of all the entries run before the insert, see `erpnext.utilities.bulk_insert`.
+
+	Not used when budgets of the company stop or warn on expenses, as budgets are checked against
+	the entries inserted so far."""
+	dimension_filters = get_dimension_filters_by_account(dimension_filter_map)
+	fiscal_years = {}
+
+	gl_docs = []
+	for entry in gl_map:
+		validate_allowed_dimensions(entry, dimension_filters.get(entry.account, {}))
+
+		gle = get_gle_doc(entry, adv_adj, update_outstanding, from_repost)
+		if not gle.fiscal_year:
+			key = (getdate(gle.posting_date), gle.company)
+			if key not in fiscal_years:
+				fiscal_years[key] = get_fiscal_year(gle.posting_date, company=gle.company)[0]
+
+			gle.fiscal_year = fiscal_years[key]
+
+		gl_docs.append(gle)
+
+	validate_docs(gl_docs)
+
+	# same conditions as `GLEntry.on_update`
+	validate = not from_repost and gl_docs[0].voucher_type != "Period Closing Voucher"
+	if validate:
+		validate_gle_accounts(gl_docs, adv_adj)
+
+	for gle in gl_docs:
+		# checks of `GLEntry.on_update` are done above for all the entries
+		gle.flags.validated_in_bulk = True
+
+	set_creation(gl_docs)
+	insert_docs(gl_docs)
+
+	if validate:
+		validate_party_currencies(gl_docs)
+		update_outstanding_amounts(gl_docs)
+
+
+def has_budget_checks(company):
+	"""Whether a budget of the company stops or warns when actual expenses exceed it"""
+	budget = frappe.qb.DocType("Budget")
+	return bool(
+		frappe.qb.from_(budget)
+		.select(budget.name)
+		.where(
+			(budget.company == company)
+			& (budget.docstatus == 1)
+			& (budget.applicable_on_booking_actual_expenses == 1)
+			& (
+				budget.action_if_annual_budget_exceeded.isin(["Stop", "Warn"])
+				| budget.action_if_accumulated_monthly_budget_exceeded.isin(["Stop", "Warn"])
+			)
+		)
+		.limit(1)
+		.run()
+	)
+
+
+def get_dimension_filters_by_account(dimension_filter_map):
+	"""Split the dimension filter map by account, so that an entry is only checked against
+	the filters of its own account"""
+	dimension_filters = {}
+	for (dimension, account), value in dimension_filter_map.items():
+		dimension_filters.setdefault(account, {})[(dimension, account)] = value
+
+	return dimension_filters
+
+
+def get_gle_doc(args, adv_adj, update_outstanding, from_repost=False):
+	gle = frappe.new_doc("GL Entry")
+	gle.update(args)
+	gle.flags.ignore_permissions = 1
+	gle.flags.from_repost = from_repost
+	gle.flags.adv_adj = adv_adj
+	gle.flags.update_outstanding = update_outstanding or "Yes"
+	gle.flags.notify_update = False
+	gle.docstatus = 1
+	gle.set_new_name()
+
+	return gle
+
+
+def validate_gle_accounts(gl_docs, adv_adj):
+	"""Checks of `GLEntry.on_update` with one query for all the accounts.
+
+	Accounts having a balance restriction are checked against their running balance
+	after each entry, same as when the entries are inserted one by one."""
+	accounts = {gle.account for gle in gl_docs}
+	account_details = {
+		account.name: account
+		for account in frappe.get_all(
+			"Account",
+			filters={"name": ("in", list(accounts))},
+			fields=["name", "is_group", "docstatus", "company", "balance_must_be"],
+		)
+	}
+
+	for gle in gl_docs:
+		gle.validate_account_details(adv_adj, account_details.get(gle.account))
+		gle.validate_dimensions_for_pl_and_bs()
+
+	if not adv_adj:
+		validate_running_balances(gl_docs, account_details)
+
+	for account in accounts:
+		validate_frozen_account(account, adv_adj)
+
+
+def validate_running_balances(gl_docs, account_details):
+	restricted_accounts = [account.name for account in account_details.values() if account.balance_must_be]
+	if not restricted_accounts:
+		return
+
+	gle = frappe.qb.DocType("GL Entry")
+	balances = dict(
+		frappe.qb.from_(gle)
+		.select(gle.account, Sum(gle.debit) - Sum(gle.credit))
+		.where(gle.account.isin(restricted_accounts))
+		.groupby(gle.account)
+		.run()
+	)
+
+	precision = gl_docs[0].precision("debit")
+	for row in gl_docs:
+		balance_must_be = account_details[row.account].balance_must_be
+		if not balance_must_be:
+			continue
+
+		balances[row.account] = flt(
+			flt(balances.get(row.account)) + flt(row.debit) - flt(row.credit), precision
+		)
+		balance = balances[row.account]
+		if (balance_must_be == "Debit" and balance < 0) or (balance_must_be == "Credit" and balance > 0):
+			frappe.throw(
+				_("Balance for Account {0} must always be {1}").format(row.account, _(balance_must_be))
+			)
+
+
+def validate_party_currencies(gl_docs):
+	"""Entries of a party in different currencies within the voucher, which the per-row path
+	catches once the first entry of the party is inserted"""
+	currencies = {}
+	for gle in gl_docs:
+		if gle.party_type and gle.party and not gle.is_cancelled:
+			currencies.setdefault((gle.party_type, gle.party, gle.company), set()).add(gle.account_currency)
+
+	for (party_type, party, company), party_currencies in currencies.items():
+		if len(party_currencies) > 1:
+			for currency in party_currencies:
+				validate_party_gle_currency(party_type, party, company, currency)
+
+
+def update_outstanding_amounts(gl_docs):
+	"""Update the outstanding amount of each against voucher once all the entries are inserted"""
+	against_vouchers = {}
+	for gle in gl_docs:
+		if gle.updates_outstanding_amount():
+			key = (gle.account, gle.party_type, gle.party, gle.against_voucher_type, gle.against_voucher)
+			against_vouchers.setdefault(key, None)
+
+	for key in against_vouchers:
+		update_outstanding_amt(*key)
+
+
 def validate_cwip_accounts(gl_map):
 	"""Validate that CWIP account are not used in Journal Entry"""
 	if gl_map and gl_map[0].voucher_type != "Journal Entry":
@@ -695,6 +870,10 @@ def make_reverse_gl_entries(
 			if not immutable_ledger_enabled:
 				set_as_cancel(gl_entries[0]["voucher_type"], gl_entries[0]["voucher_no"])
 
+		if not immutable_ledger_enabled:
+			update_account_balance_snapshots(gl_entries, sign=-1)
+
+		reverse_gl_entries = []
 		for entry in gl_entries:
 			new_gle = copy.deepcopy(entry)
 			new_gle["name"] = None
@@ -722,6 +901,10 @@ def make_reverse_gl_entries(
 
 			if new_gle["debit"] or new_gle["credit"]:
 				make_entry(new_gle, adv_adj, "Yes")
+				reverse_gl_entries.append(new_gle)
+
+		# reverse entries are live only with immutable ledger, cancelled ones are skipped
+		update_account_balance_snapshots(reverse_gl_entries)
 
 
 def check_freezing_date(posting_date, adv_adj=False):
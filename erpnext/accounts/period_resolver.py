@@ -0,0 +1,162 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# License: GNU General Public License v3. See license.txt
+
+"""Resolve fiscal years and closed accounting periods of a company by date.
+
+Periods are loaded once per process and site, per company, and indexed by start date. Lookups
+bisect the start dates and step back over overlapping periods using the running maximum of end
+dates, so a lookup is O(log n).
+
+Saving or deleting a Fiscal Year or Accounting Period bumps a version in redis once the transaction
+is committed. Processes compare the version once per request or job and rebuild their index when it
+changed or is missing from redis."""
+
+from bisect import bisect_right
+from itertools import accumulate
+
+import frappe
+from frappe.query_builder import DocType
+from frappe.utils import getdate
+from pypika import Order
+from pypika.terms import ExistsCriterion
+
+VERSION_CACHE_KEY = "period_resolver_version"
+
+# site -> PeriodResolver
+_resolvers = {}
+
+
+class IntervalIndex:
+	"""Date intervals sorted by start date, queried for the interval containing a date that
+	starts last"""
+
+	def __init__(self, intervals):
+		# intervals: (start date, end date, value)
+		self.intervals = sorted(intervals, key=lambda interval: interval[0])
+		self.starts = [interval[0] for interval in self.intervals]
+		self.max_ends = list(accumulate((interval[1] for interval in self.intervals), max))
+
+	def find(self, date):
+		idx = bisect_right(self.starts, date) - 1
+		while idx >= 0 and self.max_ends[idx] >= date:
+			_start, end, value = self.intervals[idx]
+			if end >= date:
+				return value
+			idx -= 1
+
+
+class PeriodResolver:
+	def __init__(self, version=None):
+		self.version = version
+		self.fiscal_years = {}
+		self.closed_periods = {}
+
+	def get_fiscal_years(self, company=None):
+		"""Active fiscal years of the company, latest first"""
+		if company not in self.fiscal_years:
+			fiscal_years = get_active_fiscal_years(company)
+			self.fiscal_years[company] = frappe._dict(
+				fiscal_years=fiscal_years,
+				by_name={fy.name: fy for fy in fiscal_years},
+				index=IntervalIndex(
+					(getdate(fy.year_start_date), getdate(fy.year_end_date), fy) for fy in fiscal_years
+				),
+			)
+
+		return self.fiscal_years[company]
+
+	def find_fiscal_year(self, date=None, fiscal_year=None, company=None):
+		"""Fiscal year named `fiscal_year` or containing `date`, the latest one if both match"""
+		fiscal_years = self.get_fiscal_years(company)
+		matches = [
+			fiscal_years.by_name.get(fiscal_year) if fiscal_year else None,
+			fiscal_years.index.find(getdate(date)) if date else None,
+		]
+		return max((fy for fy in matches if fy), key=lambda fy: getdate(fy.year_start_date), default=None)
+
+	def find_closed_accounting_period(self, company, document_type, date):
+		"""Name of the Accounting Period closed for `document_type` on `date`"""
+		if company not in self.closed_periods:
+			self.closed_periods[company] = get_closed_accounting_periods(company)
+
+		if index := self.closed_periods[company].get(document_type):
+			return index.find(getdate(date))
+
+
+def get_period_resolver():
+	"""Resolver of the site, checked against the version in redis once per request or job"""
+	if not getattr(frappe.local, "period_resolver", None):
+		version = frappe.cache.get_value(VERSION_CACHE_KEY)
+		if not version:
+			# evicted, resolvers built under any previous version may be stale
+			version = bump_period_resolver_version()
+
+		resolver = _resolvers.get(frappe.local.site)
+		if not resolver or resolver.version != version:
+			resolver = _resolvers[frappe.local.site] = PeriodResolver(version)
+
+		frappe.local.period_resolver = resolver
+
+	return frappe.local.period_resolver
+
+
+def clear_period_resolver():
+	"""Rebuild the resolver in all processes, called when a Fiscal Year or Accounting Period changes"""
+	reset_period_resolver()
+	# other processes would read the periods before the changes are committed
+	frappe.db.after_commit.add(bump_period_resolver_version)
+	# changes of the transaction are gone on rollback
+	frappe.db.after_rollback.add(reset_period_resolver)
+
+
+def bump_period_resolver_version():
+	version = frappe.generate_hash(length=10)
+	frappe.cache.set_value(VERSION_CACHE_KEY, version)
+	return version
+
+
+def reset_period_resolver():
+	_resolvers.pop(frappe.local.site, None)
+	frappe.local.period_resolver = None
+
+
+def get_active_fiscal_years(company=None):
+	FY = DocType("Fiscal Year")
+
+	query = frappe.qb.from_(FY).select(FY.name, FY.year_start_date, FY.year_end_date).where(FY.disabled == 0)
+
+	if company:
+		FYC = DocType("Fiscal Year Company")
+		query = query.where(
+			ExistsCriterion(frappe.qb.from_(FYC).select(FYC.name).where(FYC.parent == FY.name)).negate()
+			| ExistsCriterion(
+				frappe.qb.from_(FYC)
+				.select(FYC.company)
+				.where(FYC.parent == FY.name)
+				.where(FYC.company == company)
+			)
+		)
+
+	return query.orderby(FY.year_start_date, order=Order.desc).run(as_dict=True)
+
+
+def get_closed_accounting_periods(company):
+	"""Closed accounting periods of the company per document type"""
+	ap = frappe.qb.DocType("Accounting Period")
+	cd = frappe.qb.DocType("Closed Document")
+
+	periods = (
+		frappe.qb.from_(ap)
+		.inner_join(cd)
+		.on(ap.name == cd.parent)
+		.select(ap.name, ap.start_date, ap.end_date, cd.document_type)
+		.where((ap.company == company) & (cd.closed == 1))
+	).run(as_dict=True)
+
+	intervals = {}
+	for period in periods:
+		intervals.setdefault(period.document_type, []).append(
+			(getdate(period.start_date), getdate(period.end_date), period.name)
+		)
+
+	return {document_type: IntervalIndex(rows) for document_type, rows in intervals.items()}
@@ -6,9 +6,10 @@ from collections import OrderedDict
 
 import frappe
 from frappe import _, qb, query_builder, scrub
-from frappe.query_builder import Criterion
-from frappe.query_builder.functions import Date, Substring, Sum
+from frappe.query_builder import Case, Criterion
+from frappe.query_builder.functions import Date, Max, Min, Substring, Sum
 from frappe.utils import cint, cstr, flt, getdate, nowdate
+from pypika import Order
 
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_accounting_dimensions,
@@ -95,12 +96,6 @@ class ReceivablePayableReport:
 		self.voucher_balance = OrderedDict()
 		self.init_voucher_balance()  # invoiced, paid, credit_note, outstanding
 
-		# Build delivery note map against all sales invoices
-		self.build_delivery_note_map()
-
-		# Get invoice details like bill_no, due_date etc for all invoices
-		self.get_invoice_details()
-
 		# fetch future payments against invoices
 		self.get_future_payments()
 
@@ -151,6 +146,8 @@ class ReceivablePayableReport:
 
 			if ple.voucher_type == ple.against_voucher_type and ple.voucher_no == ple.against_voucher_no:
 				self.voucher_balance[key].cost_center = ple.cost_center
+				if self.filters.get("show_remarks"):
+					self.voucher_balance[key].remarks = ple.remarks
 
 			self.get_invoices(ple)
 
@@ -294,8 +291,51 @@ class ReceivablePayableReport:
 			self.update_sub_total_row(sub_total_row, "Total")
 
 	def build_data(self):
+		open_rows = self.get_open_rows()
+
+		# details are only fetched for the vouchers with outstanding
+		vouchers = {row.voucher_no for row in open_rows}
+		self.invoices.intersection_update(vouchers)
+
+		# Build delivery note map against sales invoices
+		self.build_delivery_note_map()
+
+		# Get invoice details like bill_no, due_date etc for invoices
+		self.get_invoice_details(vouchers)
+
+		if self.filters.based_on_payment_terms:
+			self.get_payment_terms_details(open_rows)
+
+		self.get_parties_details({row.party for row in open_rows})
+
+		for row in open_rows:
+			if self.is_invoice(row) and self.filters.based_on_payment_terms:
+				# is an invoice, allocate based on fifo
+				# adds a list `payment_terms` which contains new rows for each term
+				self.allocate_outstanding_based_on_payment_terms(row)
+
+				if row.payment_terms:
+					# make separate rows for each payment term
+					for d in row.payment_terms:
+						if d.outstanding > 0:
+							self.append_row(d)
+
+					# if there is overpayment, add another row
+					self.allocate_extra_payments_or_credits(row)
+				else:
+					self.append_row(row)
+			else:
+				self.append_row(row)
+
+		if self.filters.get("group_by_party"):
+			self.append_subtotal_row(self.previous_party)
+			if self.data:
+				self.data.append(self.total_row_map.get("Total", {}))
+
+	def get_open_rows(self):
 		# set outstanding for all the accumulated balances
 		# as we can use this to filter out invoices without outstanding
+		open_rows = []
 		for _key, row in self.voucher_balance.items():
 			row.outstanding = flt(row.invoiced - row.paid - row.credit_note, self.currency_precision)
 			row.outstanding_in_account_currency = flt(
@@ -322,29 +362,9 @@ class ReceivablePayableReport:
 
 			if must_consider:
 				# non-zero oustanding, we must consider this row
+				open_rows.append(row)
 
-				if self.is_invoice(row) and self.filters.based_on_payment_terms:
-					# is an invoice, allocate based on fifo
-					# adds a list `payment_terms` which contains new rows for each term
-					self.allocate_outstanding_based_on_payment_terms(row)
-
-					if row.payment_terms:
-						# make separate rows for each payment term
-						for d in row.payment_terms:
-							if d.outstanding > 0:
-								self.append_row(d)
-
-						# if there is overpayment, add another row
-						self.allocate_extra_payments_or_credits(row)
-					else:
-						self.append_row(row)
-				else:
-					self.append_row(row)
-
-		if self.filters.get("group_by_party"):
-			self.append_subtotal_row(self.previous_party)
-			if self.data:
-				self.data.append(self.total_row_map.get("Total", {}))
+		return open_rows
 
 	def append_row(self, row):
 		self.allocate_future_payments(row)
@@ -415,34 +435,23 @@ class ReceivablePayableReport:
 			for d in dn_against_si:
 				self.delivery_notes.setdefault(d.against_sales_invoice, set()).add(d.parent)
 
-	def get_invoice_details(self):
+	def get_invoice_details(self, vouchers):
 		self.invoice_details = frappe._dict()
+		if not vouchers:
+			return
+
+		vouchers = list(vouchers)
 		if self.account_type == "Receivable":
-			# nosemgrep
-			si_list = frappe.db.sql(
-				"""
-				select name, due_date, po_no
-				from `tabSales Invoice`
-				where posting_date <= %s
-					and company = %s
-					and docstatus = 1
-			""",
-				(self.filters.report_date, self.filters.company),
-				as_dict=1,
-			)
-			for d in si_list:
+			for d in self.get_vouchers_of_report("Sales Invoice", ["name", "due_date", "po_no"], vouchers):
 				self.invoice_details.setdefault(d.name, d)
 
 			# Get Sales Team
 			if self.filters.show_sales_person:
-				# nosemgrep
-				sales_team = frappe.db.sql(
-					"""
-					select parent, sales_person
-					from `tabSales Team`
-					where parenttype = 'Sales Invoice'
-				""",
-					as_dict=1,
+				sales_team = frappe.get_all(
+					"Sales Team",
+					filters={"parenttype": "Sales Invoice", "parent": ("in", vouchers)},
+					fields=["parent", "sales_person"],
+					order_by="parent, idx",
 				)
 				for d in sales_team:
 					self.invoice_details.setdefault(d.parent, {}).setdefault("sales_team", []).append(
@@ -450,40 +459,32 @@ class ReceivablePayableReport:
 					)
 
 		if self.account_type == "Payable":
-			# nosemgrep
-			for pi in frappe.db.sql(
-				"""
-				select name, due_date, bill_no, bill_date
-				from `tabPurchase Invoice`
-				where
-					posting_date <= %s
-					and company = %s
-					and docstatus = 1
-			""",
-				(self.filters.report_date, self.filters.company),
-				as_dict=1,
+			for pi in self.get_vouchers_of_report(
+				"Purchase Invoice", ["name", "due_date", "bill_no", "bill_date"], vouchers
 			):
 				self.invoice_details.setdefault(pi.name, pi)
 
 		# Invoices booked via Journal Entries
-		# nosemgrep
-		journal_entries = frappe.db.sql(
-			"""
-			select name, due_date, bill_no, bill_date
-			from `tabJournal Entry`
-			where
-				posting_date <= %s
-				and company = %s
-				and docstatus = 1
-		""",
-			(self.filters.report_date, self.filters.company),
-			as_dict=1,
+		journal_entries = self.get_vouchers_of_report(
+			"Journal Entry", ["name", "due_date", "bill_no", "bill_date"], vouchers
 		)
 
 		for je in journal_entries:
 			if je.bill_no:
 				self.invoice_details.setdefault(je.name, je)
 
+	def get_vouchers_of_report(self, doctype, fields, vouchers):
+		return frappe.get_all(
+			doctype,
+			filters={
+				"name": ("in", vouchers),
+				"posting_date": ("<=", self.filters.report_date),
+				"company": self.filters.company,
+				"docstatus": 1,
+			},
+			fields=fields,
+		)
+
 	def set_party_details(self, row):
 		if not row.party:
 			return
@@ -509,25 +510,48 @@ class ReceivablePayableReport:
 
 		row.payment_terms = sorted(row.payment_terms, key=lambda x: x["due_date"])
 
+	def get_payment_terms_details(self, rows):
+		# payment schedules of all the open invoices, per invoice
+		self.payment_terms_details = {}
+		invoices = {}
+		for row in rows:
+			if self.is_invoice(row):
+				invoices.setdefault(row.voucher_type, set()).add(row.voucher_no)
+
+		for doctype, names in invoices.items():
+			inv = qb.DocType(doctype)
+			ps = qb.DocType("Payment Schedule")
+			payment_terms_details = (
+				qb.from_(inv)
+				.inner_join(ps)
+				.on(inv.name == ps.parent)
+				.select(
+					inv.name,
+					inv.party_account_currency,
+					inv.currency,
+					inv.conversion_rate,
+					inv.total_advance,
+					ps.due_date,
+					ps.payment_term,
+					ps.payment_amount,
+					ps.base_payment_amount,
+					ps.description,
+					ps.paid_amount,
+					ps.base_paid_amount,
+					ps.discounted_amount,
+				)
+				.where((ps.parenttype == doctype) & (inv.name.isin(list(names))) & (inv.is_return == 0))
+				.orderby(inv.name)
+				.orderby(ps.paid_amount, order=Order.desc)
+				.orderby(ps.due_date)
+			).run(as_dict=True)
+
+			for d in payment_terms_details:
+				self.payment_terms_details.setdefault((doctype, d.name), []).append(d)
+
 	def get_payment_terms(self, row):
 		# build payment_terms for row
-		# nosemgrep
-		payment_terms_details = frappe.db.sql(
-			f"""
-			select
-				si.name, si.party_account_currency, si.currency, si.conversion_rate,
-				si.total_advance, ps.due_date, ps.payment_term, ps.payment_amount, ps.base_payment_amount,
-				ps.description, ps.paid_amount, ps.base_paid_amount, ps.discounted_amount
-			from `tab{row.voucher_type}` si, `tabPayment Schedule` ps
-			where
-				si.name = ps.parent and ps.parenttype = '{row.voucher_type}' and
-				si.name = %s and
-				si.is_return = 0
-			order by ps.paid_amount desc, due_date
-		""",
-			row.voucher_no,
-			as_dict=1,
-		)
+		payment_terms_details = self.payment_terms_details.get((row.voucher_type, row.voucher_no), [])
 
 		original_row = frappe._dict(row)
 		row.payment_terms = []
@@ -540,7 +564,7 @@ class ReceivablePayableReport:
 		# Deduct that from paid amount pre allocation
 		row.paid -= flt(payment_terms_details[0].total_advance)
 
-		company_currency = frappe.get_value("Company", self.filters.get("company"), "default_currency")
+		company_currency = self.company_currency
 
 		# If single payment terms, no need to split the row
 		if len(payment_terms_details) == 1 and payment_terms_details[0].payment_term:
@@ -794,42 +818,61 @@ class ReceivablePayableReport:
 		else:
 			self.qb_selection_filter.append(self.ple.posting_date.lte(self.filters.report_date))
 
+		# entries are summed per voucher, against voucher and sign of the amount, which is all that
+		# update_voucher_balance tells apart, so that rows are not pulled into python one by one
 		ple = qb.DocType("Payment Ledger Entry")
+		is_debit = Case().when(ple.amount > 0, 1).else_(0).as_("is_debit")
+		posting_date = Min(ple.posting_date).as_("posting_date")
 		query = (
 			qb.from_(ple)
 			.select(
-				ple.name,
 				ple.account,
 				ple.voucher_type,
 				ple.voucher_no,
 				ple.against_voucher_type,
 				ple.against_voucher_no,
 				ple.party_type,
-				ple.cost_center,
 				ple.party,
-				ple.posting_date,
-				ple.due_date,
 				ple.account_currency,
-				ple.amount,
-				ple.amount_in_account_currency,
+				is_debit,
+				posting_date,
+				Max(ple.cost_center).as_("cost_center"),
+				Sum(ple.amount).as_("amount"),
+				Sum(ple.amount_in_account_currency).as_("amount_in_account_currency"),
 			)
 			.where(ple.delinked == 0)
 			.where(Criterion.all(self.qb_selection_filter))
 			.where(Criterion.any(self.or_filters))
+			.groupby(
+				ple.account,
+				ple.voucher_type,
+				ple.voucher_no,
+				ple.against_voucher_type,
+				ple.against_voucher_no,
+				ple.party_type,
+				ple.party,
+				ple.account_currency,
+				is_debit,
+			)
 		)
 
 		if self.filters.get("show_remarks"):
+			remarks = ple.remarks
 			if remarks_length := frappe.db.get_single_value(
 				"Accounts Settings", "receivable_payable_remarks_length"
 			):
-				query = query.select(Substring(ple.remarks, 1, remarks_length).as_("remarks"))
-			else:
-				query = query.select(ple.remarks)
+				remarks = Substring(ple.remarks, 1, remarks_length)
+
+			# remarks of a voucher are taken from its own entries, see init_voucher_balance
+			own_entry = (ple.voucher_type == ple.against_voucher_type) & (
+				ple.voucher_no == ple.against_voucher_no
+			)
+			query = query.select(Max(Case().when(own_entry, remarks)).as_("remarks"))
 
 		if self.filters.get("group_by_party"):
-			query = query.orderby(self.ple.party, self.ple.posting_date)
+			query = query.orderby(ple.party).orderby(posting_date)
 		else:
-			query = query.orderby(self.ple.posting_date, self.ple.party)
+			query = query.orderby(posting_date).orderby(ple.party)
 
 		self.ple_entries = query.run(as_dict=True)
 
@@ -995,24 +1038,31 @@ class ReceivablePayableReport:
 
 	def get_party_details(self, party):
 		if party not in self.party_details:
-			if self.account_type == "Receivable":
-				fields = ["customer_name", "territory", "customer_group", "customer_primary_contact"]
+			self.get_parties_details([party])
 
-				if self.filters.get("sales_partner"):
-					fields.append("default_sales_partner")
+		return self.party_details[party]
 
-				self.party_details[party] = frappe.db.get_value(
-					"Customer",
-					party,
-					fields,
-					as_dict=True,
-				)
-			else:
-				self.party_details[party] = frappe.db.get_value(
-					"Supplier", party, ["supplier_name", "supplier_group"], as_dict=True
-				)
+	def get_parties_details(self, parties):
+		parties = [party for party in parties if party and party not in self.party_details]
+		if not parties:
+			return
 
-		return self.party_details[party]
+		if self.account_type == "Receivable":
+			doctype = "Customer"
+			fields = ["customer_name", "territory", "customer_group", "customer_primary_contact"]
+
+			if self.filters.get("sales_partner"):
+				fields.append("default_sales_partner")
+		else:
+			doctype = "Supplier"
+			fields = ["supplier_name", "supplier_group"]
+
+		details = {
+			d.pop("name"): d
+			for d in frappe.get_all(doctype, filters={"name": ("in", parties)}, fields=["name", *fields])
+		}
+		for party in parties:
+			self.party_details[party] = details.get(party)
 
 	def get_columns(self):
 		self.columns = []
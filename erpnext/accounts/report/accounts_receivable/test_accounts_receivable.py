@@ -260,6 +260,25 @@ class TestAccountsReceivable(AccountsTestMixin, IntegrationTestCase):
 				],
 			)
 
+	def test_remarks_of_voucher(self):
+		filters = {
+			"company": self.company,
+			"report_date": today(),
+			"range": "30, 60, 90, 120",
+			"show_remarks": True,
+		}
+
+		si = self.create_sales_invoice(no_payment_schedule=True, do_not_submit=True)
+		si.remarks = "A remark"
+		si.save().submit()
+
+		# remarks of the payment sort after those of the invoice, the invoice's own are shown
+		self.create_payment_entry(si.name)
+		report = execute(filters)
+
+		self.assertEqual(len(report[1]), 1)
+		self.assertEqual(report[1][0].remarks, "A remark")
+
 	def test_cr_note_flag_to_update_self(self):
 		filters = {
 			"company": self.company,
@@ -1064,3 +1083,23 @@ class TestAccountsReceivable(AccountsTestMixin, IntegrationTestCase):
 		self.assertEqual(len(report[1]), 1)
 		row = report[1][0]
 		self.assertEqual(expected_data_after_payment, [row.voucher_no, row.cost_center, row.outstanding])
+
+	def test_multiple_payments_against_invoice(self):
+		filters = {
+			"company": self.company,
+			"report_date": today(),
+			"range": "30, 60, 90, 120",
+		}
+
+		si = self.create_sales_invoice(no_payment_schedule=True, qty=2)
+		self.create_payment_entry(si.name)
+		self.create_payment_entry(si.name)
+
+		report = execute(filters)
+
+		self.assertEqual(len(report[1]), 1)
+		row = report[1][0]
+		self.assertEqual(
+			[si.name, 200, 80, 120, 120, self.customer],
+			[row.voucher_no, row.invoiced, row.paid, row.outstanding, row.range1, row.party],
+		)
@@ -4,12 +4,27 @@
 
 import frappe
 from frappe import _, scrub
-from frappe.utils import cint, flt
+from frappe.utils import cint, cstr, flt, getdate
 
+from erpnext.accounts.doctype.party_ageing_snapshot.party_ageing_snapshot import (
+	AGEING_RANGES,
+	get_ageing_snapshot_date,
+)
 from erpnext.accounts.party import get_partywise_advanced_payment_amount
 from erpnext.accounts.report.accounts_receivable.accounts_receivable import ReceivablePayableReport
 from erpnext.accounts.utils import get_currency_precision, get_party_types_from_account_type
 
+# filters the ageing snapshot can answer
+SNAPSHOT_FILTERS = {
+	"company",
+	"report_date",
+	"ageing_based_on",
+	"range",
+	"party_type",
+	"party",
+	"show_gl_balance",
+}
+
 
 def execute(filters=None):
 	args = {
@@ -31,8 +46,11 @@ class AccountsReceivableSummary(ReceivablePayableReport):
 
 	def get_data(self, args):
 		self.data = []
-		self.receivables = ReceivablePayableReport(self.filters).run(args)[1]
 		self.currency_precision = get_currency_precision() or 2
+		if self.can_use_ageing_snapshot():
+			self.receivables = self.get_receivables_from_snapshot()
+		else:
+			self.receivables = ReceivablePayableReport(self.filters).run(args)[1]
 
 		self.get_party_total(args)
 
@@ -89,6 +107,54 @@ class AccountsReceivableSummary(ReceivablePayableReport):
 
 			self.data.append(row)
 
+	def can_use_ageing_snapshot(self):
+		"""The ageing snapshot is aged on default ranges and due date, and holds no details beyond
+		company, account and party"""
+		if any(value for key, value in self.filters.items() if key not in SNAPSHOT_FILTERS):
+			return False
+
+		ageing_date = get_ageing_snapshot_date(self.filters.company)
+		return bool(
+			ageing_date
+			and getdate(ageing_date) == self.filters.report_date
+			and self.filters.ageing_based_on == "Due Date"
+			and self.ranges == [cstr(days) for days in AGEING_RANGES]
+		)
+
+	def get_receivables_from_snapshot(self):
+		"""Rows per account, party and ageing bucket, shaped like rows of the receivable report"""
+		filters = {"company": self.filters.company, "account_type": self.account_type}
+		if self.filters.party_type:
+			filters["party_type"] = self.filters.party_type
+		if self.filters.party:
+			filters["party"] = ("in", self.filters.party)
+
+		self.party_details = {}
+		company_currency = frappe.get_cached_value("Company", self.filters.company, "default_currency")
+
+		receivables = []
+		for row in frappe.get_all(
+			"Party Ageing Snapshot",
+			filters=filters,
+			fields=[
+				"party_type",
+				"party",
+				"ageing_bucket",
+				"invoiced",
+				"paid",
+				"credit_note",
+				"outstanding",
+			],
+		):
+			for i in self.range_numbers:
+				row[f"range{i}"] = row.outstanding if row.ageing_bucket == i else 0.0
+			row.total_due = sum(row[f"range{i}"] for i in self.range_numbers)
+			row.currency = company_currency
+			row.update(self.get_party_details(row.party) or {})
+			receivables.append(row)
+
+		return receivables
+
 	def get_party_total(self, args):
 		self.party_total = frappe._dict()
 
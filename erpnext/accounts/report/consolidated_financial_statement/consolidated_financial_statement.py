@@ -24,9 +24,10 @@ from erpnext.accounts.report.cash_flow.cash_flow import (
 )
 from erpnext.accounts.report.cash_flow.cash_flow import get_report_summary as get_cash_flow_summary
 from erpnext.accounts.report.financial_statements import (
+	AccountTree,
 	filter_out_zero_value_rows,
+	get_accounts_in_tree_order,
 	get_fiscal_year_data,
-	sort_accounts,
 )
 from erpnext.accounts.report.profit_and_loss_statement.profit_and_loss_statement import (
 	get_chart_data as get_pl_chart_data,
@@ -428,22 +429,13 @@ def calculate_values(accounts_by_name, gl_entries_by_account, companies, filters
 
 def accumulate_values_into_parents(accounts, accounts_by_name, companies):
 	"""accumulate children's values in parent accounts"""
-	for d in reversed(accounts):
-		if d.parent_account:
-			account = d.parent_account_name
+	tree = AccountTree(accounts, name_field="account_key", parent_field="parent_account_name")
+	tree.accumulate([*companies, "opening_balance"])
 
-			for company in companies:
-				accounts_by_name[account][company] = accounts_by_name[account].get(company, 0.0) + d.get(
-					company, 0.0
-				)
-
-				accounts_by_name[account]["company_wise_opening_bal"][company] += d.get(
-					"company_wise_opening_bal", {}
-				).get(company, 0.0)
-
-			accounts_by_name[account]["opening_balance"] = accounts_by_name[account].get(
-				"opening_balance", 0.0
-			) + d.get("opening_balance", 0.0)
+	for company in companies:
+		opening_balances = tree.rollup([d.company_wise_opening_bal[company] for d in accounts])
+		for d, opening_balance in zip(accounts, opening_balances, strict=True):
+			d.company_wise_opening_bal[company] = opening_balance
 
 
 def get_account_heads(root_type, companies, filters):
@@ -767,30 +759,16 @@ def add_total_row(out, root_type, balance_must_be, companies, company_currency):
 def filter_accounts(accounts, depth=10):
 	parent_children_map = {}
 	accounts_by_name = {}
-	added_accounts = []
 
 	for d in accounts:
-		if d.account_key in added_accounts:
+		if d.account_key in accounts_by_name:
 			continue
 
-		added_accounts.append(d.account_key)
 		d["company_wise_opening_bal"] = defaultdict(float)
 		accounts_by_name[d.account_key] = d
 
 		parent_children_map.setdefault(d.parent_account_name or None, []).append(d)
 
-	filtered_accounts = []
-
-	def add_to_list(parent, level):
-		if level < depth:
-			children = parent_children_map.get(parent) or []
-			sort_accounts(children, is_root=True if parent is None else False)
-
-			for child in children:
-				child.indent = level
-				filtered_accounts.append(child)
-				add_to_list(child.account_key, level + 1)
-
-	add_to_list(None, 0)
+	filtered_accounts = get_accounts_in_tree_order(parent_children_map, depth, name_field="account_key")
 
 	return filtered_accounts, accounts_by_name, parent_children_map
@@ -3,12 +3,12 @@
 
 
 import copy
-import functools
 import math
 import re
 
 import frappe
 from frappe import _
+from frappe.query_builder import Case
 from frappe.query_builder.functions import Sum
 from frappe.utils import add_days, add_months, cint, cstr, flt, formatdate, get_first_day, getdate
 from pypika.terms import ExistsCriterion
@@ -190,6 +190,7 @@ def get_data(
 			root.rgt,
 			root_type=root_type,
 			ignore_closing_entries=ignore_closing_entries,
+			period_list=period_list,
 		)
 
 	calculate_values(
@@ -254,22 +255,47 @@ def calculate_values(
 
 def accumulate_values_into_parents(accounts, accounts_by_name, period_list):
 	"""accumulate children's values in parent accounts"""
-	for d in reversed(accounts):
-		if d.parent_account:
-			for period in period_list:
-				accounts_by_name[d.parent_account][period.key] = accounts_by_name[d.parent_account].get(
-					period.key, 0.0
-				) + d.get(period.key, 0.0)
+	AccountTree(accounts).accumulate([period.key for period in period_list] + ["opening_balance"])
+
+
+class AccountTree:
+	"""Rolls up values of accounts into their parents.
+
+	`accounts` must be in tree order (as returned by `filter_accounts`), so that every account
+	comes after its parent. Values are held in one list per column, indexed by the position of the
+	account, and are rolled up in a single reverse pass over the (child, parent) positions."""
+
+	def __init__(self, accounts, name_field="name", parent_field="parent_account"):
+		self.accounts = accounts
+		position = {d[name_field]: idx for idx, d in enumerate(accounts)}
+		self.child_parent_positions = [
+			(idx, position[d[parent_field]])
+			for idx, d in reversed(list(enumerate(accounts)))
+			if d.get(parent_field)
+		]
 
-			accounts_by_name[d.parent_account]["opening_balance"] = accounts_by_name[d.parent_account].get(
-				"opening_balance", 0.0
-			) + d.get("opening_balance", 0.0)
+	def rollup(self, values):
+		"""Add the values of children into their parents, in place"""
+		for child, parent in self.child_parent_positions:
+			values[parent] += values[child]
+
+		return values
+
+	def accumulate(self, keys):
+		"""Roll up `keys` of the account dicts, storing the totals back in them"""
+		for key in keys:
+			values = self.rollup([d.get(key, 0.0) for d in self.accounts])
+			for d, value in zip(self.accounts, values, strict=True):
+				d[key] = value
 
 
 def prepare_data(accounts, balance_must_be, period_list, company_currency, accumulated_values):
 	data = []
 	year_start_date = period_list[0]["year_start_date"].strftime("%Y-%m-%d")
 	year_end_date = period_list[-1]["year_end_date"].strftime("%Y-%m-%d")
+	period_keys = [period.key for period in period_list]
+	last_period_key = period_keys[-1]
+	sign = 1 if balance_must_be == "Debit" else -1
 
 	for d in accounts:
 		# add to output
@@ -286,29 +312,31 @@ def prepare_data(accounts, balance_must_be, period_list, company_currency, accum
 				"include_in_gross": d.include_in_gross,
 				"account_type": d.account_type,
 				"is_group": d.is_group,
-				"opening_balance": d.get("opening_balance", 0.0) * (1 if balance_must_be == "Debit" else -1),
+				"opening_balance": d.get("opening_balance", 0.0) * sign,
 				"account_name": (
 					f"{_(d.account_number)} - {_(d.account_name)}" if d.account_number else _(d.account_name)
 				),
 			}
 		)
-		for period in period_list:
-			if d.get(period.key) and balance_must_be == "Credit":
+		for key in period_keys:
+			value = d.get(key, 0.0)
+			if value and balance_must_be == "Credit":
 				# change sign based on Debit or Credit, since calculation is done using (debit - credit)
-				d[period.key] *= -1
+				value *= -1
+				d[key] = value
 
-			row[period.key] = flt(d.get(period.key, 0.0), 3)
+			row[key] = flt(value, 3)
 
-			if abs(row[period.key]) >= 0.005:
+			if abs(row[key]) >= 0.005:
 				# ignore zero values
 				has_value = True
-				total += flt(row[period.key])
+				total += flt(row[key])
 
 		if accumulated_values:
 			# when 'accumulated_values' is enabled, periods have running balance.
 			# so, last period will have the net amount.
 			row["has_value"] = has_value
-			row["total"] = flt(d.get(period_list[-1].key, 0.0), 3)
+			row["total"] = flt(d.get(last_period_key, 0.0), 3)
 		else:
 			row["has_value"] = has_value
 			row["total"] = total
@@ -319,17 +347,16 @@ def prepare_data(accounts, balance_must_be, period_list, company_currency, accum
 
 def filter_out_zero_value_rows(data, parent_children_map, show_zero_values=False):
 	data_with_value = []
+	accounts_with_value = {row.get("account") for row in data if row.get("has_value")}
+
 	for d in data:
 		if show_zero_values or d.get("has_value"):
 			data_with_value.append(d)
 		else:
 			# show group with zero balance, if there are balances against child
-			children = [child.name for child in parent_children_map.get(d.get("account")) or []]
-			if children:
-				for row in data:
-					if row.get("account") in children and row.get("has_value"):
-						data_with_value.append(d)
-						break
+			children = parent_children_map.get(d.get("account")) or []
+			if any(child.name in accounts_with_value for child in children):
+				data_with_value.append(d)
 
 	return data_with_value
 
@@ -377,45 +404,53 @@ def filter_accounts(accounts, depth=20):
 		accounts_by_name[d.name] = d
 		parent_children_map.setdefault(d.parent_account or None, []).append(d)
 
-	filtered_accounts = []
+	filtered_accounts = get_accounts_in_tree_order(parent_children_map, depth)
 
-	def add_to_list(parent, level):
-		if level < depth:
-			children = parent_children_map.get(parent) or []
-			sort_accounts(children, is_root=True if parent is None else False)
+	return filtered_accounts, accounts_by_name, parent_children_map
 
-			for child in children:
-				child.indent = level
-				filtered_accounts.append(child)
-				add_to_list(child.name, level + 1)
 
-	add_to_list(None, 0)
+def get_accounts_in_tree_order(parent_children_map, depth, name_field="name"):
+	"""Accounts of `parent_children_map` in depth first order with their `indent` set,
+	siblings being sorted by `sort_accounts`"""
+	accounts = []
 
-	return filtered_accounts, accounts_by_name, parent_children_map
+	def get_children(parent):
+		children = parent_children_map.get(parent) or []
+		sort_accounts(children, is_root=parent is None)
+		return reversed(children)
+
+	stack = [(child, 0) for child in get_children(None)]
+	while stack:
+		account, level = stack.pop()
+		account.indent = level
+		accounts.append(account)
+
+		if level + 1 < depth:
+			stack.extend((child, level + 1) for child in get_children(account[name_field]))
+
+	return accounts
+
+
+ROOT_TYPE_ORDER = {"Asset": 0, "Liability": 1, "Equity": 2, "Income": 3, "Expense": 4}
 
 
 def sort_accounts(accounts, is_root=False, key="name"):
 	"""Sort root types as Asset, Liability, Equity, Income, Expense"""
 
-	def compare_accounts(a, b):
-		if re.split(r"\W+", a[key])[0].isdigit():
-			# if chart of accounts is numbered, then sort by number
-			return int(a[key] > b[key]) - int(a[key] < b[key])
-		elif is_root:
-			if a.report_type != b.report_type and a.report_type == "Balance Sheet":
-				return -1
-			if a.root_type != b.root_type and a.root_type == "Asset":
-				return -1
-			if a.root_type == "Liability" and b.root_type == "Equity":
-				return -1
-			if a.root_type == "Income" and b.root_type == "Expense":
-				return -1
-		else:
-			# sort by key (number) or name
-			return int(a[key] > b[key]) - int(a[key] < b[key])
-		return 1
+	def is_numbered(account):
+		# if chart of accounts is numbered, then sort by number
+		return re.split(r"\W+", account[key])[0].isdigit()
 
-	accounts.sort(key=functools.cmp_to_key(compare_accounts))
+	if is_root and not all(is_numbered(d) for d in accounts):
+		accounts.sort(
+			key=lambda d: (
+				d.report_type != "Balance Sheet",
+				ROOT_TYPE_ORDER.get(d.root_type, len(ROOT_TYPE_ORDER)),
+			)
+		)
+	else:
+		# sort by key (number) or name
+		accounts.sort(key=lambda d: d[key])
 
 
 def set_gl_entries_by_account(
@@ -430,8 +465,11 @@ def set_gl_entries_by_account(
 	ignore_closing_entries=False,
 	ignore_opening_entries=False,
 	group_by_account=False,
+	period_list=None,
 ):
-	"""Returns a dict like { "account": [gl entries], ... }"""
+	"""Returns a dict like { "account": [gl entries], ... }
+
+	If `period_list` is passed, GL entries are aggregated per account and period in SQL."""
 	gl_entries = []
 
 	# For balance sheet
@@ -462,6 +500,7 @@ def set_gl_entries_by_account(
 				ignore_closing_entries,
 				last_period_closing_voucher[0].name,
 				group_by_account=group_by_account,
+				period_list=period_list,
 			)
 			from_date = add_days(last_period_closing_voucher[0].period_end_date, 1)
 			ignore_opening_entries = True
@@ -477,6 +516,7 @@ def set_gl_entries_by_account(
 		ignore_closing_entries,
 		ignore_opening_entries=ignore_opening_entries,
 		group_by_account=group_by_account,
+		period_list=period_list,
 	)
 
 	if filters and filters.get("presentation_currency"):
@@ -500,19 +540,29 @@ def get_accounting_entries(
 	period_closing_voucher=None,
 	ignore_opening_entries=False,
 	group_by_account=False,
+	period_list=None,
 ):
+	"""Returns GL Entries (or Account Closing Balances) of the company.
+
+	With `period_list`, entries are summed per account, account currency, fiscal year and period,
+	the posting date of each row being the start date of its period (or the day before the first
+	period for entries before it). This is all `calculate_values` needs, so it gets a few rows per
+	account instead of every GL Entry."""
 	gl_entry = frappe.qb.DocType(doctype)
+	aggregate = group_by_account or bool(period_list)
+	group_by_period = bool(period_list) and not group_by_account and doctype == "GL Entry"
+
 	query = (
 		frappe.qb.from_(gl_entry)
 		.select(
 			gl_entry.account,
-			gl_entry.debit if not group_by_account else Sum(gl_entry.debit).as_("debit"),
-			gl_entry.credit if not group_by_account else Sum(gl_entry.credit).as_("credit"),
+			gl_entry.debit if not aggregate else Sum(gl_entry.debit).as_("debit"),
+			gl_entry.credit if not aggregate else Sum(gl_entry.credit).as_("credit"),
 			gl_entry.debit_in_account_currency
-			if not group_by_account
+			if not aggregate
 			else Sum(gl_entry.debit_in_account_currency).as_("debit_in_account_currency"),
 			gl_entry.credit_in_account_currency
-			if not group_by_account
+			if not aggregate
 			else Sum(gl_entry.credit_in_account_currency).as_("credit_in_account_currency"),
 			gl_entry.account_currency,
 		)
@@ -524,7 +574,14 @@ def get_accounting_entries(
 	)
 
 	if doctype == "GL Entry":
-		query = query.select(gl_entry.posting_date, gl_entry.is_opening, gl_entry.fiscal_year)
+		if group_by_period:
+			query = query.select(
+				get_period_start_date_query(gl_entry, period_list).as_("period_start_date"),
+				gl_entry.fiscal_year,
+			)
+		else:
+			query = query.select(gl_entry.posting_date, gl_entry.is_opening, gl_entry.fiscal_year)
+
 		query = query.where(gl_entry.is_cancelled == 0)
 		query = query.where(gl_entry.posting_date <= to_date)
 
@@ -550,8 +607,29 @@ def get_accounting_entries(
 
 	if group_by_account:
 		query += " GROUP BY `account`"
+	elif group_by_period:
+		query += " GROUP BY `account`, `account_currency`, `fiscal_year`, `period_start_date`"
+	elif period_list:
+		query += " GROUP BY `account`, `account_currency`, `closing_date`"
+
+	entries = frappe.db.sql(query, params, as_dict=True)
+
+	if group_by_period:
+		for entry in entries:
+			entry.posting_date = getdate(entry.pop("period_start_date"))
+
+	return entries
+
+
+def get_period_start_date_query(gl_entry, period_list):
+	"""Start date of the period of `period_list` the posting date of `gl_entry` falls in"""
+	period_start_date = Case().when(
+		gl_entry.posting_date < period_list[0].from_date, add_days(period_list[0].from_date, -1)
+	)
+	for period in period_list:
+		period_start_date = period_start_date.when(gl_entry.posting_date <= period.to_date, period.from_date)
 
-	return frappe.db.sql(query, params, as_dict=True)
+	return period_start_date
 
 
 def get_account_filter_query(root_lft, root_rgt, root_type, gl_entry):
@@ -3,12 +3,18 @@
 
 
 import copy
+import csv
+import os
 from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import groupby
 
 import frappe
+import openpyxl
 from frappe import _, _dict
 from frappe.query_builder import Criterion
-from frappe.utils import cstr, getdate
+from frappe.utils import cstr, flt, getdate
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
 
 from erpnext import get_company_currency, get_default_company
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
@@ -19,11 +25,24 @@ from erpnext.accounts.report.financial_statements import get_cost_centers_with_c
 from erpnext.accounts.report.utils import convert_to_presentation_currency, get_currency
 from erpnext.accounts.utils import get_account_currency
 
+# GL entries fetched per query by the General Ledger export
+GL_EXPORT_PAGE_SIZE = 10_000
+
 
 def execute(filters=None):
 	if not filters:
 		return [], []
 
+	filters, account_details = prepare_filters(filters)
+
+	columns = get_columns(filters)
+
+	res = get_result(filters, account_details)
+
+	return columns, res
+
+
+def prepare_filters(filters):
 	account_details = {}
 
 	if filters and filters.get("print_in_account_currency") and not filters.get("account"):
@@ -41,11 +60,7 @@ def execute(filters=None):
 
 	filters = set_account_currency(filters)
 
-	columns = get_columns(filters)
-
-	res = get_result(filters, account_details)
-
-	return columns, res
+	return filters, account_details
 
 
 def validate_filters(filters, account_details):
@@ -149,14 +164,6 @@ def get_result(filters, account_details):
 
 def get_gl_entries(filters, accounting_dimensions):
 	currency_map = get_currency(filters)
-	select_fields = """, debit, credit, debit_in_account_currency,
-		credit_in_account_currency """
-
-	if filters.get("show_remarks"):
-		if remarks_length := frappe.db.get_single_value("Accounts Settings", "general_ledger_remarks_length"):
-			select_fields += f",substr(remarks, 1, {remarks_length}) as 'remarks'"
-		else:
-			select_fields += """,remarks"""
 
 	order_by_statement = "order by posting_date, account, creation"
 
@@ -173,24 +180,9 @@ def get_gl_entries(filters, accounting_dimensions):
 			"Company", filters.get("company"), "default_finance_book"
 		)
 
-	dimension_fields = ""
-	if accounting_dimensions:
-		dimension_fields = ", ".join(accounting_dimensions) + ","
-
-	transaction_currency_fields = ""
-	if filters.get("add_values_in_transaction_currency"):
-		transaction_currency_fields = (
-			"debit_in_transaction_currency, credit_in_transaction_currency, transaction_currency,"
-		)
-
 	gl_entries = frappe.db.sql(
 		f"""
-		select
-			name as gl_entry, posting_date, account, party_type, party,
-			voucher_type, voucher_subtype, voucher_no, {dimension_fields}
-			cost_center, project, {transaction_currency_fields}
-			against_voucher_type, against_voucher, account_currency,
-			against, is_opening, creation {select_fields}
+		select {get_gl_entry_fields(filters, accounting_dimensions)}
 		from `tabGL Entry`
 		where company=%(company)s {get_conditions(filters)}
 		{order_by_statement}
@@ -205,6 +197,34 @@ def get_gl_entries(filters, accounting_dimensions):
 		return gl_entries
 
 
+def get_gl_entry_fields(filters, accounting_dimensions):
+	select_fields = """, debit, credit, debit_in_account_currency,
+		credit_in_account_currency """
+
+	if filters.get("show_remarks"):
+		if remarks_length := frappe.db.get_single_value("Accounts Settings", "general_ledger_remarks_length"):
+			select_fields += f",substr(remarks, 1, {remarks_length}) as 'remarks'"
+		else:
+			select_fields += """,remarks"""
+
+	dimension_fields = ""
+	if accounting_dimensions:
+		dimension_fields = ", ".join(accounting_dimensions) + ","
+
+	transaction_currency_fields = ""
+	if filters.get("add_values_in_transaction_currency"):
+		transaction_currency_fields = (
+			"debit_in_transaction_currency, credit_in_transaction_currency, transaction_currency,"
+		)
+
+	return f"""
+			name as gl_entry, posting_date, account, party_type, party,
+			voucher_type, voucher_subtype, voucher_no, {dimension_fields}
+			cost_center, project, {transaction_currency_fields}
+			against_voucher_type, against_voucher, account_currency,
+			against, is_opening, creation {select_fields}"""
+
+
 def get_conditions(filters):
 	conditions = []
 
@@ -355,8 +375,8 @@ def get_accounts_with_children(accounts):
 	return frappe.qb.from_(doctype).select(doctype.name).where(Criterion.any(conditions)).run(pluck=True)
 
 
-def set_bill_no(gl_entries):
-	inv_details = get_supplier_invoice_details()
+def set_bill_no(gl_entries, invoices=None):
+	inv_details = get_supplier_invoice_details(invoices)
 	for gl in gl_entries:
 		gl["bill_no"] = inv_details.get(gl.get("against_voucher"), "")
 
@@ -453,45 +473,14 @@ def get_accountwise_gle(filters, accounting_dimensions, gl_entries, gle_map, tot
 	group_by = group_by_field(filters.get("group_by"))
 	group_by_voucher_consolidated = filters.get("group_by") == "Group by Voucher (Consolidated)"
 
+	account_type_map = None
 	if filters.get("show_net_values_in_party_account"):
 		account_type_map = get_account_type_map(filters.get("company"))
 
 	immutable_ledger = frappe.db.get_single_value("Accounts Settings", "enable_immutable_ledger")
 
 	def update_value_in_dict(data, key, gle):
-		data[key].debit += gle.debit
-		data[key].credit += gle.credit
-
-		data[key].debit_in_account_currency += gle.debit_in_account_currency
-		data[key].credit_in_account_currency += gle.credit_in_account_currency
-
-		if filters.get("add_values_in_transaction_currency") and key not in ["opening", "closing", "total"]:
-			data[key].debit_in_transaction_currency += gle.debit_in_transaction_currency
-			data[key].credit_in_transaction_currency += gle.credit_in_transaction_currency
-
-		if filters.get("show_net_values_in_party_account") and account_type_map.get(data[key].account) in (
-			"Receivable",
-			"Payable",
-		):
-			net_value = data[key].debit - data[key].credit
-			net_value_in_account_currency = (
-				data[key].debit_in_account_currency - data[key].credit_in_account_currency
-			)
-
-			if net_value < 0:
-				dr_or_cr = "credit"
-				rev_dr_or_cr = "debit"
-			else:
-				dr_or_cr = "debit"
-				rev_dr_or_cr = "credit"
-
-			data[key][dr_or_cr] = abs(net_value)
-			data[key][dr_or_cr + "_in_account_currency"] = abs(net_value_in_account_currency)
-			data[key][rev_dr_or_cr] = 0
-			data[key][rev_dr_or_cr + "_in_account_currency"] = 0
-
-		if data[key].against_voucher and gle.against_voucher:
-			data[key].against_voucher += ", " + gle.against_voucher
+		update_totals(data, key, gle, filters, account_type_map)
 
 	from_date, to_date = getdate(filters.from_date), getdate(filters.to_date)
 	show_opening_entries = filters.get("show_opening_entries")
@@ -553,6 +542,43 @@ def get_accountwise_gle(filters, accounting_dimensions, gl_entries, gle_map, tot
 	return totals, entries
 
 
+def update_totals(data, key, gle, filters, account_type_map=None):
+	"""Add the debit and credit of `gle` to `data[key]`"""
+	data[key].debit += gle.debit
+	data[key].credit += gle.credit
+
+	data[key].debit_in_account_currency += gle.debit_in_account_currency
+	data[key].credit_in_account_currency += gle.credit_in_account_currency
+
+	if filters.get("add_values_in_transaction_currency") and key not in ["opening", "closing", "total"]:
+		data[key].debit_in_transaction_currency += gle.debit_in_transaction_currency
+		data[key].credit_in_transaction_currency += gle.credit_in_transaction_currency
+
+	if filters.get("show_net_values_in_party_account") and account_type_map.get(data[key].account) in (
+		"Receivable",
+		"Payable",
+	):
+		net_value = data[key].debit - data[key].credit
+		net_value_in_account_currency = (
+			data[key].debit_in_account_currency - data[key].credit_in_account_currency
+		)
+
+		if net_value < 0:
+			dr_or_cr = "credit"
+			rev_dr_or_cr = "debit"
+		else:
+			dr_or_cr = "debit"
+			rev_dr_or_cr = "credit"
+
+		data[key][dr_or_cr] = abs(net_value)
+		data[key][dr_or_cr + "_in_account_currency"] = abs(net_value_in_account_currency)
+		data[key][rev_dr_or_cr] = 0
+		data[key][rev_dr_or_cr + "_in_account_currency"] = 0
+
+	if data[key].against_voucher and gle.against_voucher:
+		data[key].against_voucher += ", " + gle.against_voucher
+
+
 def get_account_type_map(company):
 	account_type_map = frappe._dict(
 		frappe.get_all("Account", fields=["name", "account_type"], filters={"company": company}, as_list=1)
@@ -562,30 +588,41 @@ def get_account_type_map(company):
 
 
 def get_result_as_list(data, filters):
-	balance, _balance_in_account_currency = 0, 0
+	return list(get_rows_with_balance(data, filters))
+
+
+def get_rows_with_balance(rows, filters):
+	"""Set the running balance on `rows`, restarting it at every row without a posting date"""
+	balance = 0
 
-	for d in data:
+	for d in rows:
 		if not d.get("posting_date"):
-			balance, _balance_in_account_currency = 0, 0
+			balance = 0
 
 		balance = get_balance(d, balance, "debit", "credit")
 		d["balance"] = balance
 
 		d["account_currency"] = filters.account_currency
 
-	return data
+		yield d
 
 
-def get_supplier_invoice_details():
-	inv_details = {}
-	for d in frappe.db.sql(
-		""" select name, bill_no from `tabPurchase Invoice`
-		where docstatus = 1 and bill_no is not null and bill_no != '' """,
-		as_dict=1,
-	):
-		inv_details[d.name] = d.bill_no
+def get_supplier_invoice_details(invoices=None):
+	"""Supplier invoice numbers of (only `invoices`, if passed) submitted Purchase Invoices"""
+	if invoices is not None and not invoices:
+		return {}
 
-	return inv_details
+	pi = frappe.qb.DocType("Purchase Invoice")
+	query = (
+		frappe.qb.from_(pi)
+		.select(pi.name, pi.bill_no)
+		.where((pi.docstatus == 1) & pi.bill_no.isnotnull() & (pi.bill_no != ""))
+	)
+
+	if invoices is not None:
+		query = query.where(pi.name.isin(list(invoices)))
+
+	return dict(query.run())
 
 
 def get_balance(row, balance, debit_field, credit_field):
@@ -714,3 +751,341 @@ def get_columns(filters):
 		columns.extend([{"label": _("Remarks"), "fieldname": "remarks", "width": 400}])
 
 	return columns
+
+
+@frappe.whitelist()
+def export_general_ledger(filters, file_format="CSV"):
+	"""Export the General Ledger to a CSV or Excel file in a background job.
+
+	Unlike the report view, the export never holds the whole ledger in memory, so it can be used
+	for ledgers too large to be rendered."""
+	frappe.has_permission("GL Entry", "read", throw=True)
+
+	if file_format not in ("CSV", "Excel"):
+		frappe.throw(_("File Format must be CSV or Excel"))
+
+	filters, _account_details = prepare_filters(frappe._dict(frappe.parse_json(filters)))
+
+	frappe.enqueue(
+		build_general_ledger_export,
+		queue="long",
+		timeout=7200,
+		filters=filters,
+		file_format=file_format,
+		user=frappe.session.user,
+		now=frappe.flags.in_test,
+	)
+
+	frappe.msgprint(
+		_("The General Ledger is being exported in the background. You will be notified once it is ready."),
+		alert=True,
+	)
+
+
+def build_general_ledger_export(filters, file_format, user):
+	filters = frappe._dict(filters)
+	extension = "csv" if file_format == "CSV" else "xlsx"
+	file_name = f"general_ledger_{frappe.generate_hash(length=10)}.{extension}"
+	file_path = frappe.get_site_path("private", "files", file_name)
+
+	try:
+		accounting_dimensions = get_accounting_dimensions() if filters.get("include_dimensions") else []
+		columns = [column for column in get_columns(filters) if not column.get("hidden")]
+
+		with get_export_writer(file_path, file_format) as write_row:
+			write_row([column["label"] for column in columns])
+			for row in get_streamed_rows(filters, accounting_dimensions):
+				write_row([row.get(column["fieldname"]) for column in columns])
+
+		file_doc = frappe.get_doc(
+			{
+				"doctype": "File",
+				"file_name": _("General Ledger {0} to {1}.{2}").format(
+					filters.from_date, filters.to_date, extension
+				),
+				"file_url": f"/private/files/{file_name}",
+				"is_private": 1,
+			}
+		).insert(ignore_permissions=True)
+	except Exception:
+		frappe.db.rollback()
+		frappe.log_error(title=_("General Ledger export failed"))
+		if os.path.exists(file_path):
+			os.remove(file_path)
+
+		notify_export_status(user, _("General Ledger export failed, please check the Error Log"))
+		return
+
+	notify_export_status(user, _("General Ledger export is ready"), file_doc)
+
+
+@contextmanager
+def get_export_writer(file_path, file_format):
+	"""Yields a function writing a row to `file_path`, rows being written as they come"""
+	if file_format == "CSV":
+		with open(file_path, "w", newline="") as file:
+			yield csv.writer(file).writerow
+		return
+
+	workbook = openpyxl.Workbook(write_only=True)
+	sheet = workbook.create_sheet(_("General Ledger"))
+
+	def write_row(row):
+		sheet.append(
+			[ILLEGAL_CHARACTERS_RE.sub("", value) if isinstance(value, str) else value for value in row]
+		)
+
+	yield write_row
+	workbook.save(file_path)
+
+
+def notify_export_status(user, subject, file_doc=None):
+	from frappe.desk.doctype.notification_log.notification_log import enqueue_create_notification
+
+	enqueue_create_notification(
+		user,
+		{
+			"type": "Alert",
+			"subject": subject,
+			"document_type": "File" if file_doc else None,
+			"document_name": file_doc.name if file_doc else None,
+		},
+	)
+
+
+def get_streamed_rows(filters, accounting_dimensions):
+	"""Rows of the General Ledger with running balances, computed while GL entries are fetched page by page.
+
+	Opening balances are summed in SQL, and GL entries of the period are fetched sorted by the group they
+	belong to, so only the current group (or voucher, when consolidated) is held in memory. Groups are
+	sorted by their value and entries of a voucher by GL Entry, so rows can be ordered differently than
+	in the report view."""
+	if filters.get("include_default_book_entries"):
+		filters["company_fb"] = frappe.get_cached_value(
+			"Company", filters.get("company"), "default_finance_book"
+		)
+
+	conditions = get_conditions(filters)
+	account_type_map = None
+	if filters.get("show_net_values_in_party_account"):
+		account_type_map = get_account_type_map(filters.get("company"))
+
+	account_currencies = frappe.db.sql_list(
+		f"""select distinct account_currency from `tabGL Entry` where company=%(company)s {conditions}""",
+		filters,
+	)
+	currency_info = get_currency(filters) if filters.get("presentation_currency") else None
+
+	group_by = group_by_field(filters.get("group_by"))
+	group_by_voucher_consolidated = filters.get("group_by") == "Group by Voucher (Consolidated)"
+	totals_dict = get_totals_dict()
+	totals = copy.deepcopy(totals_dict)
+
+	def update_value_in_dict(data, key, gle):
+		update_totals(data, key, gle, filters, account_type_map)
+
+	opening_balances = get_opening_balances(filters, conditions, group_by, currency_info, account_currencies)
+	for opening_balance in opening_balances.values():
+		update_value_in_dict(totals, "opening", opening_balance)
+		update_value_in_dict(totals, "closing", opening_balance)
+
+	entries = get_period_gl_entries(
+		filters, accounting_dimensions, conditions, group_by, currency_info, account_currencies
+	)
+
+	def get_rows():
+		yield totals.opening
+
+		if group_by_voucher_consolidated:
+			for _voucher, voucher_entries in groupby(
+				entries, key=lambda gle: (gle.posting_date, gle.voucher_type, gle.voucher_no)
+			):
+				for gle in consolidate_voucher_entries(
+					voucher_entries, filters, accounting_dimensions, update_value_in_dict
+				):
+					update_value_in_dict(totals, "total", gle)
+					update_value_in_dict(totals, "closing", gle)
+					yield gle
+		else:
+			show_opening_and_closing = (not filters.get("group_by") and not filters.get("voucher_no")) or (
+				filters.get("group_by") and filters.get("group_by") != "Group by Voucher"
+			)
+
+			for group_by_value, group_entries in groupby(entries, key=lambda gle: gle.get(group_by)):
+				group_totals = copy.deepcopy(totals_dict)
+				if opening_balance := opening_balances.get(group_by_value):
+					update_value_in_dict(group_totals, "opening", opening_balance)
+					update_value_in_dict(group_totals, "closing", opening_balance)
+
+				yield {"debit_in_transaction_currency": None, "credit_in_transaction_currency": None}
+				if show_opening_and_closing:
+					yield group_totals.opening
+
+				for gle in group_entries:
+					update_value_in_dict(group_totals, "total", gle)
+					update_value_in_dict(group_totals, "closing", gle)
+					update_value_in_dict(totals, "total", gle)
+					update_value_in_dict(totals, "closing", gle)
+					yield gle
+
+				if filters.get("group_by") or not filters.voucher_no:
+					yield group_totals.total
+
+				if show_opening_and_closing:
+					yield group_totals.closing
+
+			yield {"debit_in_transaction_currency": None, "credit_in_transaction_currency": None}
+
+		yield totals.total
+		yield totals.closing
+
+	yield from get_rows_with_balance(get_rows(), filters)
+
+
+def get_opening_balances(filters, conditions, group_by, currency_info, account_currencies):
+	"""Debit and credit of GL entries counted in the opening balance, per value of `group_by`"""
+	opening_condition = "posting_date < %(from_date)s"
+	if not filters.get("show_opening_entries"):
+		opening_condition = "(posting_date < %(from_date)s or is_opening = 'Yes')"
+
+	gl_entries = frappe.db.sql(
+		f"""
+		select
+			{group_by} as group_by_value, account_currency,
+			sum(debit) as debit, sum(credit) as credit,
+			sum(debit_in_account_currency) as debit_in_account_currency,
+			sum(credit_in_account_currency) as credit_in_account_currency
+		from `tabGL Entry`
+		where company=%(company)s {conditions} and {opening_condition}
+		group by {group_by}, account_currency
+	""",
+		filters,
+		as_dict=1,
+	)
+
+	if currency_info:
+		convert_to_presentation_currency(gl_entries, currency_info, account_currencies)
+
+	opening_balances = {}
+	for gle in gl_entries:
+		opening_balance = opening_balances.setdefault(
+			gle.group_by_value,
+			_dict(debit=0.0, credit=0.0, debit_in_account_currency=0.0, credit_in_account_currency=0.0),
+		)
+		for field in opening_balance:
+			opening_balance[field] += flt(gle[field])
+
+	return opening_balances
+
+
+def get_period_gl_entries(
+	filters, accounting_dimensions, conditions, group_by, currency_info, account_currencies
+):
+	"""GL entries of the period sorted by `group_by`, fetched in pages of `GL_EXPORT_PAGE_SIZE`.
+
+	Pages are read with keyset pagination (continuing after the sort key of the last entry of the
+	previous page), so every page is an index range scan instead of an ever growing offset."""
+	if group_by == "voucher_no" or filters.get("group_by") == "Group by Voucher (Consolidated)":
+		sort_keys = [
+			("posting_date", "posting_date"),
+			("voucher_type", "voucher_type"),
+			("voucher_no", "voucher_no"),
+		]
+	else:
+		group_by_column = "ifnull(party, '')" if group_by == "party" else group_by
+		sort_keys = [(group_by_column, group_by), ("posting_date", "posting_date"), ("creation", "creation")]
+
+	sort_keys.append(("name", "gl_entry"))
+
+	fields = get_gl_entry_fields(filters, accounting_dimensions)
+	order_by = ", ".join(column for column, _key in sort_keys)
+	to_date = getdate(filters.to_date)
+	show_opening_entries = filters.get("show_opening_entries")
+	last_gle = None
+
+	while True:
+		keyset_condition, keyset_values = get_keyset_condition(sort_keys, last_gle)
+		gl_entries = frappe.db.sql(
+			f"""
+			select {fields}
+			from `tabGL Entry`
+			where company=%(company)s {conditions} and posting_date >= %(from_date)s {keyset_condition}
+			order by {order_by}
+			limit {GL_EXPORT_PAGE_SIZE}
+		""",
+			{**filters, **keyset_values},
+			as_dict=1,
+		)
+
+		if not gl_entries:
+			return
+
+		last_gle = gl_entries[-1]
+
+		if currency_info:
+			convert_to_presentation_currency(gl_entries, currency_info, account_currencies)
+
+		set_bill_no(gl_entries, {gle.against_voucher for gle in gl_entries if gle.against_voucher})
+
+		for gle in gl_entries:
+			# opening entries are part of the opening balances
+			if cstr(gle.is_opening) == "Yes" and not show_opening_entries:
+				continue
+
+			if gle.posting_date <= to_date or (cstr(gle.is_opening) == "Yes" and show_opening_entries):
+				gle.voucher_subtype = _(gle.voucher_subtype)
+				gle.against_voucher_type = _(gle.against_voucher_type)
+				gle.remarks = _(gle.remarks)
+				gle.party_type = _(gle.party_type)
+				yield gle
+
+		if len(gl_entries) < GL_EXPORT_PAGE_SIZE:
+			return
+
+
+def get_keyset_condition(sort_keys, last_gle):
+	"""Condition for rows after `last_gle` in the order of `sort_keys`, i.e. `(a, b) > (x, y)` written
+	as `a > x or (a = x and b > y)` as row value comparisons do not use indexes on all databases"""
+	if not last_gle:
+		return "", {}
+
+	conditions, values = [], {}
+	for idx, (column, key) in enumerate(sort_keys):
+		values[f"keyset_{idx}"] = last_gle.get(key) if last_gle.get(key) is not None else ""
+		preceding = [f"{sort_keys[i][0]} = %(keyset_{i})s" for i in range(idx)]
+		conditions.append("({})".format(" and ".join([*preceding, f"{column} > %(keyset_{idx})s"])))
+
+	return "and ({})".format(" or ".join(conditions)), values
+
+
+def consolidate_voucher_entries(gl_entries, filters, accounting_dimensions, update_value_in_dict):
+	"""Merge GL entries of a voucher like `get_accountwise_gle` does for Group by Voucher (Consolidated)"""
+	consolidated_gle = OrderedDict()
+	immutable_ledger = frappe.db.get_single_value("Accounts Settings", "enable_immutable_ledger")
+
+	for gle in gl_entries:
+		keylist = [
+			gle.get("posting_date"),
+			gle.get("voucher_type"),
+			gle.get("voucher_no"),
+			gle.get("account"),
+			gle.get("party_type"),
+			gle.get("party"),
+		]
+
+		if immutable_ledger:
+			keylist.append(gle.get("creation"))
+
+		if filters.get("include_dimensions"):
+			for dim in accounting_dimensions:
+				keylist.append(gle.get(dim))
+			keylist.append(gle.get("cost_center"))
+			keylist.append(gle.get("project"))
+
+		key = tuple(keylist)
+		if key not in consolidated_gle:
+			consolidated_gle.setdefault(key, gle)
+		else:
+			update_value_in_dict(consolidated_gle, key, gle)
+
+	return consolidated_gle.values()
@@ -1,13 +1,20 @@
 # Copyright (c) 2022, Frappe Technologies Pvt. Ltd. and Contributors
 # MIT License. See license.txt
 
+from unittest.mock import patch
+
 import frappe
 from frappe import qb
 from frappe.tests import IntegrationTestCase
-from frappe.utils import flt, today
+from frappe.utils import add_days, flt, today
 
 from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
-from erpnext.accounts.report.general_ledger.general_ledger import execute
+from erpnext.accounts.report.general_ledger.general_ledger import (
+	execute,
+	export_general_ledger,
+	get_streamed_rows,
+	prepare_filters,
+)
 from erpnext.controllers.sales_and_purchase_return import make_return_doc
 
 
@@ -332,3 +339,63 @@ class TestGeneralLedger(IntegrationTestCase):
 		)
 		actual = set([x.voucher_no for x in data if x.voucher_no])
 		self.assertEqual(expected, actual)
+
+	def get_streamed_rows(self, filters):
+		filters, _account_details = prepare_filters(frappe._dict(filters))
+		with patch("erpnext.accounts.report.general_ledger.general_ledger.GL_EXPORT_PAGE_SIZE", 2):
+			return list(get_streamed_rows(filters, []))
+
+	def test_streamed_rows(self):
+		create_sales_invoice(posting_date=add_days(today(), -2), rate=50)
+		for rate in (100, 200, 300):
+			create_sales_invoice(rate=rate)
+
+		for group_by in ("Group by Account", "Group by Party"):
+			filters = {
+				"company": self.company,
+				"from_date": today(),
+				"to_date": today(),
+				"group_by": group_by,
+			}
+			_columns, data = execute(frappe._dict(filters))
+			with self.subTest(group_by=group_by):
+				self.assertEqual(
+					[(d.get("account"), d.get("debit"), d.get("credit"), d.get("balance")) for d in data],
+					[
+						(d.get("account"), d.get("debit"), d.get("credit"), d.get("balance"))
+						for d in self.get_streamed_rows(filters)
+					],
+				)
+
+		# consolidated entries of a voucher are sorted differently, but add up to the same totals
+		filters = {
+			"company": self.company,
+			"from_date": today(),
+			"to_date": today(),
+			"group_by": "Group by Voucher (Consolidated)",
+		}
+		_columns, data = execute(frappe._dict(filters))
+		rows = self.get_streamed_rows(filters)
+		self.assertEqual(
+			sorted((d.get("voucher_no") or "", d.account, d.debit, d.credit) for d in data),
+			sorted((d.get("voucher_no") or "", d.account, d.debit, d.credit) for d in rows),
+		)
+		self.assertEqual([d.balance for d in data[-3:]], [d.balance for d in rows[-3:]])
+
+	def test_export_general_ledger(self):
+		si = create_sales_invoice(rate=100)
+
+		export_general_ledger(
+			frappe.as_json({"company": self.company, "from_date": today(), "to_date": today()}),
+			file_format="CSV",
+		)
+
+		file_url = frappe.get_all(
+			"File",
+			filters={"file_url": ("like", "/private/files/general_ledger_%.csv")},
+			pluck="file_url",
+			order_by="creation desc",
+			limit=1,
+		)[0]
+		with open(frappe.get_site_path(file_url.lstrip("/")), newline="") as file:
+			self.assertIn(si.name, file.read())
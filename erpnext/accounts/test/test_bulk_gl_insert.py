@@ -0,0 +1,130 @@
+from unittest.mock import patch
+
+import frappe
+from frappe.tests import IntegrationTestCase
+from frappe.utils import nowdate
+
+from erpnext.accounts.doctype.budget.test_budget import make_budget, set_total_expense_zero
+from erpnext.accounts.doctype.journal_entry.test_journal_entry import make_journal_entry
+from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+
+LEDGER_FIELDS = [
+	"posting_date",
+	"account",
+	"party_type",
+	"party",
+	"cost_center",
+	"debit",
+	"credit",
+	"debit_in_account_currency",
+	"credit_in_account_currency",
+	"account_currency",
+	"against",
+	"against_voucher_type",
+	"fiscal_year",
+	"is_opening",
+	"is_cancelled",
+]
+
+
+def get_ledger(voucher_type, voucher_no):
+	return frappe.get_all(
+		"GL Entry",
+		filters={"voucher_type": voucher_type, "voucher_no": voucher_no},
+		fields=LEDGER_FIELDS,
+		order_by="creation, account, debit, credit",
+		as_list=True,
+	)
+
+
+def make_multi_row_journal(amounts, submit=True):
+	"""Journal Entry with a debit and a credit row per amount"""
+	je = make_journal_entry(
+		"_Test Account Cost for Goods Sold - _TC", "_Test Bank - _TC", amounts[0], save=False
+	)
+
+	for idx, amount in enumerate(amounts[1:]):
+		cost_center = "_Test Cost Center 2 - _TC" if idx % 2 else "_Test Cost Center - _TC"
+		je.append(
+			"accounts",
+			{
+				"account": "_Test Account Cost for Goods Sold - _TC",
+				"cost_center": cost_center,
+				"debit_in_account_currency": amount,
+			},
+		)
+		je.append(
+			"accounts",
+			{"account": "_Test Bank - _TC", "cost_center": cost_center, "credit_in_account_currency": amount},
+		)
+
+	je.insert()
+	if submit:
+		je.submit()
+
+	return je
+
+
+def make_transactions():
+	je = make_multi_row_journal([100, 200, 300, 400])
+
+	si = create_sales_invoice(qty=5, rate=100, do_not_submit=True)
+	si.append("items", frappe._dict(si.items[0].as_dict(no_default_fields=True), qty=2, rate=50))
+	si.save()
+	si.submit()
+	si.reload()
+	si.cancel()
+
+	return je, si
+
+
+class TestBulkGLInsert(IntegrationTestCase):
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_bulk_insert_parity(self):
+		with self.change_settings(
+			"Accounts Settings", {"bulk_insert_gl_entries": 0, "merge_similar_account_heads": 0}
+		):
+			row_vouchers = make_transactions()
+
+		with self.change_settings(
+			"Accounts Settings", {"bulk_insert_gl_entries": 1, "merge_similar_account_heads": 0}
+		):
+			bulk_vouchers = make_transactions()
+
+		for row_voucher, bulk_voucher in zip(row_vouchers, bulk_vouchers, strict=True):
+			self.assertEqual(
+				get_ledger(row_voucher.doctype, row_voucher.name),
+				get_ledger(bulk_voucher.doctype, bulk_voucher.name),
+			)
+
+		self.assertEqual(
+			frappe.db.get_value("Sales Invoice", row_vouchers[1].name, ["outstanding_amount", "status"]),
+			frappe.db.get_value("Sales Invoice", bulk_vouchers[1].name, ["outstanding_amount", "status"]),
+		)
+
+	def test_bulk_insert_frozen_account(self):
+		frappe.db.set_value("Account", "_Test Bank - _TC", "freeze_account", "Yes")
+		frappe.db.set_single_value("Accounts Settings", "frozen_accounts_modifier", None)
+		frappe.clear_cache()
+
+		with self.change_settings("Accounts Settings", {"bulk_insert_gl_entries": 1}):
+			je = make_multi_row_journal([100, 200], submit=False)
+			self.assertRaises(frappe.ValidationError, je.submit)
+
+		self.assertFalse(frappe.db.exists("GL Entry", {"voucher_no": je.name}))
+
+	def test_bulk_insert_skipped_with_budget(self):
+		set_total_expense_zero(nowdate(), "cost_center")
+		make_budget(budget_against="Cost Center")
+
+		# budgets are checked entry by entry against the entries inserted so far
+		with (
+			self.change_settings("Accounts Settings", {"bulk_insert_gl_entries": 1}),
+			patch("erpnext.accounts.general_ledger.make_entries_in_bulk") as make_entries_in_bulk,
+		):
+			je = make_multi_row_journal([100, 200])
+
+		make_entries_in_bulk.assert_not_called()
+		self.assertTrue(frappe.db.exists("GL Entry", {"voucher_no": je.name}))
@@ -0,0 +1,134 @@
+import frappe
+from frappe.tests import IntegrationTestCase
+from frappe.utils import add_months, getdate, today
+
+from erpnext.accounts.doctype.journal_entry.test_journal_entry import make_journal_entry
+from erpnext.accounts.report.financial_statements import (
+	accumulate_values_into_parents,
+	calculate_values,
+	filter_accounts,
+	get_accounts,
+	get_period_list,
+	set_gl_entries_by_account,
+)
+from erpnext.accounts.utils import get_fiscal_year
+
+COMPANY = "_Test Company"
+
+
+def get_filters(periodicity="Monthly", accumulated_values=0):
+	fiscal_year = get_fiscal_year(today(), company=COMPANY, as_dict=True)
+	return frappe._dict(
+		company=COMPANY,
+		from_fiscal_year=fiscal_year.name,
+		to_fiscal_year=fiscal_year.name,
+		period_start_date=fiscal_year.year_start_date,
+		period_end_date=fiscal_year.year_end_date,
+		filter_based_on="Fiscal Year",
+		periodicity=periodicity,
+		accumulated_values=accumulated_values,
+		fiscal_year=fiscal_year.name,
+		from_date=fiscal_year.year_start_date,
+		to_date=fiscal_year.year_end_date,
+	)
+
+
+def get_account_values(filters, root_type, only_current_fiscal_year, aggregate):
+	period_list = get_period_list(
+		filters.from_fiscal_year,
+		filters.to_fiscal_year,
+		filters.period_start_date,
+		filters.period_end_date,
+		filters.filter_based_on,
+		filters.periodicity,
+		company=filters.company,
+	)
+	accounts, accounts_by_name, _parent_children_map = filter_accounts(get_accounts(COMPANY, root_type))
+
+	gl_entries_by_account = set_gl_entries_by_account(
+		COMPANY,
+		period_list[0]["year_start_date"] if only_current_fiscal_year else None,
+		period_list[-1]["to_date"],
+		filters,
+		{},
+		root_type=root_type,
+		period_list=period_list if aggregate else None,
+	)
+	calculate_values(accounts_by_name, gl_entries_by_account, period_list, filters.accumulated_values, False)
+
+	keys = [period.key for period in period_list] + ["opening_balance"]
+	return {d.name: [round(d.get(key, 0.0), 2) for key in keys] for d in accounts}
+
+
+class TestFinancialStatements(IntegrationTestCase):
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_period_aggregation_parity(self):
+		"""Values computed from GL entries aggregated per period match the ones from raw GL entries"""
+		year_start_date = getdate(get_filters().period_start_date)
+		for months, amount in ((-1, 100), (0, 200), (1, 300), (5, 400)):
+			make_journal_entry(
+				"_Test Account Cost for Goods Sold - _TC",
+				"_Test Bank - _TC",
+				amount,
+				posting_date=add_months(year_start_date, months),
+				submit=True,
+			)
+
+		for periodicity in ("Monthly", "Quarterly", "Yearly"):
+			for accumulated_values in (0, 1):
+				filters = get_filters(periodicity, accumulated_values)
+				for root_type, only_current_fiscal_year in (("Expense", True), ("Asset", False)):
+					with self.subTest(
+						periodicity=periodicity, accumulated_values=accumulated_values, root_type=root_type
+					):
+						self.assertEqual(
+							get_account_values(filters, root_type, only_current_fiscal_year, aggregate=False),
+							get_account_values(filters, root_type, only_current_fiscal_year, aggregate=True),
+						)
+
+	def test_accumulate_values_into_parents(self):
+		accounts = [
+			frappe._dict(name=name, parent_account=parent, root_type=root_type, report_type=report_type)
+			for name, parent, root_type, report_type in (
+				("Expenses", None, "Expense", "Profit and Loss"),
+				("Indirect Expenses", "Expenses", "Expense", "Profit and Loss"),
+				("Rent", "Indirect Expenses", "Expense", "Profit and Loss"),
+				("Assets", None, "Asset", "Balance Sheet"),
+				("Bank", "Assets", "Asset", "Balance Sheet"),
+				("Cash", "Assets", "Asset", "Balance Sheet"),
+				("Direct Expenses", "Expenses", "Expense", "Profit and Loss"),
+			)
+		]
+		accounts, accounts_by_name, _parent_children_map = filter_accounts(accounts)
+		self.assertEqual(
+			[(d.name, d.indent) for d in accounts],
+			[
+				("Assets", 0),
+				("Bank", 1),
+				("Cash", 1),
+				("Expenses", 0),
+				("Direct Expenses", 1),
+				("Indirect Expenses", 1),
+				("Rent", 2),
+			],
+		)
+
+		for name, value in (("Rent", 10), ("Direct Expenses", 5), ("Bank", 7), ("Cash", 3)):
+			accounts_by_name[name].update({"jan_2026": value, "opening_balance": value * 2})
+
+		accumulate_values_into_parents(accounts, accounts_by_name, [frappe._dict(key="jan_2026")])
+
+		self.assertEqual(
+			{d.name: (d.jan_2026, d.opening_balance) for d in accounts},
+			{
+				"Assets": (10, 20),
+				"Bank": (7, 14),
+				"Cash": (3, 6),
+				"Expenses": (15, 30),
+				"Direct Expenses": (5, 10),
+				"Indirect Expenses": (10, 20),
+				"Rent": (10, 20),
+			},
+		)
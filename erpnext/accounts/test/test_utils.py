@@ -3,6 +3,7 @@ import unittest
 import frappe
 from frappe.test_runner import make_test_objects
 from frappe.tests import IntegrationTestCase
+from frappe.utils import add_days, nowdate
 
 from erpnext.accounts.doctype.payment_entry.payment_entry import get_payment_entry
 from erpnext.accounts.doctype.purchase_invoice.test_purchase_invoice import make_purchase_invoice
@@ -12,6 +13,8 @@ from erpnext.accounts.utils import (
 	get_voucherwise_gl_entries,
 	sort_stock_vouchers_by_posting_date,
 )
+from erpnext.stock import get_warehouse_account_map
+from erpnext.stock.doctype.delivery_note.test_delivery_note import create_delivery_note
 from erpnext.stock.doctype.item.test_item import make_item
 from erpnext.stock.doctype.purchase_receipt.test_purchase_receipt import make_purchase_receipt
 from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
@@ -79,6 +82,53 @@ class TestUtils(IntegrationTestCase):
 		sorted_vouchers = sort_stock_vouchers_by_posting_date(list(reversed(vouchers)))
 		self.assertEqual(sorted_vouchers, vouchers)
 
+	@IntegrationTestCase.change_settings("Stock Reposting Settings", {"repost_changed_gl_entries_only": 1})
+	def test_repost_changed_gl_entries_only(self):
+		company = "_Test Company with perpetual inventory"
+		warehouse = "Stores - TCP1"
+		stock_account = get_warehouse_account_map(company)[warehouse].account
+		item = make_item(properties={"is_stock_item": 1, "valuation_method": "Moving Average"}).name
+
+		make_stock_entry(
+			item_code=item, target=warehouse, qty=10, rate=100, posting_date=add_days(nowdate(), -3)
+		)
+		dn = create_delivery_note(
+			item_code=item,
+			company=company,
+			warehouse=warehouse,
+			qty=5,
+			rate=300,
+			cost_center="Main - TCP1",
+			expense_account="Cost of Goods Sold - TCP1",
+			posting_date=add_days(nowdate(), -1),
+		)
+
+		def get_gl_entries():
+			return frappe.get_all(
+				"GL Entry",
+				filters={"voucher_type": dn.doctype, "voucher_no": dn.name, "is_cancelled": 0},
+				fields=["name", "account", "debit", "credit"],
+				order_by="account",
+			)
+
+		gl_entries = get_gl_entries()
+		self.assertEqual(
+			{row.account: (row.debit, row.credit) for row in gl_entries},
+			{stock_account: (0, 500), "Cost of Goods Sold - TCP1": (500, 0)},
+		)
+
+		# backdated receipt at a higher rate raises the outgoing rate of the delivery note
+		make_stock_entry(
+			item_code=item, target=warehouse, qty=10, rate=200, posting_date=add_days(nowdate(), -2)
+		)
+
+		patched_gl_entries = get_gl_entries()
+		self.assertEqual([row.name for row in patched_gl_entries], [row.name for row in gl_entries])
+		self.assertEqual(
+			{row.account: (row.debit, row.credit) for row in patched_gl_entries},
+			{stock_account: (0, 750), "Cost of Goods Sold - TCP1": (750, 0)},
+		)
+
 	def test_update_reference_in_payment_entry(self):
 		item = make_item().name
 
@@ -129,6 +179,58 @@ class TestUtils(IntegrationTestCase):
 		self.assertEqual(len(payment_entry.references), 1)
 		self.assertEqual(payment_entry.difference_amount, 0)
 
+	def test_reconcile_allocations_per_payment(self):
+		"""Allocations of a payment to several invoices are reconciled in one batch"""
+		from erpnext.accounts.doctype.payment_entry.test_payment_entry import create_payment_entry
+		from erpnext.accounts.doctype.payment_ledger_outstanding.payment_ledger_outstanding import (
+			check_payment_ledger_outstanding,
+		)
+		from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+
+		invoices = [create_sales_invoice(qty=1, rate=200).name for _ in range(2)]
+		payment_entry = create_payment_entry(
+			payment_type="Receive",
+			party_type="Customer",
+			party="_Test Customer",
+			paid_from="Debtors - _TC",
+			paid_to="_Test Bank - _TC",
+			paid_amount=500,
+			save=True,
+			submit=True,
+		)
+
+		payment_reconciliation = frappe.new_doc("Payment Reconciliation")
+		payment_reconciliation.company = payment_entry.company
+		payment_reconciliation.party_type = "Customer"
+		payment_reconciliation.party = "_Test Customer"
+		payment_reconciliation.receivable_payable_account = "Debtors - _TC"
+		payment_reconciliation.get_unreconciled_entries()
+		payment_reconciliation.allocate_entries(
+			{
+				"payments": [
+					d.__dict__
+					for d in payment_reconciliation.payments
+					if d.reference_name == payment_entry.name
+				],
+				"invoices": [
+					d.__dict__ for d in payment_reconciliation.invoices if d.invoice_number in invoices
+				],
+			}
+		)
+		payment_reconciliation.reconcile()
+
+		payment_entry.load_from_db()
+		self.assertEqual(
+			sorted((d.reference_name, d.allocated_amount) for d in payment_entry.references),
+			sorted((name, 200) for name in invoices),
+		)
+		self.assertEqual(payment_entry.unallocated_amount, 100)
+		for name in invoices:
+			self.assertEqual(frappe.db.get_value("Sales Invoice", name, "outstanding_amount"), 0)
+
+		mismatches = check_payment_ledger_outstanding(payment_entry.company, repair=False)
+		self.assertFalse([row for row in mismatches if row.voucher_no in [*invoices, payment_entry.name]])
+
 	def test_naming_series_variable_parsing(self):
 		"""
 		Tests parsing utility used by Naming Series Variable hook for FY
@@ -10,8 +10,7 @@ import frappe.defaults
 from frappe import _, qb, throw
 from frappe.model.meta import get_field_precision
 from frappe.query_builder import AliasedQuery, Case, Criterion, Table
-from frappe.query_builder.functions import Count, Max, Round, Sum
-from frappe.query_builder.utils import DocType
+from frappe.query_builder.functions import Count, Max, Sum
 from frappe.utils import (
 	add_days,
 	cint,
@@ -25,15 +24,27 @@ from frappe.utils import (
 	now,
 	nowdate,
 )
-from pypika import Order
-from pypika.terms import ExistsCriterion
 
 import erpnext
 
 # imported to enable erpnext.accounts.utils.get_account_currency
 from erpnext.accounts.doctype.account.account import get_account_currency
+from erpnext.accounts.doctype.account_balance_snapshot.account_balance_snapshot import (
+	get_balance_from_snapshot,
+	get_snapshot_date,
+	update_account_balance_snapshots,
+)
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import get_dimensions
+from erpnext.accounts.doctype.payment_ledger_outstanding.payment_ledger_outstanding import (
+	SUMMARY_FIELDS,
+	check_payment_ledger_outstanding,
+	delete_payment_ledger_entries,
+	get_payment_ledger_amounts,
+	update_payment_ledger_outstanding,
+)
+from erpnext.accounts.period_resolver import get_period_resolver
 from erpnext.stock import get_warehouse_account_map
+from erpnext.stock.reposting_metrics import increment_counter, track_phase, update_reposting_progress
 from erpnext.stock.utils import get_stock_value_on
 
 if TYPE_CHECKING:
@@ -50,6 +61,11 @@ class PaymentEntryUnlinkError(frappe.ValidationError):
 
 GL_REPOSTING_CHUNK = 100
 
+# Voucher types whose GL entries are built by `StockController.get_gl_entries` alone: a stock account
+# row and an offset row per stock ledger entry. Their GL entries can be patched in place from the
+# stock value difference of the stock ledger entries instead of being regenerated.
+GL_PATCHABLE_VOUCHER_TYPES = ("Delivery Note", "Stock Reconciliation")
+
 
 @frappe.whitelist()
 def get_fiscal_year(
@@ -93,22 +109,15 @@ def get_fiscal_years(
 	if boolean is not None:
 		raise_on_missing = not boolean
 
-	all_fiscal_years = _get_fiscal_years(company=company)
-
 	# No restricting selectors
 	if not transaction_date and not fiscal_year:
-		return all_fiscal_years
-
-	for fy in all_fiscal_years:
-		if (fiscal_year and fy.name == fiscal_year) or (
-			transaction_date
-			and getdate(fy.year_start_date) <= transaction_date
-			and getdate(fy.year_end_date) >= transaction_date
-		):
-			if as_dict:
-				return (fy,)
-			else:
-				return ((fy.name, fy.year_start_date, fy.year_end_date),)
+		return _get_fiscal_years(company=company)
+
+	if fy := get_period_resolver().find_fiscal_year(transaction_date, fiscal_year, company):
+		if as_dict:
+			return (frappe._dict(fy),)
+		else:
+			return ((fy.name, fy.year_start_date, fy.year_end_date),)
 
 	# No match for restricting selectors
 	if raise_on_missing:
@@ -126,33 +135,7 @@ def get_fiscal_years(
 
 
 def _get_fiscal_years(company=None):
-	fiscal_years = frappe.cache().hget("fiscal_years", company) or []
-
-	if not fiscal_years:
-		# if year start date is 2012-04-01, year end date should be 2013-03-31 (hence subdate)
-		FY = DocType("Fiscal Year")
-
-		query = (
-			frappe.qb.from_(FY).select(FY.name, FY.year_start_date, FY.year_end_date).where(FY.disabled == 0)
-		)
-
-		if company:
-			FYC = DocType("Fiscal Year Company")
-			query = query.where(
-				ExistsCriterion(frappe.qb.from_(FYC).select(FYC.name).where(FYC.parent == FY.name)).negate()
-				| ExistsCriterion(
-					frappe.qb.from_(FYC)
-					.select(FYC.company)
-					.where(FYC.parent == FY.name)
-					.where(FYC.company == company)
-				)
-			)
-
-		query = query.orderby(FY.year_start_date, order=Order.desc)
-		fiscal_years = query.run(as_dict=True)
-
-		frappe.cache().hset("fiscal_years", company, fiscal_years)
-	return fiscal_years
+	return [frappe._dict(fy) for fy in get_period_resolver().get_fiscal_years(company).fiscal_years]
 
 
 @frappe.whitelist()
@@ -207,6 +190,9 @@ def get_balance_on(
 		cost_center = frappe.form_dict.get("cost_center")
 
 	cond = ["is_cancelled=0"]
+	# filters on the account, cost center, party and company, valid for the GL and its snapshots
+	filters = []
+	to_date = date
 	if start_date:
 		cond.append("posting_date >= %s" % frappe.db.escape(cstr(start_date)))
 	if date:
@@ -238,7 +224,7 @@ def get_balance_on(
 	if cost_center and report_type == "Profit and Loss":
 		cc = frappe.get_doc("Cost Center", cost_center)
 		if cc.is_group:
-			cond.append(
+			filters.append(
 				f""" exists (
 				select 1 from `tabCost Center` cc where cc.name = gle.cost_center
 				and cc.lft >= {cc.lft} and cc.rgt <= {cc.rgt}
@@ -246,7 +232,7 @@ def get_balance_on(
 			)
 
 		else:
-			cond.append(f"""gle.cost_center = {frappe.db.escape(cost_center)} """)
+			filters.append(f"""gle.cost_center = {frappe.db.escape(cost_center)} """)
 
 	if account:
 		if not (frappe.flags.ignore_account_permission or ignore_account_permission):
@@ -254,7 +240,7 @@ def get_balance_on(
 
 		# different filter for group and ledger - improved performance
 		if acc.is_group:
-			cond.append(
+			filters.append(
 				f"""exists (
 				select name from `tabAccount` ac where ac.name = gle.account
 				and ac.lft >= {acc.lft} and ac.rgt <= {acc.rgt}
@@ -266,7 +252,7 @@ def get_balance_on(
 			if acc.account_currency == frappe.get_cached_value("Company", acc.company, "default_currency"):
 				in_account_currency = False
 		else:
-			cond.append(f"""gle.account = {frappe.db.escape(account)} """)
+			filters.append(f"""gle.account = {frappe.db.escape(account)} """)
 
 	if account_type:
 		accounts = frappe.db.get_all(
@@ -276,7 +262,7 @@ def get_balance_on(
 			order_by="lft",
 		)
 
-		cond.append(
+		filters.append(
 			"""
 			gle.account in (%s)
 		"""
@@ -284,14 +270,21 @@ def get_balance_on(
 		)
 
 	if party_type and party:
-		cond.append(
+		filters.append(
 			f"""gle.party_type = {frappe.db.escape(party_type)} and gle.party = {frappe.db.escape(party)} """
 		)
 
 	if company:
-		cond.append("""gle.company = %s """ % (frappe.db.escape(company)))
+		filters.append("""gle.company = %s """ % (frappe.db.escape(company)))
 
 	if account or (party_type and party) or account_type:
+		if (snapshot_company := company or (account and acc.company)) and (
+			balance := get_balance_from_snapshot(
+				snapshot_company, filters, to_date, start_date, in_account_currency=in_account_currency
+			)
+		) is not None:
+			return balance
+
 		precision = get_currency_precision()
 		if in_account_currency:
 			select_field = (
@@ -304,7 +297,7 @@ def get_balance_on(
 			"""
 			SELECT {}
 			FROM `tabGL Entry` gle
-			WHERE {}""".format(select_field, " and ".join(cond)),
+			WHERE {}""".format(select_field, " and ".join(cond + filters)),
 			(precision, precision),
 		)[0][0]
 		# if bal is None, return 0
@@ -469,22 +462,33 @@ def reconcile_against_document(
 ):  # nosemgrep
 	"""
 	Cancel PE or JV, Update against document, split if required and resubmit
+
+	Allocations are grouped per advance voucher, each voucher is saved and reposted once.
+	Exchange gain/loss journals and outstanding of the referenced vouchers are updated
+	once for the whole batch.
 	"""
 	# To optimize making GL Entry for PE or JV with multiple references
 	reconciled_entries = {}
 	for row in args:
-		if not reconciled_entries.get((row.voucher_type, row.voucher_no)):
-			reconciled_entries[(row.voucher_type, row.voucher_no)] = []
+		reconciled_entries.setdefault((row.voucher_type, row.voucher_no), []).append(row)
 
-		reconciled_entries[(row.voucher_type, row.voucher_no)].append(row)
+	frappe.flags.ignore_party_validation = True
 
-	for key, entries in reconciled_entries.items():
-		voucher_type = key[0]
-		voucher_no = key[1]
+	docs = {key: frappe.get_doc(*key) for key in reconciled_entries}
+	delete_reconciled_pl_entries(
+		[
+			key
+			for key, doc in docs.items()
+			if not (key[0] == "Payment Entry" and doc.book_advance_payments_in_separate_party_account)
+		]
+	)
 
-		# cancel advance entry
-		doc = frappe.get_doc(voucher_type, voucher_no)
-		frappe.flags.ignore_party_validation = True
+	gain_loss_entries = []
+	vouchers_to_update = {}
+	update_advance_paid = {}
+	for key, entries in reconciled_entries.items():
+		voucher_type, voucher_no = key
+		doc = docs[key]
 
 		# When Advance is allocated from an Order to an Invoice
 		# whole ledger must be reposted
@@ -494,37 +498,30 @@ def reconcile_against_document(
 				doc.make_gl_entries(cancel=1)
 			else:
 				doc.make_advance_gl_entries(cancel=1)
-		else:
-			_delete_pl_entries(voucher_type, voucher_no)
 
+		check_if_advance_entries_modified(entries)
 		for entry in entries:
-			check_if_advance_entry_modified(entry)
 			validate_allocated_amount(entry)
 
-			dimensions_dict = _build_dimensions_dict_for_exc_gain_loss(entry, active_dimensions)
-
-			# update ref in advance entry
-			if voucher_type == "Journal Entry":
-				referenced_row, update_advance_paid = update_reference_in_journal_entry(
-					entry, doc, do_not_save=False
-				)
-				# advance section in sales/purchase invoice and reconciliation tool,both pass on exchange gain/loss
-				# amount and account in args
-				# referenced_row is used to deduplicate gain/loss journal
-				entry.update({"referenced_row": referenced_row})
-				doc.make_exchange_gain_loss_journal([entry], dimensions_dict)
-			else:
-				referenced_row, update_advance_paid = update_reference_in_payment_entry(
-					entry,
-					doc,
-					do_not_save=True,
-					skip_ref_details_update_for_pe=skip_ref_details_update_for_pe,
-					dimensions_dict=dimensions_dict,
+		# update ref in advance entry
+		if voucher_type == "Journal Entry":
+			referenced_rows = []
+			for entry in entries:
+				_referenced_row, advance_paid = update_reference_in_journal_entry(
+					entry, doc, do_not_save=True
 				)
+				# row with the reference is appended last, its name is set on save
+				referenced_rows.append(doc.accounts[-1])
+				update_advance_paid.update(dict.fromkeys(advance_paid))
+		else:
+			referenced_rows, advance_paid = update_references_in_payment_entry(
+				entries, doc, skip_ref_details_update_for_pe=skip_ref_details_update_for_pe
+			)
+			update_advance_paid.update(dict.fromkeys(advance_paid))
 
 		doc.save(ignore_permissions=True)
 		# re-submit advance entry
-		doc = frappe.get_doc(entry.voucher_type, entry.voucher_no)
+		doc = frappe.get_doc(voucher_type, voucher_no)
 
 		if voucher_type == "Payment Entry" and doc.book_advance_payments_in_separate_party_account:
 			# When Advance is allocated from an Order to an Invoice
@@ -543,21 +540,87 @@ def reconcile_against_document(
 			process_debit_credit_difference(gl_map)
 			create_payment_ledger_entry(gl_map, update_outstanding="No", cancel=0, adv_adj=1)
 
-		# Only update outstanding for newly linked vouchers
-		for entry in entries:
-			update_voucher_outstanding(
-				entry.against_voucher_type,
-				entry.against_voucher,
-				entry.account,
-				entry.party_type,
-				entry.party,
+		for entry, referenced_row in zip(entries, referenced_rows, strict=True):
+			# referenced_row is used to deduplicate gain/loss journal
+			if voucher_type == "Journal Entry":
+				entry.update({"referenced_row": referenced_row.name})
+
+			gain_loss_entries.append(
+				(
+					doc,
+					entry,
+					referenced_row.name,
+					_build_dimensions_dict_for_exc_gain_loss(entry, active_dimensions),
+				)
 			)
-		# update advance paid in Advance Receivable/Payable doctypes
-		if update_advance_paid:
-			for t, n in update_advance_paid:
-				frappe.get_doc(t, n).set_total_advance_paid()
 
-		frappe.flags.ignore_party_validation = False
+			vouchers_to_update.setdefault(
+				(
+					entry.against_voucher_type,
+					entry.against_voucher,
+					entry.account,
+					entry.party_type,
+					entry.party,
+				)
+			)
+
+	make_reconciliation_gain_loss_journals(gain_loss_entries)
+
+	# Only update outstanding for newly linked vouchers
+	for voucher in vouchers_to_update:
+		update_voucher_outstanding(*voucher)
+
+	# update advance paid in Advance Receivable/Payable doctypes
+	for t, n in update_advance_paid:
+		frappe.get_doc(t, n).set_total_advance_paid()
+
+	frappe.flags.ignore_party_validation = False
+
+
+def delete_reconciled_pl_entries(vouchers):
+	"""Delete Payment Ledger Entries of the advance vouchers being reconciled, one query per voucher type"""
+	if not vouchers:
+		return
+
+	voucher_nos = {}
+	for voucher_type, voucher_no in vouchers:
+		voucher_nos.setdefault(voucher_type, []).append(voucher_no)
+
+	ple = qb.DocType("Payment Ledger Entry")
+	delete_payment_ledger_entries(
+		Criterion.any(
+			(ple.voucher_type == voucher_type) & ple.voucher_no.isin(names)
+			for voucher_type, names in voucher_nos.items()
+		)
+	)
+
+
+def make_reconciliation_gain_loss_journals(gain_loss_entries):
+	"""
+	Book exchange gain/loss of reconciled allocations in one pass, with a call per advance voucher,
+	posting date and accounting dimensions.
+
+	gain_loss_entries - list of (advance voucher, allocation, referenced row name, dimensions)
+	"""
+	groups = {}
+	for doc, entry, referenced_row, dimensions_dict in gain_loss_entries:
+		group = groups.setdefault(
+			(doc.doctype, doc.name, entry.difference_posting_date, tuple(dimensions_dict.items())),
+			frappe._dict(doc=doc, dimensions_dict=dimensions_dict, entries=[], references=[]),
+		)
+		group.entries.append(entry)
+		group.references.append(referenced_row)
+
+	for (_voucher_type, _voucher_no, posting_date, _dimensions), group in groups.items():
+		if group.doc.doctype == "Journal Entry":
+			# advance section in sales/purchase invoice and reconciliation tool,both pass on exchange gain/loss
+			# amount and account in args
+			group.doc.make_exchange_gain_loss_journal(group.entries, group.dimensions_dict)
+		else:
+			group.doc.make_exchange_gain_loss_journal(
+				frappe._dict({"difference_posting_date": posting_date, "references": group.references}),
+				group.dimensions_dict,
+			)
 
 
 def check_if_advance_entry_modified(args):
@@ -566,65 +629,88 @@ def check_if_advance_entry_modified(args):
 	check if amount is same
 	check if jv is submitted
 	"""
-	if not args.get("unreconciled_amount"):
-		args.update({"unreconciled_amount": args.get("unadjusted_amount")})
+	check_if_advance_entries_modified([args])
+
 
-	ret = None
-	if args.voucher_type == "Journal Entry":
+def check_if_advance_entries_modified(entries):
+	"""
+	`check_if_advance_entry_modified` for allocations of the same advance voucher, with a single query
+	"""
+	for args in entries:
+		if not args.get("unreconciled_amount"):
+			args.update({"unreconciled_amount": args.get("unadjusted_amount")})
+
+	voucher_type, voucher_no = entries[0].voucher_type, entries[0].voucher_no
+	voucher_detail_nos = [args.get("voucher_detail_no") for args in entries]
+
+	if voucher_type == "Journal Entry":
 		journal_entry = frappe.qb.DocType("Journal Entry")
 		journal_acc = frappe.qb.DocType("Journal Entry Account")
 
-		q = (
+		rows = (
 			frappe.qb.from_(journal_entry)
 			.inner_join(journal_acc)
 			.on(journal_entry.name == journal_acc.parent)
-			.select(journal_acc[args.get("dr_or_cr")])
+			.select(journal_acc.name, journal_acc.account, journal_acc.party_type, journal_acc.party)
 			.where(
-				(journal_acc.account == args.get("account"))
-				& (journal_acc.party_type == args.get("party_type"))
-				& (journal_acc.party == args.get("party"))
-				& (
+				(
 					(journal_acc.reference_type.isnull())
 					| (journal_acc.reference_type.isin(["", "Sales Order", "Purchase Order"]))
 				)
-				& (journal_entry.name == args.get("voucher_no"))
-				& (journal_acc.name == args.get("voucher_detail_no"))
+				& (journal_entry.name == voucher_no)
+				& (journal_acc.name.isin(voucher_detail_nos))
 				& (journal_entry.docstatus == 1)
 			)
+		).run(as_dict=True)
+		rows = {row.name: row for row in rows}
+
+		modified = any(
+			not (row := rows.get(args.get("voucher_detail_no")))
+			or (row.account, row.party_type, row.party)
+			!= (args.get("account"), args.get("party_type"), args.get("party"))
+			for args in entries
 		)
 
 	else:
 		precision = frappe.get_precision("Payment Entry", "unallocated_amount")
 
-		payment_entry = frappe.qb.DocType("Payment Entry")
-		payment_ref = frappe.qb.DocType("Payment Entry Reference")
-
-		q = (
-			frappe.qb.from_(payment_entry)
-			.select(payment_entry.name)
-			.where(payment_entry.name == args.get("voucher_no"))
-			.where(payment_entry.docstatus == 1)
-			.where(payment_entry.party_type == args.get("party_type"))
-			.where(payment_entry.party == args.get("party"))
+		payment_entry = frappe.db.get_value(
+			"Payment Entry",
+			{"name": voucher_no, "docstatus": 1},
+			["party_type", "party", "unallocated_amount"],
+			as_dict=True,
 		)
 
-		if args.voucher_detail_no:
-			q = (
-				q.inner_join(payment_ref)
-				.on(payment_entry.name == payment_ref.parent)
-				.where(payment_ref.name == args.get("voucher_detail_no"))
-				.where(payment_ref.reference_doctype.isin(("", "Sales Order", "Purchase Order")))
-				.where(payment_ref.allocated_amount == args.get("unreconciled_amount"))
+		references = {}
+		if any(voucher_detail_nos):
+			payment_ref = frappe.qb.DocType("Payment Entry Reference")
+			references = dict(
+				frappe.qb.from_(payment_ref)
+				.select(payment_ref.name, payment_ref.allocated_amount)
+				.where(
+					(payment_ref.parent == voucher_no)
+					& (payment_ref.name.isin([x for x in voucher_detail_nos if x]))
+					& (payment_ref.reference_doctype.isin(("", "Sales Order", "Purchase Order")))
+				)
+				.run()
 			)
-		else:
-			q = q.where(
-				Round(payment_entry.unallocated_amount, precision)
-				== Round(args.get("unreconciled_amount"), precision)
+
+		def is_modified(args):
+			if (payment_entry.party_type, payment_entry.party) != (args.get("party_type"), args.get("party")):
+				return True
+
+			if args.voucher_detail_no:
+				return args.voucher_detail_no not in references or flt(
+					references[args.voucher_detail_no]
+				) != flt(args.get("unreconciled_amount"))
+
+			return flt(payment_entry.unallocated_amount, precision) != flt(
+				args.get("unreconciled_amount"), precision
 			)
 
-	ret = q.run(as_dict=True)
+		modified = not payment_entry or any(is_modified(args) for args in entries)
 
-	if not ret:
+	if modified:
 		throw(_("""Payment Entry has been modified after you pulled it. Please pull it again."""))
 
 
@@ -715,6 +801,62 @@ def update_reference_in_journal_entry(d, journal_entry, do_not_save=False):
 def update_reference_in_payment_entry(
 	d, payment_entry, do_not_save=False, skip_ref_details_update_for_pe=False, dimensions_dict=None
 ):
+	rows, update_advance_paid = update_references_in_payment_entry(
+		[d], payment_entry, skip_ref_details_update_for_pe=skip_ref_details_update_for_pe
+	)
+
+	payment_entry.make_exchange_gain_loss_journal(
+		frappe._dict({"difference_posting_date": d.difference_posting_date}), dimensions_dict
+	)
+
+	if not do_not_save:
+		payment_entry.save(ignore_permissions=True)
+	return rows[0], update_advance_paid
+
+
+def update_references_in_payment_entry(entries, payment_entry, skip_ref_details_update_for_pe=False):
+	"""
+	Add references of all allocations to the payment entry and update its amounts once.
+	Returns the referenced rows, in the order of `entries`, and the advance paid to update.
+	"""
+	rows = []
+	update_advance_paid = []
+	for d in entries:
+		row, advance_paid = add_reference_in_payment_entry(d, payment_entry)
+		rows.append(row)
+		update_advance_paid.extend(advance_paid)
+
+	payment_entry.flags.ignore_validate_update_after_submit = True
+	payment_entry.clear_unallocated_reference_document_rows()
+	payment_entry.setup_party_account_field()
+	payment_entry.set_missing_values()
+	if not skip_ref_details_update_for_pe:
+		update_ref_details_only_for = []
+		for d in entries:
+			if d.against_voucher_type == "Journal Entry" and d.exchange_rate:
+				payment_entry.set_missing_ref_details(
+					update_ref_details_only_for=[(d.against_voucher_type, d.against_voucher)],
+					reference_exchange_details=frappe._dict(
+						{
+							"reference_doctype": d.against_voucher_type,
+							"reference_name": d.against_voucher,
+							"exchange_rate": d.exchange_rate,
+						}
+					),
+				)
+			else:
+				update_ref_details_only_for.append((d.against_voucher_type, d.against_voucher))
+
+		if update_ref_details_only_for:
+			payment_entry.set_missing_ref_details(update_ref_details_only_for=update_ref_details_only_for)
+	payment_entry.set_amounts()
+
+	# Ledgers will be reposted by Reconciliation tool
+	payment_entry.flags.ignore_reposting_on_reconciliation = True
+	return rows, update_advance_paid
+
+
+def add_reference_in_payment_entry(d, payment_entry):
 	reference_details = {
 		"reference_doctype": d.against_voucher_type,
 		"reference_name": d.against_voucher,
@@ -771,34 +913,6 @@ def update_reference_in_payment_entry(
 		new_row.update(reference_details)
 		row = new_row
 
-	payment_entry.flags.ignore_validate_update_after_submit = True
-	payment_entry.clear_unallocated_reference_document_rows()
-	payment_entry.setup_party_account_field()
-	payment_entry.set_missing_values()
-	if not skip_ref_details_update_for_pe:
-		reference_exchange_details = frappe._dict()
-		if d.against_voucher_type == "Journal Entry" and d.exchange_rate:
-			reference_exchange_details.update(
-				{
-					"reference_doctype": d.against_voucher_type,
-					"reference_name": d.against_voucher,
-					"exchange_rate": d.exchange_rate,
-				}
-			)
-		payment_entry.set_missing_ref_details(
-			update_ref_details_only_for=[(d.against_voucher_type, d.against_voucher)],
-			reference_exchange_details=reference_exchange_details,
-		)
-	payment_entry.set_amounts()
-
-	payment_entry.make_exchange_gain_loss_journal(
-		frappe._dict({"difference_posting_date": d.difference_posting_date}), dimensions_dict
-	)
-
-	# Ledgers will be reposted by Reconciliation tool
-	payment_entry.flags.ignore_reposting_on_reconciliation = True
-	if not do_not_save:
-		payment_entry.save(ignore_permissions=True)
 	return row, update_advance_paid
 
 
@@ -939,20 +1053,28 @@ def update_accounting_ledgers_after_reference_removal(
 
 	# Payment Ledger
 	ple = qb.DocType("Payment Ledger Entry")
-	ple_update_query = (
+	criterion = (
+		(ple.against_voucher_type == ref_type) & (ple.against_voucher_no == ref_no) & (ple.delinked == 0)
+	)
+	if payment_name:
+		criterion &= ple.voucher_no == payment_name
+
+	# entries move from the outstanding of the reference to the outstanding of their own voucher
+	unlinked_entries = get_payment_ledger_amounts(criterion, group_by_voucher=True)
+	update_payment_ledger_outstanding(unlinked_entries, sign=-1)
+
+	(
 		qb.update(ple)
 		.set(ple.against_voucher_type, ple.voucher_type)
 		.set(ple.against_voucher_no, ple.voucher_no)
 		.set(ple.modified, now())
 		.set(ple.modified_by, frappe.session.user)
-		.where(
-			(ple.against_voucher_type == ref_type) & (ple.against_voucher_no == ref_no) & (ple.delinked == 0)
-		)
-	)
+		.where(criterion)
+	).run()
 
-	if payment_name:
-		ple_update_query = ple_update_query.where(ple.voucher_no == payment_name)
-	ple_update_query.run()
+	for entry in unlinked_entries:
+		entry.against_voucher_type, entry.against_voucher_no = entry.voucher_type, entry.voucher_no
+	update_payment_ledger_outstanding(unlinked_entries)
 
 
 def remove_ref_from_advance_section(ref_doc: object = None):
@@ -1453,29 +1575,55 @@ def repost_gle_for_stock_vouchers(
 		warehouse_account = get_warehouse_account_map(company)
 
 	stock_vouchers = sort_stock_vouchers_by_posting_date(stock_vouchers, company=company)
+	total_vouchers = len(stock_vouchers)
 	if repost_doc and repost_doc.gl_reposting_index:
 		# Restore progress
 		stock_vouchers = stock_vouchers[cint(repost_doc.gl_reposting_index) :]
 
 	precision = get_field_precision(frappe.get_meta("GL Entry").get_field("debit")) or 2
+	patch_gl_entries = cint(
+		frappe.db.get_single_value("Stock Reposting Settings", "repost_changed_gl_entries_only")
+	)
 
 	for stock_vouchers_chunk in create_batch(stock_vouchers, GL_REPOSTING_CHUNK):
-		gle = get_voucherwise_gl_entries(stock_vouchers_chunk, posting_date)
+		increment_counter("gl_entry_queries")
+		with track_phase("get_gl_entries"):
+			gle = get_voucherwise_gl_entries(stock_vouchers_chunk, posting_date)
+			stock_values = (
+				get_voucherwise_stock_values(stock_vouchers_chunk, warehouse_account, precision)
+				if patch_gl_entries
+				else {}
+			)
 
 		for voucher_type, voucher_no in stock_vouchers_chunk:
+			increment_counter("vouchers_checked")
 			existing_gle = gle.get((voucher_type, voucher_no), [])
-			voucher_obj = frappe.get_doc(voucher_type, voucher_no)
-			# Some transactions post credit as negative debit, this is handled while posting GLE
-			# but while comparing we need to make sure it's flipped so comparisons are accurate
-			expected_gle = toggle_debit_credit_if_negative(voucher_obj.get_gl_entries(warehouse_account))
-			if expected_gle:
-				if not existing_gle or not compare_existing_and_expected_gle(
-					existing_gle, expected_gle, precision
-				):
-					_delete_accounting_ledger_entries(voucher_type, voucher_no)
-					voucher_obj.make_gl_entries(gl_entries=expected_gle, from_repost=True)
-			else:
-				_delete_accounting_ledger_entries(voucher_type, voucher_no)
+
+			if stock_values.get((voucher_type, voucher_no)):
+				with track_phase("make_gl_entries"):
+					if patch_stock_gl_entries(
+						existing_gle, stock_values[(voucher_type, voucher_no)], precision
+					):
+						continue
+
+			with track_phase("get_gl_entries"):
+				voucher_obj = frappe.get_doc(voucher_type, voucher_no)
+				# Some transactions post credit as negative debit, this is handled while posting GLE
+				# but while comparing we need to make sure it's flipped so comparisons are accurate
+				expected_gle = toggle_debit_credit_if_negative(voucher_obj.get_gl_entries(warehouse_account))
+
+			with track_phase("make_gl_entries"):
+				if expected_gle:
+					if not existing_gle or not compare_existing_and_expected_gle(
+						existing_gle, expected_gle, precision
+					):
+						increment_counter("vouchers_reposted")
+						_delete_accounting_ledger_entries(voucher_type, voucher_no, voucher_obj.company)
+						voucher_obj.make_gl_entries(gl_entries=expected_gle, from_repost=True)
+				else:
+					if existing_gle:
+						increment_counter("vouchers_reposted")
+					_delete_accounting_ledger_entries(voucher_type, voucher_no, voucher_obj.company)
 
 		if not frappe.flags.in_test:
 			frappe.db.commit()
@@ -1485,23 +1633,171 @@ def repost_gle_for_stock_vouchers(
 				"gl_reposting_index",
 				cint(repost_doc.gl_reposting_index) + len(stock_vouchers_chunk),
 			)
+			update_reposting_progress(
+				repost_doc, "repost_gl_entries", repost_doc.gl_reposting_index, total_vouchers
+			)
+
+
+def get_voucherwise_stock_values(stock_vouchers, warehouse_account, precision):
+	"""Expected balance of each stock account in the GL entries of the patchable vouchers,
+	from the stock value difference of their stock ledger entries.
+
+	returns:
+	        Dict[Tuple[voucher_type, voucher_no], Dict[account, balance]]
+	"""
+	voucher_nos = [
+		voucher_no
+		for voucher_type, voucher_no in stock_vouchers
+		if voucher_type in GL_PATCHABLE_VOUCHER_TYPES
+	]
+	if not voucher_nos:
+		return {}
+
+	sle = frappe.qb.DocType("Stock Ledger Entry")
+	sles = (
+		frappe.qb.from_(sle)
+		.select(sle.voucher_type, sle.voucher_no, sle.warehouse, sle.stock_value_difference)
+		.where(
+			(sle.is_cancelled == 0)
+			& (sle.voucher_type.isin(GL_PATCHABLE_VOUCHER_TYPES))
+			& (sle.voucher_no.isin(voucher_nos))
+		)
+		.run(as_dict=True)
+	)
+
+	stock_values = {}
+	for row in sles:
+		key = (row.voucher_type, row.voucher_no)
+		if key in stock_values and stock_values[key] is None:
+			continue
+
+		if not warehouse_account.get(row.warehouse):
+			# regeneration raises the missing account
+			stock_values[key] = None
+			continue
+
+		account = warehouse_account[row.warehouse]["account"]
+		balances = stock_values.setdefault(key, {})
+		# the GL entries are built from the rounded value of each stock ledger entry
+		balances[account] = flt(
+			flt(balances.get(account)) + flt(row.stock_value_difference, precision), precision
+		)
+
+	return stock_values
+
+
+def patch_stock_gl_entries(existing_gle, stock_values, precision):
+	"""Update the stock account rows and the offset row of a voucher in place,
+	returns False if the voucher has to be regenerated.
+
+	Vouchers having several rows for a stock account or several offset rows (different cost centers,
+	expense accounts or dimensions) are regenerated, same as those where a row appears or vanishes."""
+	stock_rows, offset_rows = {}, []
+	for gle in existing_gle:
+		if gle.is_cancelled:
+			return False
+
+		if gle.account in stock_values:
+			if gle.account in stock_rows:
+				return False
+			stock_rows[gle.account] = gle
+		else:
+			offset_rows.append(gle)
+
+	if len(offset_rows) != 1 or len(stock_rows) != len(stock_values):
+		return False
+
+	changed_rows = {}
+	for account, balance in stock_values.items():
+		row = stock_rows[account]
+		if not balance:
+			return False
+
+		if flt(flt(row.debit) - flt(row.credit), precision) != balance:
+			changed_rows[row.name] = balance
+
+	if not changed_rows:
+		return True
+
+	offset_row = offset_rows[0]
+	offset_balance = flt(-sum(stock_values.values()), precision)
+	if not offset_balance:
+		return False
+
+	changed_rows[offset_row.name] = offset_balance
+	rows = [row for row in existing_gle if row.name in changed_rows]
+
+	company_currency = erpnext.get_company_currency(offset_row.company)
+	if any(
+		row.account_currency != company_currency or row.transaction_currency != company_currency
+		for row in rows
+	):
+		return False
+
+	increment_counter("vouchers_patched")
+	update_account_balance_snapshots(
+		[
+			frappe._dict(row, debit_in_account_currency=row.debit, credit_in_account_currency=row.credit)
+			for row in rows
+		],
+		sign=-1,
+	)
+
+	for row in rows:
+		balance = changed_rows[row.name]
+		debit, credit = (balance, 0) if balance > 0 else (0, -balance)
+		amounts = {
+			"debit": debit,
+			"credit": credit,
+			"debit_in_account_currency": debit,
+			"credit_in_account_currency": credit,
+			"debit_in_transaction_currency": debit,
+			"credit_in_transaction_currency": credit,
+		}
+		row.update(amounts)
+		frappe.db.set_value("GL Entry", row.name, amounts, update_modified=False)
+
+	update_account_balance_snapshots(rows)
+	return True
 
 
 def _delete_pl_entries(voucher_type, voucher_no):
 	ple = qb.DocType("Payment Ledger Entry")
-	qb.from_(ple).delete().where((ple.voucher_type == voucher_type) & (ple.voucher_no == voucher_no)).run()
+	delete_payment_ledger_entries((ple.voucher_type == voucher_type) & (ple.voucher_no == voucher_no))
 
 
-def _delete_gl_entries(voucher_type, voucher_no):
+def _delete_gl_entries(voucher_type, voucher_no, company=None):
 	gle = qb.DocType("GL Entry")
+	# deleted entries are read only if they may be in the balance snapshots of the company
+	if not company or get_snapshot_date(company):
+		update_account_balance_snapshots(
+			frappe.get_all(
+				"GL Entry",
+				filters={"voucher_type": voucher_type, "voucher_no": voucher_no, "is_cancelled": 0},
+				fields=[
+					"company",
+					"account",
+					"cost_center",
+					"party_type",
+					"party",
+					"account_currency",
+					"posting_date",
+					"debit",
+					"credit",
+					"debit_in_account_currency",
+					"credit_in_account_currency",
+				],
+			),
+			sign=-1,
+		)
 	qb.from_(gle).delete().where((gle.voucher_type == voucher_type) & (gle.voucher_no == voucher_no)).run()
 
 
-def _delete_accounting_ledger_entries(voucher_type, voucher_no):
+def _delete_accounting_ledger_entries(voucher_type, voucher_no, company=None):
 	"""
 	Remove entries from both General and Payment Ledger for specified Voucher
 	"""
-	_delete_gl_entries(voucher_type, voucher_no)
+	_delete_gl_entries(voucher_type, voucher_no, company)
 	_delete_pl_entries(voucher_type, voucher_no)
 
 
@@ -1580,7 +1876,8 @@ def get_voucherwise_gl_entries(future_stock_vouchers, posting_date):
 
 	gles = frappe.db.sql(
 		"""
-		select name, account, credit, debit, cost_center, project, voucher_type, voucher_no
+		select name, account, credit, debit, cost_center, project, voucher_type, voucher_no,
+			company, posting_date, party_type, party, account_currency, transaction_currency, is_cancelled
 			from `tabGL Entry`
 		where
 			posting_date >= {} and voucher_no in ({})""".format("%s", ", ".join(["%s"] * len(voucher_nos))),
@@ -1851,6 +2148,11 @@ def create_payment_ledger_entry(
 	if gl_entries:
 		ple_map = get_payment_ledger_entries(gl_entries, cancel=cancel)
 
+		# outstanding is read back while submitting the entries, cancelled entries are
+		# removed from it by `delink_original_entry`
+		if not cancel:
+			update_payment_ledger_outstanding(ple_map)
+
 		for entry in ple_map:
 			ple = frappe.get_doc(entry)
 
@@ -1909,28 +2211,30 @@ def update_voucher_outstanding(voucher_type, voucher_no, account, party_type, pa
 def delink_original_entry(pl_entry, partial_cancel=False):
 	if pl_entry:
 		ple = qb.DocType("Payment Ledger Entry")
-		query = (
-			qb.update(ple)
-			.set(ple.delinked, True)
-			.set(ple.modified, now())
-			.set(ple.modified_by, frappe.session.user)
-			.where(
-				(ple.company == pl_entry.company)
-				& (ple.account_type == pl_entry.account_type)
-				& (ple.account == pl_entry.account)
-				& (ple.party_type == pl_entry.party_type)
-				& (ple.party == pl_entry.party)
-				& (ple.voucher_type == pl_entry.voucher_type)
-				& (ple.voucher_no == pl_entry.voucher_no)
-				& (ple.against_voucher_type == pl_entry.against_voucher_type)
-				& (ple.against_voucher_no == pl_entry.against_voucher_no)
-			)
+		criterion = (
+			(ple.company == pl_entry.company)
+			& (ple.account_type == pl_entry.account_type)
+			& (ple.account == pl_entry.account)
+			& (ple.party_type == pl_entry.party_type)
+			& (ple.party == pl_entry.party)
+			& (ple.voucher_type == pl_entry.voucher_type)
+			& (ple.voucher_no == pl_entry.voucher_no)
+			& (ple.against_voucher_type == pl_entry.against_voucher_type)
+			& (ple.against_voucher_no == pl_entry.against_voucher_no)
 		)
 
 		if partial_cancel:
-			query = query.where(ple.voucher_detail_no == pl_entry.voucher_detail_no)
+			criterion &= ple.voucher_detail_no == pl_entry.voucher_detail_no
 
-		query.run()
+		update_payment_ledger_outstanding(get_payment_ledger_amounts(criterion), sign=-1)
+
+		(
+			qb.update(ple)
+			.set(ple.delinked, True)
+			.set(ple.modified, now())
+			.set(ple.modified_by, frappe.session.user)
+			.where(criterion)
+		).run()
 
 
 class QueryPaymentLedger:
@@ -1940,6 +2244,7 @@ class QueryPaymentLedger:
 
 	def __init__(self):
 		self.ple = qb.DocType("Payment Ledger Entry")
+		self.summary = qb.DocType("Payment Ledger Outstanding")
 
 		# query result
 		self.voucher_outstandings = []
@@ -1967,9 +2272,11 @@ class QueryPaymentLedger:
 		"""
 
 		ple = self.ple
+		summary = self.summary
 
 		filter_on_voucher_no = []
 		filter_on_against_voucher_no = []
+		filter_on_summary_voucher_no = []
 
 		if self.vouchers:
 			voucher_types = set([x.voucher_type for x in self.vouchers])
@@ -1981,9 +2288,13 @@ class QueryPaymentLedger:
 			filter_on_against_voucher_no.append(ple.against_voucher_type.isin(voucher_types))
 			filter_on_against_voucher_no.append(ple.against_voucher_no.isin(voucher_nos))
 
+			filter_on_summary_voucher_no.append(summary.voucher_type.isin(voucher_types))
+			filter_on_summary_voucher_no.append(summary.voucher_no.isin(voucher_nos))
+
 		if self.voucher_no:
 			filter_on_voucher_no.append(ple.voucher_no.like(f"%{self.voucher_no}%"))
 			filter_on_against_voucher_no.append(ple.against_voucher_no.like(f"%{self.voucher_no}%"))
+			filter_on_summary_voucher_no.append(summary.voucher_no.like(f"%{self.voucher_no}%"))
 
 		# build outstanding amount filter
 		filter_on_outstanding_amount = []
@@ -2038,6 +2349,9 @@ class QueryPaymentLedger:
 				filter_on_against_voucher_no.append(
 					ple.against_voucher_no.isin([x[0] for x in outstanding_vouchers])
 				)
+				filter_on_summary_voucher_no.append(
+					summary.voucher_no.isin([x[0] for x in outstanding_vouchers])
+				)
 
 		# build query for voucher amount
 		query_voucher_amount = (
@@ -2065,25 +2379,44 @@ class QueryPaymentLedger:
 		)
 
 		# build query for voucher outstanding
-		query_voucher_outstanding = (
-			qb.from_(ple)
-			.select(
-				ple.account,
-				ple.against_voucher_type.as_("voucher_type"),
-				ple.against_voucher_no.as_("voucher_no"),
-				ple.party_type,
-				ple.party,
-				ple.posting_date,
-				ple.due_date,
-				ple.account_currency.as_("currency"),
-				Sum(ple.amount).as_("amount"),
-				Sum(ple.amount_in_account_currency).as_("amount_in_account_currency"),
+		summary_filter = self.get_summary_filter()
+		if summary_filter is not None:
+			# point read of the outstanding maintained per voucher, account and party
+			query_voucher_outstanding = (
+				qb.from_(summary)
+				.select(
+					summary.account,
+					summary.voucher_type,
+					summary.voucher_no,
+					summary.party_type,
+					summary.party,
+					Sum(summary.outstanding).as_("amount"),
+					Sum(summary.outstanding_in_account_currency).as_("amount_in_account_currency"),
+				)
+				.where(Criterion.all(filter_on_summary_voucher_no))
+				.where(Criterion.all(summary_filter))
+				.groupby(summary.voucher_type, summary.voucher_no, summary.party_type, summary.party)
+			)
+		else:
+			query_voucher_outstanding = (
+				qb.from_(ple)
+				.select(
+					ple.account,
+					ple.against_voucher_type.as_("voucher_type"),
+					ple.against_voucher_no.as_("voucher_no"),
+					ple.party_type,
+					ple.party,
+					ple.posting_date,
+					ple.due_date,
+					ple.account_currency.as_("currency"),
+					Sum(ple.amount).as_("amount"),
+					Sum(ple.amount_in_account_currency).as_("amount_in_account_currency"),
+				)
+				.where(ple.delinked == 0)
+				.where(Criterion.all(filter_on_against_voucher_no))
+				.where(Criterion.all(self.common_filter))
+				.groupby(ple.against_voucher_type, ple.against_voucher_no, ple.party_type, ple.party)
 			)
-			.where(ple.delinked == 0)
-			.where(Criterion.all(filter_on_against_voucher_no))
-			.where(Criterion.all(self.common_filter))
-			.groupby(ple.against_voucher_type, ple.against_voucher_no, ple.party_type, ple.party)
-		)
 
 		# build CTE for combining voucher amount and outstanding
 		self.cte_query_voucher_amount_and_outstanding = (
@@ -2146,6 +2479,22 @@ class QueryPaymentLedger:
 		# execute SQL
 		self.voucher_outstandings = self.cte_query_voucher_amount_and_outstanding.run(as_dict=True)
 
+	def get_summary_filter(self):
+		"""
+		`common_filter` mapped to Payment Ledger Outstanding. Returns None if a filter refers to
+		fields not maintained in the outstanding summary, outstanding is then computed from the ledger.
+		"""
+		summary_filter = []
+		for criterion in self.common_filter:
+			if any(
+				field.table != self.ple or field.name not in SUMMARY_FIELDS for field in criterion.fields_()
+			):
+				return None
+
+			summary_filter.append(criterion.replace_table(self.ple, self.summary))
+
+		return summary_filter
+
 	def get_voucher_outstandings(
 		self,
 		vouchers=None,
@@ -2307,6 +2656,17 @@ def run_ledger_health_checks():
 					doc.checked_on = run_date
 					doc.save()
 
+		# Payment Ledger and outstanding summary discrepancy, repaired from the Payment Ledger
+		if health_monitor_settings.payment_ledger_outstanding_mismatch:
+			for x in health_monitor_settings.companies:
+				for row in check_payment_ledger_outstanding(x.company, repair=True):
+					doc = frappe.new_doc("Ledger Health")
+					doc.voucher_type = row.voucher_type
+					doc.voucher_no = row.voucher_no
+					doc.payment_ledger_outstanding_mismatch = True
+					doc.checked_on = run_date
+					doc.save()
+
 
 def sync_auto_reconcile_config(auto_reconciliation_job_trigger: int = 15):
 	auto_reconciliation_job_trigger = auto_reconciliation_job_trigger or frappe.db.get_single_value(
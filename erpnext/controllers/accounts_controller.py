@@ -393,7 +393,10 @@ class AccountsController(TransactionBase):
 			).run()
 
 	def on_trash(self):
-		from erpnext.accounts.utils import delete_exchange_gain_loss_journal
+		from erpnext.accounts.doctype.payment_ledger_outstanding.payment_ledger_outstanding import (
+			delete_payment_ledger_entries,
+		)
+		from erpnext.accounts.utils import _delete_gl_entries, delete_exchange_gain_loss_journal
 
 		self._remove_advance_payment_ledger_entries()
 		self._remove_references_in_repost_doctypes()
@@ -406,7 +409,7 @@ class AccountsController(TransactionBase):
 			delete_exchange_gain_loss_journal(self)
 
 			ple = frappe.qb.DocType("Payment Ledger Entry")
-			frappe.qb.from_(ple).delete().where(
+			delete_payment_ledger_entries(
 				(ple.voucher_type == self.doctype) & (ple.voucher_no == self.name)
 				| (
 					(ple.against_voucher_type == self.doctype)
@@ -414,11 +417,8 @@ class AccountsController(TransactionBase):
 					& ple.delinked
 					== 1
 				)
-			).run()
-			gle = frappe.qb.DocType("GL Entry")
-			frappe.qb.from_(gle).delete().where(
-				(gle.voucher_type == self.doctype) & (gle.voucher_no == self.name)
-			).run()
+			)
+			_delete_gl_entries(self.doctype, self.name, self.company)
 			sle = frappe.qb.DocType("Stock Ledger Entry")
 			frappe.qb.from_(sle).delete().where(
 				(sle.voucher_type == self.doctype) & (sle.voucher_no == self.name)
@@ -1595,6 +1595,9 @@ class AccountsController(TransactionBase):
 			if self.get("doctype") == "Payment Entry":
 				# For Payment Entry, exchange_gain_loss field in the `references` table is the trigger for journal creation
 				gain_loss_to_book = [x for x in self.references if x.exchange_gain_loss != 0]
+				# reconciliation books the references of each posting date separately
+				if args and args.get("references"):
+					gain_loss_to_book = [x for x in gain_loss_to_book if x.name in args.get("references")]
 				booked = []
 				if gain_loss_to_book:
 					[x.reference_doctype for x in gain_loss_to_book]
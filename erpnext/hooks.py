@@ -464,10 +464,13 @@ scheduler_events = {
 		"erpnext.manufacturing.doctype.bom_update_tool.bom_update_tool.auto_update_latest_price_in_all_boms",
 		"erpnext.crm.utils.open_leads_opportunities_based_on_todays_event",
 		"erpnext.assets.doctype.asset.depreciation.post_depreciation_entries",
+		"erpnext.accounts.doctype.party_ageing_snapshot.party_ageing_snapshot.build_party_ageing_snapshots",
 	],
 	"monthly_long": [
 		"erpnext.accounts.deferred_revenue.process_deferred_accounting",
 		"erpnext.accounts.utils.auto_create_exchange_rate_revaluation_monthly",
+		"erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot.build_stock_balance_snapshots",
+		"erpnext.accounts.doctype.account_balance_snapshot.account_balance_snapshot.build_account_balance_snapshots",
 	],
 }
 
@@ -0,0 +1,10 @@
+import frappe
+
+from erpnext.accounts.doctype.payment_ledger_outstanding.payment_ledger_outstanding import (
+	rebuild_payment_ledger_outstanding,
+)
+
+
+def execute():
+	for company in frappe.get_all("Company", pluck="name"):
+		rebuild_payment_ledger_outstanding(company)
@@ -3698,11 +3698,11 @@ class TestPurchaseReceipt(IntegrationTestCase):
 
 		pr.repost_future_sle_and_gle(force=True)
 
-		columns, data = execute(
+		data = execute(
 			filters=frappe._dict(
 				{"item_code": item_code, "warehouse": pr.items[0].warehouse, "company": pr.company}
 			)
-		)
+		)[1]
 
 		self.assertEqual(data[0].get("bal_qty"), 50.0)
 
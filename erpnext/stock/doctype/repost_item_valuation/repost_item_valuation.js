@@ -70,6 +70,7 @@ frappe.ui.form.on("Repost Item Valuation", {
 				frm.doc.current_index = data.current_index;
 				frm.doc.items_to_be_repost = data.items_to_be_repost;
 				frm.doc.total_reposting_count = data.total_reposting_count;
+				frm.doc.estimated_completion = data.estimated_completion;
 
 				frm.dashboard.reset();
 				frm.trigger("show_reposting_progress");
@@ -121,6 +122,14 @@ frappe.ui.form.on("Repost Item Valuation", {
 		});
 
 		frm.dashboard.add_progress(__("Reposting Progress"), bars);
+
+		if (frm.doc.status == "In Progress" && frm.doc.estimated_completion) {
+			frm.dashboard.set_headline(
+				__("Estimated completion of the current phase: {0}", [
+					frappe.datetime.str_to_user(frm.doc.estimated_completion),
+				])
+			);
+		}
 	},
 
 	restart_reposting: function (frm) {
@@ -1,12 +1,14 @@
 # Copyright (c) 2020, Frappe Technologies Pvt. Ltd. and contributors
 # For license information, please see license.txt
 
+import json
+
 import frappe
 from frappe import _
 from frappe.desk.form.load import get_attachments
 from frappe.exceptions import QueryDeadlockError, QueryTimeoutError
 from frappe.model.document import Document
-from frappe.query_builder import DocType, Interval
+from frappe.query_builder import DocType, Interval, Tuple
 from frappe.query_builder.functions import Max, Now
 from frappe.utils import cint, get_link_to_form, get_weekday, getdate, now, nowtime
 from frappe.utils.user import get_users_with_role
@@ -15,11 +17,13 @@ from rq.timeouts import JobTimeoutException
 import erpnext
 from erpnext.accounts.general_ledger import validate_accounting_period
 from erpnext.accounts.utils import get_future_stock_vouchers, repost_gle_for_stock_vouchers
+from erpnext.stock.reposting_metrics import collect_reposting_metrics, save_reposting_metrics, track_phase
 from erpnext.stock.stock_ledger import (
 	get_affected_transactions,
 	get_items_to_be_repost,
 	repost_future_sle,
 )
+from erpnext.stock.utils import get_combine_datetime
 
 RecoverableErrors = (JobTimeoutException, QueryDeadlockError, QueryTimeoutError)
 
@@ -42,13 +46,17 @@ class RepostItemValuation(Document):
 		current_index: DF.Int
 		distinct_item_and_warehouse: DF.Code | None
 		error_log: DF.LongText | None
+		estimated_completion: DF.Datetime | None
 		gl_reposting_index: DF.Int
 		item_code: DF.Link | None
 		items_to_be_repost: DF.Code | None
+		parent_reposting: DF.Link | None
 		posting_date: DF.Date
 		posting_time: DF.Time | None
 		recreate_stock_ledgers: DF.Check
 		reposting_data_file: DF.Attach | None
+		reposting_metrics: DF.Code | None
+		reposting_started_at: DF.Datetime | None
 		status: DF.Literal["Queued", "In Progress", "Completed", "Skipped", "Failed"]
 		total_reposting_count: DF.Int
 		via_landed_cost_voucher: DF.Check
@@ -220,11 +228,21 @@ class RepostItemValuation(Document):
 		self.distinct_item_and_warehouse = None
 		self.items_to_be_repost = None
 		self.gl_reposting_index = 0
+		self.reposting_metrics = None
+		self.reposting_started_at = None
+		self.estimated_completion = None
 		self.clear_attachment()
 		self.db_update()
 
+		# resume failed chains from their last checkpoint
+		for chain in get_reposting_chain_entries(self.name):
+			if chain.status == "Failed":
+				frappe.db.set_value(self.doctype, chain.name, "status", "Queued")
+
 	def deduplicate_similar_repost(self):
-		"""Deduplicate similar reposts based on item-warehouse-posting combination."""
+		"""Deduplicate similar reposts based on item-warehouse-posting combination.
+
+		Chains of a parallel repost are never skipped, they repost more item-warehouses than their own."""
 		if self.based_on != "Item and Warehouse":
 			return
 
@@ -247,6 +265,7 @@ class RepostItemValuation(Document):
 				and docstatus = 1
 				and status = 'Queued'
 				and based_on = 'Item and Warehouse'
+				and ifnull(parent_reposting, '') = ''
 				""",
 			filters,
 		)
@@ -267,70 +286,87 @@ def on_doctype_update():
 
 
 def repost(doc):
-	try:
-		frappe.flags.through_repost_item_valuation = True
-		if not frappe.db.exists("Repost Item Valuation", doc.name):
-			return
-
-		# This is to avoid TooManyWritesError in case of large reposts
-		frappe.db.MAX_WRITES_PER_TRANSACTION *= 4
-
-		doc.set_status("In Progress")
-		if not frappe.flags.in_test:
-			frappe.db.commit()
-
-		if doc.recreate_stock_ledgers:
-			doc.recreate_stock_ledger_entries()
-
-		repost_sl_entries(doc)
-		repost_gl_entries(doc)
-
-		doc.set_status("Completed")
-		doc.db_set("reposting_data_file", None)
-		remove_attached_file(doc.name)
-
-	except Exception as e:
-		if frappe.flags.in_test:
-			# Don't silently fail in tests,
-			# there is no reason for reposts to fail in CI
-			raise
-
-		frappe.db.rollback()
-		traceback = frappe.get_traceback(with_context=True)
-		doc.log_error("Unable to repost item valuation")
-
-		message = frappe.message_log.pop() if frappe.message_log else ""
-		if isinstance(message, dict):
-			message = message.get("message")
-
-		status = "Failed"
-		# If failed because of timeout, set status to In Progress
-		if traceback and ("timeout" in traceback.lower() or "Deadlock found" in traceback):
-			status = "In Progress"
-
-		if traceback:
-			message += "<br><br>" + "<b>Traceback:</b> <br>" + traceback
-
-		frappe.db.set_value(
-			doc.doctype,
-			doc.name,
-			{
-				"error_log": message,
-				"status": status,
-			},
-		)
+	with collect_reposting_metrics(doc):
+		try:
+			frappe.flags.through_repost_item_valuation = True
+			if not frappe.db.exists("Repost Item Valuation", doc.name):
+				return
 
-		if status == "Failed":
-			outgoing_email_account = frappe.get_cached_value(
-				"Email Account", {"default_outgoing": 1, "enable_outgoing": 1}, "name"
+			# This is to avoid TooManyWritesError in case of large reposts
+			frappe.db.MAX_WRITES_PER_TRANSACTION *= 4
+
+			doc.set_status("In Progress")
+			if not frappe.flags.in_test:
+				frappe.db.commit()
+
+			if doc.recreate_stock_ledgers:
+				doc.recreate_stock_ledger_entries()
+
+			with track_phase("repost_sl_entries"):
+				if is_parallel_reposting_enabled(doc):
+					if not repost_sl_entries_in_chains(doc):
+						# chains are still being reposted in background jobs,
+						# GL reposting of the parent waits for all of them to complete
+						return
+				else:
+					repost_sl_entries(doc)
+
+			if not doc.parent_reposting:
+				# GL entries are reposted once by the parent for all the chains
+				with track_phase("repost_gl_entries"):
+					repost_gl_entries(doc)
+
+			doc.set_status("Completed")
+			doc.db_set("reposting_data_file", None)
+			remove_attached_file(doc.name)
+
+			if doc.parent_reposting and not frappe.flags.in_test:
+				# resume the parent once its chains are done
+				execute_repost_item_valuation()
+
+		except Exception as e:
+			if frappe.flags.in_test:
+				# Don't silently fail in tests,
+				# there is no reason for reposts to fail in CI
+				raise
+
+			frappe.db.rollback()
+			traceback = frappe.get_traceback(with_context=True)
+			doc.log_error("Unable to repost item valuation")
+
+			message = frappe.message_log.pop() if frappe.message_log else ""
+			if isinstance(message, dict):
+				message = message.get("message")
+
+			status = "Failed"
+			# If failed because of timeout, set status to In Progress
+			if traceback and ("timeout" in traceback.lower() or "Deadlock found" in traceback):
+				status = "In Progress"
+
+			if traceback:
+				message += "<br><br>" + "<b>Traceback:</b> <br>" + traceback
+
+			frappe.db.set_value(
+				doc.doctype,
+				doc.name,
+				{
+					"error_log": message,
+					"status": status,
+				},
 			)
 
-			if outgoing_email_account and not isinstance(e, RecoverableErrors):
-				notify_error_to_stock_managers(doc, message)
-				doc.set_status("Failed")
-	finally:
-		if not frappe.flags.in_test:
-			frappe.db.commit()
+			if status == "Failed":
+				outgoing_email_account = frappe.get_cached_value(
+					"Email Account", {"default_outgoing": 1, "enable_outgoing": 1}, "name"
+				)
+
+				if outgoing_email_account and not isinstance(e, RecoverableErrors):
+					notify_error_to_stock_managers(doc, message)
+					doc.set_status("Failed")
+		finally:
+			save_reposting_metrics(doc)
+			if not frappe.flags.in_test:
+				frappe.db.commit()
 
 
 def remove_attached_file(docname):
@@ -374,6 +410,11 @@ def repost_gl_entries(doc):
 	# directly modified transactions
 	directly_dependent_transactions = _get_directly_dependent_vouchers(doc)
 	repost_affected_transaction = get_affected_transactions(doc)
+	for chain in get_reposting_chain_entries(doc.name):
+		repost_affected_transaction.update(
+			get_affected_transactions(frappe.get_doc("Repost Item Valuation", chain.name))
+		)
+
 	repost_gle_for_stock_vouchers(
 		directly_dependent_transactions + list(repost_affected_transaction),
 		doc.posting_date,
@@ -382,6 +423,203 @@ def repost_gl_entries(doc):
 	)
 
 
+def is_parallel_reposting_enabled(doc):
+	if doc.parent_reposting or doc.based_on != "Transaction":
+		return False
+
+	return cint(frappe.db.get_single_value("Stock Reposting Settings", "enable_parallel_reposting"))
+
+
+def repost_sl_entries_in_chains(doc) -> bool:
+	"""Repost independent item-warehouse chains of the transaction in parallel.
+
+	Each chain is reposted by a child Repost Item Valuation in its own background job,
+	so the usual `current_index` / `reposting_data_file` checkpointing applies per chain.
+	Returns True once all the chains are completed.
+	"""
+	chains = get_reposting_chain_entries(doc.name)
+	if not chains:
+		if doc.current_index:
+			# reposting was started serially, continue with it
+			repost_sl_entries(doc)
+			return True
+
+		items_to_be_repost = get_items_to_be_repost(doc.voucher_type, doc.voucher_no, doc)
+		reposting_chains = get_reposting_chains(items_to_be_repost, doc.posting_date, doc.posting_time)
+		max_jobs = (
+			cint(frappe.db.get_single_value("Stock Reposting Settings", "parallel_reposting_jobs")) or 4
+		)
+		reposting_chains = merge_reposting_chains(reposting_chains, max_jobs)
+		if len(reposting_chains) <= 1:
+			repost_sl_entries(doc)
+			return True
+
+		create_reposting_chains(doc, reposting_chains)
+		chains = get_reposting_chain_entries(doc.name)
+
+	if failed_chains := [chain.name for chain in chains if chain.status == "Failed"]:
+		frappe.throw(
+			_("Reposting of the chains {0} has failed").format(
+				", ".join(get_link_to_form(doc.doctype, name) for name in failed_chains)
+			)
+		)
+
+	for chain in chains:
+		if chain.status in ("Queued", "In Progress"):
+			enqueue_reposting_chain(chain.name)
+
+	return not frappe.db.exists(
+		"Repost Item Valuation",
+		{"parent_reposting": doc.name, "docstatus": 1, "status": ("in", ["Queued", "In Progress"])},
+	)
+
+
+def get_reposting_chains(items_to_be_repost, posting_date, posting_time=None) -> list[list[dict]]:
+	"""Group item-warehouses which depend on each other into chains.
+
+	Two item-warehouses are dependent if a future entry of one of them drives the valuation
+	of the other one (transfers, repack and manufacture entries), or if they belong to the
+	same serialized / batched item. Chains don't depend on each other and can be reposted
+	in parallel.
+	"""
+	parent = {}
+
+	def find(key):
+		parent.setdefault(key, key)
+		while parent[key] != key:
+			parent[key] = parent[parent[key]]
+			key = parent[key]
+
+		return key
+
+	def union(key, other):
+		parent[find(key)] = find(other)
+
+	keys = [(row.get("item_code"), row.get("warehouse")) for row in items_to_be_repost]
+	for key in keys:
+		find(key)
+
+	serial_batch_items = set(
+		frappe.get_all(
+			"Item",
+			filters={"name": ("in", list({key[0] for key in keys}) or [""])},
+			or_filters={"has_serial_no": 1, "has_batch_no": 1},
+			pluck="name",
+		)
+	)
+	first_key_of_item = {}
+	for key in keys:
+		if key[0] in serial_batch_items:
+			union(key, first_key_of_item.setdefault(key[0], key))
+
+	posting_datetime = get_combine_datetime(posting_date, posting_time or "00:00:00")
+	pending = list(dict.fromkeys(keys))
+	visited = set(pending)
+	while pending:
+		batch, pending = pending[:500], pending[500:]
+		for source, dependent in get_dependent_item_warehouses(batch, posting_datetime):
+			union(source, dependent)
+			if dependent not in visited:
+				visited.add(dependent)
+				pending.append(dependent)
+
+	chains = {}
+	for row, key in zip(items_to_be_repost, keys, strict=True):
+		chains.setdefault(find(key), []).append(row)
+
+	return list(chains.values())
+
+
+def get_dependent_item_warehouses(item_warehouses, posting_datetime) -> list[tuple]:
+	sle = frappe.qb.DocType("Stock Ledger Entry")
+	dependent_sle = frappe.qb.DocType("Stock Ledger Entry").as_("dependent_sle")
+
+	data = (
+		frappe.qb.from_(sle)
+		.inner_join(dependent_sle)
+		.on(
+			(dependent_sle.voucher_detail_no == sle.dependant_sle_voucher_detail_no)
+			& (dependent_sle.name != sle.name)
+			& (dependent_sle.is_cancelled == 0)
+		)
+		.select(sle.item_code, sle.warehouse, dependent_sle.item_code, dependent_sle.warehouse)
+		.distinct()
+		.where(
+			(sle.is_cancelled == 0)
+			& (sle.posting_datetime >= posting_datetime)
+			& (sle.dependant_sle_voucher_detail_no.isnotnull())
+			& (sle.dependant_sle_voucher_detail_no != "")
+			& (Tuple(sle.item_code, sle.warehouse).isin(item_warehouses))
+		)
+	).run()
+
+	return [((row[0], row[1]), (row[2], row[3])) for row in data]
+
+
+def merge_reposting_chains(chains, max_jobs) -> list[list[dict]]:
+	"""Pack independent chains into at most `max_jobs` jobs, balanced on the number of item-warehouses."""
+	jobs = [[] for _i in range(min(max_jobs, len(chains)))]
+	for chain in sorted(chains, key=len, reverse=True):
+		min(jobs, key=len).extend(chain)
+
+	return [job for job in jobs if job]
+
+
+def create_reposting_chains(doc, chains):
+	for chain in chains:
+		chain_doc = frappe.get_doc(
+			{
+				"doctype": "Repost Item Valuation",
+				"based_on": "Item and Warehouse",
+				"item_code": chain[0].get("item_code"),
+				"warehouse": chain[0].get("warehouse"),
+				"posting_date": doc.posting_date,
+				"posting_time": doc.posting_time,
+				"company": doc.company,
+				"allow_negative_stock": doc.allow_negative_stock,
+				"via_landed_cost_voucher": doc.via_landed_cost_voucher,
+				"allow_zero_rate": doc.allow_zero_rate,
+				"items_to_be_repost": json.dumps(chain, default=str),
+				"parent_reposting": doc.name,
+			}
+		)
+		chain_doc.flags.dont_run_in_test = True
+		chain_doc.submit()
+
+	if not frappe.flags.in_test:
+		frappe.db.commit()
+
+
+def get_reposting_chain_entries(name):
+	return frappe.get_all(
+		"Repost Item Valuation",
+		filters={"parent_reposting": name, "docstatus": 1},
+		fields=["name", "status"],
+		order_by="creation asc",
+	)
+
+
+def enqueue_reposting_chain(name):
+	if frappe.flags.in_test:
+		repost(frappe.get_doc("Repost Item Valuation", name))
+		return
+
+	frappe.enqueue(
+		repost_chain,
+		name=name,
+		queue="long",
+		timeout=7200,
+		job_id=f"repost_item_valuation_chain::{name}",
+		deduplicate=True,
+	)
+
+
+def repost_chain(name):
+	doc = frappe.get_doc("Repost Item Valuation", name)
+	if doc.status in ("Queued", "In Progress"):
+		repost(doc)
+
+
 def _get_directly_dependent_vouchers(doc):
 	"""Get stock vouchers that are directly affected by reposting
 	i.e. any one item-warehouse is present in the stock transaction"""
@@ -459,6 +697,12 @@ def repost_entries():
 			repost(doc)
 			doc.deduplicate_similar_repost()
 
+			if frappe.db.get_value(doc.doctype, doc.name, "status") == "In Progress" and (
+				get_reposting_chain_entries(doc.name)
+			):
+				# wait for the parallel chains before reposting later entries
+				break
+
 	riv_entries = get_repost_item_valuation_entries()
 	if riv_entries:
 		return
@@ -468,6 +712,7 @@ def get_repost_item_valuation_entries():
 	return frappe.db.sql(
 		""" SELECT name from `tabRepost Item Valuation`
 		WHERE status in ('Queued', 'In Progress') and creation <= %s and docstatus = 1
+			and ifnull(parent_reposting, '') = ''
 		ORDER BY timestamp(posting_date, posting_time) asc, creation asc, status asc
 	""",
 		now(),
@@ -14,7 +14,11 @@ from erpnext.controllers.stock_controller import create_item_wise_repost_entries
 from erpnext.stock.doctype.item.test_item import make_item
 from erpnext.stock.doctype.purchase_receipt.test_purchase_receipt import make_purchase_receipt
 from erpnext.stock.doctype.repost_item_valuation.repost_item_valuation import (
+	create_reposting_chains,
+	get_reposting_chain_entries,
+	get_reposting_chains,
 	in_configured_timeslot,
+	merge_reposting_chains,
 )
 from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
 from erpnext.stock.tests.test_utils import StockTestMixin
@@ -174,6 +178,43 @@ class TestRepostItemValuation(IntegrationTestCase, StockTestMixin):
 		riv4.set_status("Skipped")
 		riv3.set_status("Skipped")
 
+	def test_reposting_chain_not_deduplicated(self):
+		riv_args = frappe._dict(
+			doctype="Repost Item Valuation",
+			item_code="_Test Item",
+			warehouse="Stores - _TC",
+			based_on="Item and Warehouse",
+			posting_date="2021-01-02",
+			posting_time="00:01:00",
+		)
+		parent = frappe.get_doc(riv_args)
+		parent.flags.dont_run_in_test = True
+		parent.submit()
+
+		create_reposting_chains(
+			parent,
+			[
+				[
+					{"item_code": "_Test Item", "warehouse": "_Test Warehouse - _TC"},
+					{"item_code": "_Test Item 2", "warehouse": "_Test Warehouse - _TC"},
+				]
+			],
+		)
+		chain = get_reposting_chain_entries(parent.name)[0]
+
+		# backdated repost of the first item-warehouse of the chain
+		riv = frappe.get_doc(
+			riv_args.update({"warehouse": "_Test Warehouse - _TC", "posting_date": "2021-01-01"})
+		)
+		riv.flags.dont_run_in_test = True
+		riv.submit()
+		riv.deduplicate_similar_repost()
+		self.assertEqual(frappe.db.get_value("Repost Item Valuation", chain.name, "status"), "Queued")
+
+		# to avoid breaking other tests accidentaly
+		for name in (parent.name, chain.name, riv.name):
+			frappe.get_doc("Repost Item Valuation", name).set_status("Skipped")
+
 	def test_stock_freeze_validation(self):
 		today = nowdate()
 
@@ -296,6 +337,35 @@ class TestRepostItemValuation(IntegrationTestCase, StockTestMixin):
 			gle_filters={"account": "Stock In Hand - TCP1"},
 		)
 
+	def test_reposting_metrics(self):
+		item = self.make_item().name
+		company = "_Test Company with perpetual inventory"
+
+		make_stock_entry(item=item, company=company, qty=5, rate=10, target="Stores - TCP1")
+		make_stock_entry(item=item, company=company, qty=1, source="Stores - TCP1")
+
+		backdated_receipt = make_stock_entry(
+			item=item,
+			company=company,
+			qty=1,
+			rate=50,
+			target="Stores - TCP1",
+			posting_date=add_to_date(today(), days=-1),
+		)
+
+		riv = frappe.get_last_doc("Repost Item Valuation", {"voucher_no": backdated_receipt.name})
+		self.assertEqual(riv.status, "Completed")
+		self.assertTrue(riv.reposting_started_at)
+		self.assertFalse(riv.estimated_completion)
+
+		metrics = frappe.parse_json(riv.reposting_metrics)
+		self.assertIn("process_sle", metrics.phases)
+		self.assertIn("make_gl_entries", metrics.phases)
+		self.assertGreaterEqual(metrics.counters["sles_processed"], 2)
+		self.assertGreaterEqual(metrics.counters["vouchers_checked"], 2)
+		self.assertGreaterEqual(metrics.counters["sle_queries"], 1)
+		self.assertGreaterEqual(metrics.counters["gl_entry_queries"], 1)
+
 	def test_duplicate_ple_on_repost(self):
 		from erpnext.accounts import utils
 
@@ -455,3 +525,91 @@ class TestRepostItemValuation(IntegrationTestCase, StockTestMixin):
 						"name",
 					)
 				)
+
+	def test_reposting_chains(self):
+		item_a = make_item(properties={"is_stock_item": 1}).name
+		item_b = make_item(properties={"is_stock_item": 1}).name
+		warehouse = "_Test Warehouse - _TC"
+		target_warehouse = "_Test Warehouse 1 - _TC"
+
+		make_stock_entry(
+			item_code=item_a, to_warehouse=warehouse, qty=10, rate=100, posting_date="2024-01-01"
+		)
+		make_stock_entry(
+			item_code=item_b, to_warehouse=warehouse, qty=10, rate=100, posting_date="2024-01-01"
+		)
+
+		# transfer links both warehouses of item_a, item_b is independent
+		make_stock_entry(
+			item_code=item_a,
+			from_warehouse=warehouse,
+			to_warehouse=target_warehouse,
+			qty=5,
+			posting_date="2024-01-02",
+		)
+
+		items_to_be_repost = [
+			frappe._dict(item_code=item_a, warehouse=warehouse),
+			frappe._dict(item_code=item_b, warehouse=warehouse),
+			frappe._dict(item_code=item_a, warehouse=target_warehouse),
+		]
+
+		chains = get_reposting_chains(items_to_be_repost, "2024-01-01", "00:00:00")
+		chains = sorted([(row.item_code, row.warehouse) for row in chain] for chain in chains)
+		self.assertEqual(
+			chains,
+			sorted(
+				[
+					[(item_a, warehouse), (item_a, target_warehouse)],
+					[(item_b, warehouse)],
+				]
+			),
+		)
+
+		self.assertEqual(len(merge_reposting_chains([[1, 2], [3], [4]], 2)), 2)
+		self.assertEqual(len(merge_reposting_chains([[1, 2]], 4)), 1)
+
+	@IntegrationTestCase.change_settings("Stock Reposting Settings", {"enable_parallel_reposting": 1})
+	def test_parallel_reposting(self):
+		item_a = make_item(properties={"is_stock_item": 1}).name
+		item_b = make_item(properties={"is_stock_item": 1}).name
+		warehouse = "_Test Warehouse - _TC"
+
+		for item_code in (item_a, item_b):
+			make_stock_entry(
+				item_code=item_code, from_warehouse=None, to_warehouse=warehouse, qty=10, rate=100
+			)
+
+		# backdated receipt of both items is reposted as two independent chains
+		se = make_stock_entry(
+			item_code=item_a,
+			to_warehouse=warehouse,
+			qty=5,
+			rate=50,
+			posting_date=add_days(nowdate(), -5),
+			do_not_submit=True,
+		)
+		se.append("items", {**se.items[0].as_dict(), "name": None, "idx": None, "item_code": item_b})
+		se.submit()
+
+		riv = frappe.get_last_doc(
+			"Repost Item Valuation", {"voucher_no": se.name, "parent_reposting": ("is", "not set")}
+		)
+		self.assertEqual(riv.status, "Completed")
+
+		chains = frappe.get_all(
+			"Repost Item Valuation", filters={"parent_reposting": riv.name}, fields=["status"]
+		)
+		self.assertEqual(len(chains), 2)
+		self.assertTrue(all(chain.status == "Completed" for chain in chains))
+
+		for item_code in (item_a, item_b):
+			self.assertEqual(
+				frappe.db.get_value(
+					"Stock Ledger Entry",
+					{"item_code": item_code, "warehouse": warehouse, "is_cancelled": 0},
+					"qty_after_transaction",
+					order_by="posting_datetime desc, creation desc",
+				),
+				15,
+			)
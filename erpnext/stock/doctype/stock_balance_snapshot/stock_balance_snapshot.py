@@ -0,0 +1,261 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.query_builder.functions import IfNull, Max, Sum
+from frappe.utils import add_days, add_months, flt, get_last_day, getdate, now, nowdate
+
+SNAPSHOT_CACHE_KEY = "stock_balance_snapshot_date"
+SNAPSHOT_CACHE_EXPIRY = 60 * 60
+
+
+class StockBalanceSnapshot(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		company: DF.Link | None
+		item_code: DF.Link | None
+		period_end_date: DF.Date | None
+		qty_after_transaction: DF.Float
+		stock_value: DF.Currency
+		valuation_rate: DF.Currency
+		warehouse: DF.Link | None
+	# end: auto-generated types
+
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("Stock Balance Snapshot", ["company", "period_end_date"])
+	frappe.db.add_index("Stock Balance Snapshot", ["item_code", "warehouse", "period_end_date"])
+
+
+def build_stock_balance_snapshots():
+	"""Snapshot stock balances as on the last day of previous month.
+	Called monthly via hooks.py"""
+	period_end_date = get_last_day(add_months(nowdate(), -1))
+	for company in frappe.get_all("Company", pluck="name"):
+		make_stock_balance_snapshot(company, period_end_date)
+
+
+def make_stock_balance_snapshot(company, period_end_date):
+	"""Build the snapshot of `period_end_date` incrementally from the previous snapshot of the company.
+
+	Every item-warehouse with a non zero balance gets a row, so a snapshot is complete on its own.
+	Balances of item-warehouses without entries in the period are carried forward from the
+	previous snapshot, the rest are taken from their last stock ledger entry in the period."""
+	period_end_date = getdate(period_end_date)
+	if frappe.db.exists("Stock Balance Snapshot", {"company": company, "period_end_date": period_end_date}):
+		return
+
+	previous_period_end_date = get_snapshot_date(company, add_days(period_end_date, -1))
+
+	balances = {}
+	if previous_period_end_date:
+		for row in frappe.get_all(
+			"Stock Balance Snapshot",
+			filters={"company": company, "period_end_date": previous_period_end_date},
+			fields=["item_code", "warehouse", "qty_after_transaction", "valuation_rate", "stock_value"],
+		):
+			balances[(row.item_code, row.warehouse)] = row
+
+	from_datetime = add_days(previous_period_end_date, 1) if previous_period_end_date else "1900-01-01"
+	for row in get_last_entries_in_period(company, from_datetime, add_days(period_end_date, 1)):
+		balances[(row.item_code, row.warehouse)] = row
+
+	insert_snapshot_rows(company, period_end_date, balances.values())
+
+	# seen by this transaction only till commit, other transactions keep the cached date till then
+	if not getattr(frappe.local, "stock_balance_snapshot_dates", None):
+		frappe.local.stock_balance_snapshot_dates = {}
+		frappe.db.after_commit.add(clear_cached_snapshot_dates)
+		frappe.db.after_rollback.add(reset_snapshot_dates)
+
+	frappe.local.stock_balance_snapshot_dates[company] = period_end_date
+
+
+def clear_cached_snapshot_dates():
+	for company in frappe.local.stock_balance_snapshot_dates or {}:
+		frappe.cache.hdel(SNAPSHOT_CACHE_KEY, company)
+
+	reset_snapshot_dates()
+
+
+def reset_snapshot_dates():
+	frappe.local.stock_balance_snapshot_dates = None
+
+
+def get_last_entries_in_period(company, from_datetime, to_datetime):
+	"""Last stock ledger entry of every item-warehouse posted in [from_datetime, to_datetime)"""
+	return frappe.db.sql(
+		"""
+		select item_code, warehouse, qty_after_transaction, valuation_rate, stock_value
+		from (
+			select
+				item_code, warehouse, qty_after_transaction, valuation_rate, stock_value,
+				row_number() over (
+					partition by item_code, warehouse order by posting_datetime desc, creation desc
+				) as row_no
+			from `tabStock Ledger Entry`
+			where company = %(company)s
+				and is_cancelled = 0
+				and posting_datetime >= %(from_datetime)s
+				and posting_datetime < %(to_datetime)s
+		) sle
+		where row_no = 1
+		""",
+		{"company": company, "from_datetime": from_datetime, "to_datetime": to_datetime},
+		as_dict=1,
+	)
+
+
+def insert_snapshot_rows(company, period_end_date, rows):
+	user = frappe.session.user
+	timestamp = now()
+
+	values = []
+	for row in rows:
+		if not flt(row.qty_after_transaction) and not flt(row.stock_value):
+			continue
+
+		values.append(
+			(
+				frappe.generate_hash(length=10),
+				timestamp,
+				timestamp,
+				user,
+				user,
+				row.item_code,
+				row.warehouse,
+				company,
+				period_end_date,
+				flt(row.qty_after_transaction),
+				flt(row.valuation_rate),
+				flt(row.stock_value),
+			)
+		)
+
+	fields = [
+		"name",
+		"creation",
+		"modified",
+		"owner",
+		"modified_by",
+		"item_code",
+		"warehouse",
+		"company",
+		"period_end_date",
+		"qty_after_transaction",
+		"valuation_rate",
+		"stock_value",
+	]
+
+	frappe.db.bulk_insert("Stock Balance Snapshot", fields=fields, values=values)
+
+
+def get_snapshot_date(company, posting_date=None):
+	"""Latest snapshot of the company on or before `posting_date`"""
+	if not posting_date:
+		if snapshot_date := (getattr(frappe.local, "stock_balance_snapshot_dates", None) or {}).get(company):
+			return snapshot_date
+
+		snapshot_date = frappe.cache.hget(SNAPSHOT_CACHE_KEY, company)
+		if snapshot_date is None:
+			snapshot_date = get_snapshot_date(company, "9999-12-31") or ""
+			frappe.cache.hset(SNAPSHOT_CACHE_KEY, company, snapshot_date)
+			# bounds the life of a date cached by a transaction that read the snapshot before a commit
+			frappe.cache.expire(frappe.cache.make_key(SNAPSHOT_CACHE_KEY), SNAPSHOT_CACHE_EXPIRY)
+
+		return snapshot_date
+
+	table = frappe.qb.DocType("Stock Balance Snapshot")
+	result = (
+		frappe.qb.from_(table)
+		.select(Max(table.period_end_date))
+		.where((table.company == company) & (table.period_end_date <= posting_date))
+	).run()
+
+	return result[0][0] if result and result[0][0] else None
+
+
+def refresh_stock_balance_snapshots(item_code, warehouse, posting_date, company=None):
+	"""Rebuild snapshot rows of the item-warehouse from `posting_date` onwards.
+	Called after the stock ledger of the item-warehouse is reposted."""
+	from erpnext.stock.stock_ledger import get_previous_sle
+
+	if not company:
+		company = frappe.get_cached_value("Warehouse", warehouse, "company")
+
+	last_snapshot_date = get_snapshot_date(company)
+	if not last_snapshot_date or getdate(posting_date) > getdate(last_snapshot_date):
+		return
+
+	table = frappe.qb.DocType("Stock Balance Snapshot")
+	period_end_dates = (
+		frappe.qb.from_(table)
+		.select(table.period_end_date)
+		.distinct()
+		.where((table.company == company) & (table.period_end_date >= posting_date))
+	).run(pluck=True)
+
+	frappe.qb.from_(table).delete().where(
+		(table.item_code == item_code)
+		& (table.warehouse == warehouse)
+		& (table.period_end_date >= posting_date)
+	).run()
+
+	for period_end_date in period_end_dates:
+		last_sle = get_previous_sle(
+			{
+				"item_code": item_code,
+				"warehouse": warehouse,
+				"posting_date": period_end_date,
+				"posting_time": "23:59:59.999999",
+			}
+		)
+
+		if last_sle:
+			insert_snapshot_rows(company, period_end_date, [frappe._dict(last_sle)])
+
+
+def get_stock_value_from_snapshot(company, posting_date, warehouses=None, item_code=None):
+	"""Stock value as on `posting_date`, computed as snapshot value + value of entries after the snapshot.
+	Returns None if there is no snapshot on or before `posting_date`."""
+	period_end_date = get_snapshot_date(company, posting_date)
+	if not period_end_date:
+		return None
+
+	table = frappe.qb.DocType("Stock Balance Snapshot")
+	query = (
+		frappe.qb.from_(table)
+		.select(IfNull(Sum(table.stock_value), 0))
+		.where((table.company == company) & (table.period_end_date == period_end_date))
+	)
+
+	sle = frappe.qb.DocType("Stock Ledger Entry")
+	delta_query = (
+		frappe.qb.from_(sle)
+		.select(IfNull(Sum(sle.stock_value_difference), 0))
+		.where(
+			(sle.company == company)
+			& (sle.is_cancelled == 0)
+			& (sle.posting_date > period_end_date)
+			& (sle.posting_date <= posting_date)
+		)
+	)
+
+	if warehouses:
+		query = query.where(table.warehouse.isin(warehouses))
+		delta_query = delta_query.where(sle.warehouse.isin(warehouses))
+
+	if item_code:
+		query = query.where(table.item_code == item_code)
+		delta_query = delta_query.where(sle.item_code == item_code)
+
+	return flt(query.run()[0][0]) + flt(delta_query.run()[0][0])
@@ -0,0 +1,105 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests import IntegrationTestCase, UnitTestCase
+
+from erpnext.stock.doctype.item.test_item import make_item
+from erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot import (
+	get_stock_value_from_snapshot,
+	make_stock_balance_snapshot,
+)
+from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
+from erpnext.stock.doctype.stock_reconciliation.test_stock_reconciliation import (
+	create_stock_reconciliation,
+)
+
+# On IntegrationTestCase, the doctype test records and all
+# link-field test record depdendencies are recursively loaded
+# Use these module variables to add/remove to/from that list
+EXTRA_TEST_RECORD_DEPENDENCIES = []  # eg. ["User"]
+IGNORE_TEST_RECORD_DEPENDENCIES = []  # eg. ["User"]
+
+
+class UnitTestStockBalanceSnapshot(UnitTestCase):
+	"""
+	Unit tests for StockBalanceSnapshot.
+	Use this class for testing individual functions and methods.
+	"""
+
+	pass
+
+
+class IntegrationTestStockBalanceSnapshot(IntegrationTestCase):
+	def setUp(self):
+		self.company = "_Test Company"
+		self.warehouse = "_Test Warehouse - _TC"
+		self.item_code = make_item(properties={"is_stock_item": 1}).name
+		frappe.db.delete("Stock Balance Snapshot", {"company": self.company})
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def get_snapshot(self, period_end_date):
+		return frappe.db.get_value(
+			"Stock Balance Snapshot",
+			{"item_code": self.item_code, "warehouse": self.warehouse, "period_end_date": period_end_date},
+			["qty_after_transaction", "stock_value"],
+			as_dict=True,
+		)
+
+	def test_incremental_snapshot(self):
+		make_stock_entry(
+			item_code=self.item_code, to_warehouse=self.warehouse, qty=10, rate=100, posting_date="2024-01-10"
+		)
+		make_stock_balance_snapshot(self.company, "2024-01-31")
+
+		# no entries in february, balance is carried forward
+		make_stock_balance_snapshot(self.company, "2024-02-29")
+		snapshot = self.get_snapshot("2024-02-29")
+		self.assertEqual(snapshot.qty_after_transaction, 10)
+		self.assertEqual(snapshot.stock_value, 1000)
+
+		make_stock_entry(
+			item_code=self.item_code, from_warehouse=self.warehouse, qty=4, posting_date="2024-03-05"
+		)
+		make_stock_balance_snapshot(self.company, "2024-03-31")
+		self.assertEqual(self.get_snapshot("2024-03-31").qty_after_transaction, 6)
+
+	def test_snapshot_plus_delta(self):
+		make_stock_entry(
+			item_code=self.item_code, to_warehouse=self.warehouse, qty=10, rate=100, posting_date="2024-01-10"
+		)
+		make_stock_balance_snapshot(self.company, "2024-01-31")
+
+		make_stock_entry(
+			item_code=self.item_code, to_warehouse=self.warehouse, qty=5, rate=200, posting_date="2024-02-10"
+		)
+
+		self.assertEqual(
+			get_stock_value_from_snapshot(self.company, "2024-02-15", [self.warehouse], self.item_code), 2000
+		)
+
+		create_stock_reconciliation(
+			item_code=self.item_code, warehouse=self.warehouse, qty=7, rate=100, posting_date="2024-02-12"
+		)
+		self.assertEqual(
+			get_stock_value_from_snapshot(self.company, "2024-02-15", [self.warehouse], self.item_code), 700
+		)
+
+		# no snapshot before the date
+		self.assertIsNone(get_stock_value_from_snapshot(self.company, "2023-12-31"))
+
+	def test_snapshot_refreshed_on_backdated_entry(self):
+		make_stock_entry(
+			item_code=self.item_code, to_warehouse=self.warehouse, qty=10, rate=100, posting_date="2024-01-10"
+		)
+		make_stock_balance_snapshot(self.company, "2024-01-31")
+
+		make_stock_entry(
+			item_code=self.item_code, to_warehouse=self.warehouse, qty=5, rate=100, posting_date="2024-01-05"
+		)
+
+		snapshot = self.get_snapshot("2024-01-31")
+		self.assertEqual(snapshot.qty_after_transaction, 15)
+		self.assertEqual(snapshot.stock_value, 1500)
@@ -82,6 +82,12 @@ frappe.ui.form.on("Stock Reconciliation", {
 			frm.trigger("toggle_display_account_head");
 		}
 
+		if (frm.doc.docstatus === 1 && frm.doc.submission_status === "Failed") {
+			frm.add_custom_button(__("Resume Submission"), () => {
+				frm.call("resume_submission").then(() => frm.reload_doc());
+			});
+		}
+
 		frm.events.set_fields_onload_for_line_item(frm);
 	},
 
@@ -18,6 +18,9 @@ from erpnext.stock.doctype.serial_and_batch_bundle.serial_and_batch_bundle impor
 from erpnext.stock.doctype.serial_no.serial_no import get_serial_nos
 from erpnext.stock.utils import get_incoming_rate, get_stock_balance
 
+# Reconciliations with more items are submitted in chunks of this size by background jobs
+CHUNKED_SUBMISSION_SIZE = 1000
+
 
 class OpeningEntryAccountError(frappe.ValidationError):
 	pass
@@ -49,11 +52,13 @@ class StockReconciliation(StockController):
 		naming_series: DF.Literal["MAT-RECO-.YYYY.-"]
 		posting_date: DF.Date
 		posting_time: DF.Time
+		processed_rows: DF.Int
 		purpose: DF.Literal["", "Opening Stock", "Stock Reconciliation"]
 		scan_barcode: DF.Data | None
 		scan_mode: DF.Check
 		set_posting_time: DF.Check
 		set_warehouse: DF.Link | None
+		submission_status: DF.Literal["", "Queued", "In Progress", "Completed", "Failed"]
 	# end: auto-generated types
 
 	def __init__(self, *args, **kwargs):
@@ -100,13 +105,89 @@ class StockReconciliation(StockController):
 					)
 
 	def on_submit(self):
+		if len(self.items) > CHUNKED_SUBMISSION_SIZE:
+			self.db_set({"submission_status": "Queued", "processed_rows": 0})
+			enqueue_submission_chunk(self.name)
+			return
+
 		self.make_bundle_for_current_qty()
 		self.make_bundle_using_old_serial_batch_fields()
 		self.update_stock_ledger()
 		self.make_gl_entries()
 		self.repost_future_sle_and_gle()
 
+	def submit_next_chunk(self):
+		"""Make stock ledger entries of the next `CHUNKED_SUBMISSION_SIZE` items.
+
+		Every chunk is committed and `processed_rows` is the checkpoint, so a failed submission
+		resumes from the failed chunk. GL entries and reposting are done after the last chunk."""
+		all_items = self.items
+		start = cint(self.processed_rows)
+
+		try:
+			self.db_set("submission_status", "In Progress")
+			self.items = all_items[start : start + CHUNKED_SUBMISSION_SIZE]
+			self.make_bundle_for_current_qty()
+			self.make_bundle_using_old_serial_batch_fields()
+			self.update_stock_ledger()
+			self.items = all_items
+
+			self.db_set("processed_rows", min(start + CHUNKED_SUBMISSION_SIZE, len(all_items)))
+			if self.processed_rows >= len(all_items):
+				self.make_gl_entries()
+				self.repost_future_sle_and_gle()
+				self.db_set("submission_status", "Completed")
+
+			if not frappe.flags.in_test:
+				frappe.db.commit()
+		except Exception:
+			if not frappe.flags.in_test:
+				frappe.db.rollback()
+
+			self.items = all_items
+			self.db_set("submission_status", "Failed")
+			self.log_error(title=_("Stock Reconciliation Submission Failed"))
+
+			if not frappe.flags.in_test:
+				frappe.db.commit()
+		finally:
+			self.publish_submission_progress()
+
+		if self.submission_status == "In Progress":
+			enqueue_submission_chunk(self.name)
+
+	def publish_submission_progress(self):
+		frappe.publish_progress(
+			cint(self.processed_rows) * 100 / len(self.items),
+			title=_("Submitting Stock Reconciliation"),
+			doctype=self.doctype,
+			docname=self.name,
+			description=_("{0} of {1} rows processed").format(self.processed_rows, len(self.items)),
+		)
+		self.notify_update()
+
+	@frappe.whitelist()
+	def resume_submission(self):
+		self.check_permission("submit")
+		if self.docstatus != 1 or self.submission_status != "Failed":
+			frappe.throw(_("Only failed submissions can be resumed"))
+
+		self.db_set("submission_status", "Queued")
+		enqueue_submission_chunk(self.name)
+
+	def validate_chunked_submission(self):
+		if self.submission_status == "Failed":
+			frappe.throw(
+				_(
+					"Cannot cancel {0} since its submission failed. Please resume the submission first."
+				).format(bold(self.name))
+			)
+
+		if self.submission_status in ("Queued", "In Progress"):
+			frappe.throw(_("Cannot cancel {0} while its submission is in progress.").format(bold(self.name)))
+
 	def on_cancel(self):
+		self.validate_chunked_submission()
 		self.validate_reserved_stock()
 		self.ignore_linked_doctypes = (
 			"GL Entry",
@@ -1115,6 +1196,23 @@ class StockReconciliation(StockController):
 		return current_qty
 
 
+def enqueue_submission_chunk(name):
+	frappe.enqueue(
+		submit_stock_reconciliation_chunk,
+		name=name,
+		queue="long",
+		timeout=4600,
+		enqueue_after_commit=True,
+		now=frappe.flags.in_test,
+	)
+
+
+def submit_stock_reconciliation_chunk(name):
+	doc = frappe.get_doc("Stock Reconciliation", name)
+	if doc.docstatus == 1 and doc.submission_status in ("Queued", "In Progress"):
+		doc.submit_next_chunk()
+
+
 def get_batch_qty_for_stock_reco(item_code, warehouse, batch_no, posting_date, posting_time, voucher_no):
 	ledger = frappe.qb.DocType("Stock Ledger Entry")
 
@@ -5,6 +5,7 @@
 # For license information, please see license.txt
 
 import json
+from unittest.mock import patch
 
 import frappe
 from frappe.tests import IntegrationTestCase
@@ -1446,6 +1447,69 @@ class TestStockReconciliation(IntegrationTestCase, StockTestMixin):
 		self.assertEqual(sr.difference_amount, 100 * -1)
 		self.assertTrue(sr.items[0].qty == 0)
 
+	def make_chunked_stock_reconciliation(self, rows=5):
+		items = [create_item(f"_Test Chunked Reco Item {i}", is_stock_item=1).name for i in range(rows)]
+		warehouse = "_Test Warehouse - _TC"
+
+		sr = create_stock_reconciliation(
+			item_code=items[0], warehouse=warehouse, qty=10, rate=100, do_not_save=True
+		)
+		for item_code in items[1:]:
+			sr.append(
+				"items", {"item_code": item_code, "warehouse": warehouse, "qty": 10, "valuation_rate": 100}
+			)
+
+		sr.insert()
+		return sr
+
+	def get_sle_count(self, voucher_no):
+		return frappe.db.count("Stock Ledger Entry", {"voucher_no": voucher_no, "is_cancelled": 0})
+
+	@patch("erpnext.stock.doctype.stock_reconciliation.stock_reconciliation.CHUNKED_SUBMISSION_SIZE", 2)
+	def test_chunked_submission(self):
+		sr = self.make_chunked_stock_reconciliation()
+		sr.submit()
+		sr.reload()
+
+		self.assertEqual(sr.submission_status, "Completed")
+		self.assertEqual(sr.processed_rows, 5)
+		self.assertEqual(self.get_sle_count(sr.name), 5)
+		self.assertTrue(frappe.db.exists("GL Entry", {"voucher_no": sr.name, "is_cancelled": 0}))
+
+		sr.cancel()
+		self.assertEqual(self.get_sle_count(sr.name), 0)
+
+	@patch("erpnext.stock.doctype.stock_reconciliation.stock_reconciliation.CHUNKED_SUBMISSION_SIZE", 2)
+	def test_resume_failed_chunked_submission(self):
+		from erpnext.stock.doctype.stock_reconciliation.stock_reconciliation import StockReconciliation
+
+		update_stock_ledger = StockReconciliation.update_stock_ledger
+		calls = []
+
+		def fail_second_chunk(doc, *args, **kwargs):
+			calls.append(doc.name)
+			if len(calls) == 2:
+				raise frappe.ValidationError("Chunk failed")
+			return update_stock_ledger(doc, *args, **kwargs)
+
+		sr = self.make_chunked_stock_reconciliation()
+		with patch.object(StockReconciliation, "update_stock_ledger", fail_second_chunk):
+			sr.submit()
+
+		sr.reload()
+		self.assertEqual(sr.submission_status, "Failed")
+		self.assertEqual(sr.processed_rows, 2)
+		self.assertEqual(self.get_sle_count(sr.name), 2)
+		self.assertRaises(frappe.ValidationError, sr.cancel)
+
+		sr.reload()
+		sr.resume_submission()
+		sr.reload()
+
+		self.assertEqual(sr.submission_status, "Completed")
+		self.assertEqual(sr.processed_rows, 5)
+		self.assertEqual(self.get_sle_count(sr.name), 5)
+
 
 def create_batch_item_with_batch(item_name, batch_id):
 	batch_item_doc = create_item(item_name, is_stock_item=1)
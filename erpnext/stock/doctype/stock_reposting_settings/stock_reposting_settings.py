@@ -17,6 +17,7 @@ class StockRepostingSettings(Document):
 		from frappe.types import DF
 
 		do_reposting_for_each_stock_transaction: DF.Check
+		enable_parallel_reposting: DF.Check
 		end_time: DF.Time | None
 		item_based_reposting: DF.Check
 		limit_reposting_timeslot: DF.Check
@@ -24,7 +25,11 @@ class StockRepostingSettings(Document):
 			"", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"
 		]
 		notify_reposting_error_to_role: DF.Link | None
+		parallel_reposting_jobs: DF.Int
+		repost_changed_gl_entries_only: DF.Check
+		reposting_batch_size: DF.Int
 		start_time: DF.Time | None
+		use_batched_reposting: DF.Check
 	# end: auto-generated types
 
 	def validate(self):
@@ -2,7 +2,9 @@
 # License: GNU General Public License v3. See license.txt
 
 
+import copy
 import json
+from contextlib import contextmanager
 from functools import WRAPPER_ASSIGNMENTS, wraps
 
 import frappe
@@ -156,6 +158,119 @@ def get_item_details(
 	return out
 
 
+@frappe.whitelist()
+@erpnext.normalize_ctx_input(ItemDetailsCtx)
+def get_item_details_batch(
+	ctx: ItemDetailsCtx, items, doc=None, for_validate=False, overwrite_warehouse=True
+) -> list[ItemDetails]:
+	"""
+	Item details of many rows sharing one context, in the order of `items`. Each row is the
+	same as `get_item_details` for `ctx` updated with the row.
+
+	ctx: same as `get_item_details`
+	items = [{"item_code": "", "qty": 1.0, "uom": "", "warehouse": "", ...}, ...]
+	"""
+	from erpnext.accounts.doctype.pricing_rule.utils import pricing_rule_batch
+
+	items = parse_json(items)
+
+	# the document is parsed once for all rows
+	if isinstance(doc, str):
+		doc = json.loads(doc)
+
+	rows = []
+	for item in items:
+		row = copy.deepcopy(ctx)
+		row.update(item)
+		rows.append(row)
+
+	with item_details_batch(ctx, rows), pricing_rule_batch():
+		return [get_item_details(row, doc, for_validate, overwrite_warehouse) for row in rows]
+
+
+@contextmanager
+def item_details_batch(ctx: ItemDetailsCtx, rows: list[ItemDetailsCtx]):
+	"""Prefetch the Item Prices and Bins of the items of `rows`, used by `get_item_price` and
+	`get_bin_details` instead of a query per row"""
+	if frappe.flags.item_details_batch:
+		yield
+		return
+
+	item_codes = {row.item_code for row in rows if row.get("item_code")}
+	price_list = ctx.price_list or ctx.selling_price_list or ctx.buying_price_list
+
+	frappe.flags.item_details_batch = frappe._dict(
+		price_list=price_list,
+		item_prices=get_item_prices_for_batch(price_list, item_codes),
+		bins=get_bins_for_batch(item_codes),
+	)
+	try:
+		yield
+	finally:
+		frappe.flags.item_details_batch = None
+
+
+def get_item_prices_for_batch(price_list, item_codes):
+	"""Item Prices of the items and their templates in the price list, per item in the order of
+	`get_item_price`"""
+	if not (price_list and item_codes):
+		return {}
+
+	item_codes = set(item_codes)
+	item_codes.update(
+		frappe.get_all(
+			"Item",
+			filters={"name": ("in", list(item_codes)), "variant_of": ("is", "set")},
+			pluck="variant_of",
+		)
+	)
+
+	ip = frappe.qb.DocType("Item Price")
+	item_prices = (
+		frappe.qb.from_(ip)
+		.select(
+			ip.name,
+			ip.item_code,
+			ip.price_list_rate,
+			ip.uom,
+			ip.batch_no,
+			ip.customer,
+			ip.supplier,
+			ip.valid_from,
+			ip.valid_upto,
+		)
+		.where((ip.price_list == price_list) & ip.item_code.isin(list(item_codes)))
+		.orderby(ip.valid_from, order=frappe.qb.desc)
+		.orderby(IfNull(ip.batch_no, ""), order=frappe.qb.desc)
+		.orderby(ip.uom, order=frappe.qb.desc)
+	).run(as_dict=True)
+
+	out = {item_code: [] for item_code in item_codes}
+	for item_price in item_prices:
+		out[item_price.item_code].append(item_price)
+
+	return out
+
+
+def get_bins_for_batch(item_codes):
+	"""Bins of the items in warehouses that are not groups, by item and warehouse"""
+	if not item_codes:
+		return {}
+
+	bin = frappe.qb.DocType("Bin")
+	wh = frappe.qb.DocType("Warehouse")
+
+	bins = (
+		frappe.qb.from_(bin)
+		.inner_join(wh)
+		.on(bin.warehouse == wh.name)
+		.select(bin.item_code, bin.warehouse, bin.projected_qty, bin.actual_qty, bin.reserved_qty)
+		.where(bin.item_code.isin(list(item_codes)) & (wh.is_group == 0))
+	).run(as_dict=True)
+
+	return {(row.pop("item_code"), row.pop("warehouse")): row for row in bins}
+
+
 def remove_standard_fields(out: ItemDetails):
 	for key in child_table_fields + default_fields:
 		out.pop(key, None)
@@ -967,6 +1082,10 @@ def get_price_list_rate(ctx: ItemDetailsCtx, item_doc, out: ItemDetails = None):
 		):
 			insert_item_price(ctx)
 
+			# Item Prices of the item may have changed, query them from now on
+			if frappe.flags.item_details_batch:
+				frappe.flags.item_details_batch.item_prices.pop(ctx.item_code, None)
+
 		if price_list_rate is None:
 			return out
 
@@ -1050,6 +1169,15 @@ def get_item_price(
 	"""
 	pctx: ItemPriceCtx = frappe._dict(pctx)
 
+	batch = frappe.flags.item_details_batch
+	if (
+		batch
+		and not force_batch_no
+		and cstr(pctx.price_list).casefold() == cstr(batch.price_list).casefold()
+		and item_code in batch.item_prices
+	):
+		return filter_item_prices(batch.item_prices[item_code], pctx, ignore_party)
+
 	ip = frappe.qb.DocType("Item Price")
 	query = (
 		frappe.qb.from_(ip)
@@ -1087,6 +1215,44 @@ def get_item_price(
 	return query.run(as_dict=True)
 
 
+def filter_item_prices(item_prices, pctx: ItemPriceCtx, ignore_party=False) -> list[dict]:
+	"""Conditions of `get_item_price` applied to Item Prices prefetched in the order of its query.
+	Values are compared case-insensitively, like the database does."""
+
+	def matches(value, ctx_value, allow_blank=False):
+		value = cstr(value).casefold()
+		return value == cstr(ctx_value).casefold() or (allow_blank and not value)
+
+	for item_price in item_prices:
+		if not matches(item_price.uom, pctx.uom, allow_blank=True) or not matches(
+			item_price.batch_no, pctx.batch_no, allow_blank=True
+		):
+			continue
+
+		if not ignore_party:
+			if pctx.customer:
+				if not matches(item_price.customer, pctx.customer):
+					continue
+			elif pctx.supplier:
+				if not matches(item_price.supplier, pctx.supplier):
+					continue
+			elif item_price.customer or item_price.supplier:
+				continue
+
+		if pctx.transaction_date and not (
+			getdate(item_price.valid_from or "2000-01-01")
+			<= getdate(pctx.transaction_date)
+			<= getdate(item_price.valid_upto or "2500-12-31")
+		):
+			continue
+
+		return [
+			frappe._dict(name=item_price.name, price_list_rate=item_price.price_list_rate, uom=item_price.uom)
+		]
+
+	return []
+
+
 @frappe.whitelist()
 def get_batch_based_item_price(pctx: ItemPriceCtx | dict | str, item_code) -> float:
 	pctx = parse_json(pctx)
@@ -1328,7 +1494,12 @@ def get_projected_qty(item_code, warehouse):
 def get_bin_details(item_code, warehouse, company=None, include_child_warehouses=False):
 	bin_details = {"projected_qty": 0, "actual_qty": 0, "reserved_qty": 0}
 
-	if warehouse:
+	batch = frappe.flags.item_details_batch
+	if warehouse and batch and (item_code, warehouse) in batch.bins:
+		# the warehouse is not a group, it has no child warehouses
+		bin_details = frappe._dict(batch.bins[(item_code, warehouse)])
+
+	elif warehouse:
 		from frappe.query_builder.functions import Coalesce, Sum
 
 		from erpnext.stock.doctype.warehouse.warehouse import get_child_warehouses
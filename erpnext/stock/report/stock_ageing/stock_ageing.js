@@ -65,5 +65,11 @@ frappe.query_reports["Stock Ageing"] = {
 			fieldtype: "Check",
 			default: 0,
 		},
+		{
+			fieldname: "use_stock_closing_balance",
+			label: __("Start from Stock Closing Balance"),
+			fieldtype: "Check",
+			default: 0,
+		},
 	],
 };
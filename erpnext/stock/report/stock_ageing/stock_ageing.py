@@ -2,14 +2,18 @@
 # License: GNU General Public License v3. See license.txt
 
 
+import json
 from collections.abc import Iterator
 from operator import itemgetter
 
 import frappe
 from frappe import _
-from frappe.utils import cint, date_diff, flt, get_datetime
+from frappe.query_builder import Tuple
+from frappe.query_builder.functions import IfNull
+from frappe.utils import cint, create_batch, date_diff, flt, get_datetime, getdate
 
 from erpnext.stock.doctype.serial_no.serial_no import get_serial_nos
+from erpnext.stock.doctype.stock_closing_entry.stock_closing_entry import StockClosing
 
 Filters = frappe._dict
 
@@ -19,7 +23,7 @@ def execute(filters: Filters = None) -> tuple:
 	filters.ranges = [num.strip() for num in filters.range.split(",") if num.strip().isdigit()]
 	columns = get_columns(filters)
 
-	item_details = FIFOSlots(filters).generate()
+	item_details = FIFOSlots(filters).stream()
 	data = format_report_data(filters, item_details, to_date)
 
 	chart_data = get_chart_data(data, filters)
@@ -27,14 +31,17 @@ def execute(filters: Filters = None) -> tuple:
 	return columns, data, None, chart_data
 
 
-def format_report_data(filters: Filters, item_details: dict, to_date: str) -> list[dict]:
+def format_report_data(filters: Filters, item_details: dict | Iterator, to_date: str) -> list[dict]:
 	"Returns ordered, formatted data with ranges."
 	_func = itemgetter(1)
 	data = []
 
 	precision = cint(frappe.db.get_single_value("System Settings", "float_precision", cache=True))
 
-	for _item, item_dict in item_details.items():
+	if isinstance(item_details, dict):
+		item_details = item_details.items()
+
+	for _item, item_dict in item_details:
 		if not flt(item_dict.get("total_qty"), precision):
 			continue
 
@@ -232,6 +239,8 @@ class FIFOSlots:
 		self.serial_no_batch_purchase_details = {}
 		self.filters = filters
 		self.sle = sle
+		self.closing_balance = frappe._dict()
+		self.opening_slot_keys = set()
 
 	def generate(self) -> dict:
 		"""
@@ -244,10 +253,6 @@ class FIFOSlots:
 		}
 		"""
 
-		from erpnext.stock.doctype.serial_and_batch_bundle.test_serial_and_batch_bundle import (
-			get_serial_nos_from_bundle,
-		)
-
 		stock_ledger_entries = self.sle
 
 		bundle_wise_serial_nos = frappe._dict({})
@@ -259,26 +264,7 @@ class FIFOSlots:
 				stock_ledger_entries = self.__get_stock_ledger_entries()
 
 			for d in stock_ledger_entries:
-				key, fifo_queue, transferred_item_key = self.__init_key_stores(d)
-
-				if d.voucher_type == "Stock Reconciliation":
-					# get difference in qty shift as actual qty
-					prev_balance_qty = self.item_details[key].get("qty_after_transaction", 0)
-					d.actual_qty = flt(d.qty_after_transaction) - flt(prev_balance_qty)
-
-				serial_nos = get_serial_nos(d.serial_no) if d.serial_no else []
-				if d.serial_and_batch_bundle and d.has_serial_no:
-					if bundle_wise_serial_nos:
-						serial_nos = bundle_wise_serial_nos.get(d.serial_and_batch_bundle) or []
-					else:
-						serial_nos = get_serial_nos_from_bundle(d.serial_and_batch_bundle) or []
-
-				if d.actual_qty > 0:
-					self.__compute_incoming_stock(d, fifo_queue, transferred_item_key, serial_nos)
-				else:
-					self.__compute_outgoing_stock(d, fifo_queue, transferred_item_key, serial_nos)
-
-				self.__update_balances(d, key)
+				self.__process_sle(d, bundle_wise_serial_nos)
 
 			# Note that stock_ledger_entries is an iterator, you can not reuse it like a list
 			del stock_ledger_entries
@@ -289,6 +275,177 @@ class FIFOSlots:
 
 		return self.item_details
 
+	def stream(self, batch_size: int = 100) -> Iterator[tuple]:
+		"""
+		Yields the same (key, value) pairs as `generate`, item by item.
+
+		Stock ledger entries are fetched for a batch of items at a time, ordered by item,
+		and the slots of an item are yielded (and released) as soon as its entries are processed.
+		Memory stays proportional to the history of a batch of items instead of the whole ledger.
+
+		With `use_stock_closing_balance` set in filters, the slots of non serialized items
+		start from the FIFO queue of the last Stock Closing Balance instead of the first entry.
+		"""
+		self.closing_balance = frappe._dict()
+		if self.filters.get("use_stock_closing_balance"):
+			to_date = self.filters.get("to_date")
+			self.closing_balance = StockClosing(
+				self.filters.get("company"), to_date, to_date
+			).last_closing_balance
+
+		for items in create_batch(self.__get_items(), batch_size):
+			bundle_wise_serial_nos = self.__get_bundle_wise_serial_nos(items)
+			if self.closing_balance:
+				self.__set_opening_slots_from_closing_balance(items)
+
+			current_item = None
+			for d in self.__get_stock_ledger_entries(items):
+				if d.name != current_item:
+					yield from self.__flush_item_details(current_item)
+					current_item = d.name
+
+				self.__process_sle(d, bundle_wise_serial_nos)
+
+			yield from self.__flush_item_details(current_item)
+
+			# items having only opening slots
+			for item_code in sorted({key[0] for key in self.item_details}):
+				yield from self.__flush_item_details(item_code)
+
+	def __flush_item_details(self, item_code: str | None) -> Iterator[tuple]:
+		"Yield the slots of the item and release its key stores."
+		if not item_code:
+			return
+
+		wh_wise_data = {
+			key: self.item_details.pop(key) for key in list(self.item_details) if key[0] == item_code
+		}
+		self.transferred_item_details.clear()
+		self.serial_no_batch_purchase_details.clear()
+
+		if not self.filters.get("show_warehouse_wise_stock"):
+			wh_wise_data = self.__aggregate_details_by_item(wh_wise_data)
+
+		yield from wh_wise_data.items()
+
+	def __process_sle(self, d: dict, bundle_wise_serial_nos: dict) -> None:
+		from erpnext.stock.doctype.serial_and_batch_bundle.test_serial_and_batch_bundle import (
+			get_serial_nos_from_bundle,
+		)
+
+		key, fifo_queue, transferred_item_key = self.__init_key_stores(d)
+
+		if d.voucher_type == "Stock Reconciliation":
+			# get difference in qty shift as actual qty
+			prev_balance_qty = self.item_details[key].get("qty_after_transaction", 0)
+			d.actual_qty = flt(d.qty_after_transaction) - flt(prev_balance_qty)
+
+		serial_nos = get_serial_nos(d.serial_no) if d.serial_no else []
+		if d.serial_and_batch_bundle and d.has_serial_no:
+			if bundle_wise_serial_nos:
+				serial_nos = bundle_wise_serial_nos.get(d.serial_and_batch_bundle) or []
+			else:
+				serial_nos = get_serial_nos_from_bundle(d.serial_and_batch_bundle) or []
+
+		if d.actual_qty > 0:
+			self.__compute_incoming_stock(d, fifo_queue, transferred_item_key, serial_nos)
+		else:
+			self.__compute_outgoing_stock(d, fifo_queue, transferred_item_key, serial_nos)
+
+		self.__update_balances(d, key)
+
+	def __set_opening_slots_from_closing_balance(self, items: list) -> None:
+		"Initialise key stores of non serialized items from the FIFO queue of the last closing balance."
+		closing = frappe.qb.DocType("Stock Closing Balance")
+		item = self.__get_item_query()
+
+		query = (
+			frappe.qb.from_(closing)
+			.from_(item)
+			.select(
+				item.name,
+				item.item_name,
+				item.item_group,
+				item.brand,
+				item.description,
+				item.stock_uom,
+				item.has_serial_no,
+				item.valuation_method,
+				closing.warehouse,
+				closing.actual_qty,
+				closing.stock_value_difference,
+				closing.valuation_rate,
+				closing.fifo_queue,
+			)
+			.where(
+				(closing.item_code == item.name)
+				& (closing.stock_closing_entry == self.closing_balance.name)
+				& (closing.item_code.isin(items))
+				& (item.has_serial_no == 0)
+				& (IfNull(closing.batch_no, "") == "")
+				& (IfNull(closing.inventory_dimension_key, "") == "")
+			)
+		)
+
+		query = self.__apply_warehouse_filters(closing, query)
+
+		# closing qty is the sum of actual qty, which does not hold for item-warehouses
+		# with Stock Reconciliation entries, their slots are computed from all entries
+		reconciled = self.__get_reconciled_item_warehouses(items)
+
+		self.opening_slot_keys = set()
+		for row in query.run(as_dict=True):
+			if (row.name, row.warehouse) in reconciled:
+				continue
+
+			self.opening_slot_keys.add((row.name, row.warehouse))
+			rate = flt(row.stock_value_difference) / flt(row.actual_qty) if flt(row.actual_qty) else 0.0
+			fifo_queue = [
+				[flt(slot[0]), getdate(slot[1]), flt(slot[0]) * rate]
+				for slot in json.loads(row.fifo_queue or "[]")
+			]
+
+			self.item_details[(row.name, row.warehouse)] = {
+				"details": row,
+				"fifo_queue": fifo_queue,
+				"qty_after_transaction": row.actual_qty,
+				"total_qty": row.actual_qty,
+				"has_serial_no": row.has_serial_no,
+			}
+
+	def __get_reconciled_item_warehouses(self, items: list) -> set[tuple]:
+		"Item-warehouses of `items` with Stock Reconciliation entries up to the closing balance."
+		sle = frappe.qb.DocType("Stock Ledger Entry")
+		query = (
+			frappe.qb.from_(sle)
+			.select(sle.item_code, sle.warehouse)
+			.distinct()
+			.where(
+				(sle.company == self.filters.get("company"))
+				& (sle.item_code.isin(items))
+				& (sle.voucher_type == "Stock Reconciliation")
+				& (sle.posting_date <= self.closing_balance.to_date)
+				& (sle.is_cancelled == 0)
+			)
+		)
+
+		return set(query.run())
+
+	def __get_items(self) -> list[str]:
+		item_table = frappe.qb.DocType("Item")
+		query = (
+			frappe.qb.from_(item_table)
+			.select(item_table.name)
+			.where(item_table.is_stock_item == 1)
+			.orderby(item_table.name)
+		)
+
+		for field in ["item_code", "brand"]:
+			if self.filters.get(field):
+				query = query.where(item_table[field] == self.filters.get(field))
+
+		return query.run(pluck=True)
+
 	def __init_key_stores(self, row: dict) -> tuple:
 		"Initialise keys and FIFO Queue."
 
@@ -435,7 +592,7 @@ class FIFOSlots:
 
 		return item_aggregated_data
 
-	def __get_stock_ledger_entries(self) -> Iterator[dict]:
+	def __get_stock_ledger_entries(self, items: list | None = None) -> Iterator[dict]:
 		sle = frappe.qb.DocType("Stock Ledger Entry")
 		item = self.__get_item_query()  # used as derived table in sle query
 		to_date = get_datetime(self.filters.get("to_date") + " 23:59:59")
@@ -472,8 +629,28 @@ class FIFOSlots:
 			)
 		)
 
+		sle_query = self.__apply_warehouse_filters(sle, sle_query)
+
+		if items:
+			sle_query = sle_query.where(sle.item_code.isin(items)).orderby(sle.item_code)
+
+			if self.closing_balance and self.opening_slot_keys:
+				# opening slots of these item-warehouses are taken from the closing balance
+				sle_query = sle_query.where(
+					(sle.posting_date > self.closing_balance.to_date)
+					| Tuple(sle.item_code, sle.warehouse).notin(list(self.opening_slot_keys))
+				)
+
+		sle_query = sle_query.orderby(sle.posting_datetime, sle.creation)
+
+		if items:
+			return sle_query.run(as_dict=True)
+
+		return sle_query.run(as_dict=True, as_iterator=True)
+
+	def __apply_warehouse_filters(self, table, query):
 		if self.filters.get("warehouse"):
-			sle_query = self.__get_warehouse_conditions(sle, sle_query)
+			query = self.__get_warehouse_conditions(table, query)
 		elif self.filters.get("warehouse_type"):
 			warehouses = frappe.get_all(
 				"Warehouse",
@@ -482,13 +659,11 @@ class FIFOSlots:
 			)
 
 			if warehouses:
-				sle_query = sle_query.where(sle.warehouse.isin(warehouses))
+				query = query.where(table.warehouse.isin(warehouses))
 
-		sle_query = sle_query.orderby(sle.posting_datetime, sle.creation)
+		return query
 
-		return sle_query.run(as_dict=True, as_iterator=True)
-
-	def __get_bundle_wise_serial_nos(self) -> dict:
+	def __get_bundle_wise_serial_nos(self, items: list | None = None) -> dict:
 		bundle = frappe.qb.DocType("Serial and Batch Bundle")
 		entry = frappe.qb.DocType("Serial and Batch Entry")
 
@@ -509,6 +684,9 @@ class FIFOSlots:
 			if self.filters.get(field):
 				query = query.where(bundle[field] == self.filters.get(field))
 
+		if items:
+			query = query.where(bundle.item_code.isin(items))
+
 		if self.filters.get("warehouse"):
 			query = self.__get_warehouse_conditions(bundle, query)
 
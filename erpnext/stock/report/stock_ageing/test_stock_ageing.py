@@ -878,3 +878,93 @@ def generate_item_and_item_wh_wise_slots(filters, sle):
 	filters.show_warehouse_wise_stock = False
 
 	return item_wise_slots, item_wh_wise_slots
+
+
+class TestStockAgeingStream(IntegrationTestCase):
+	def setUp(self) -> None:
+		from erpnext.stock.doctype.item.test_item import make_item
+		from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
+
+		self.item_code = make_item(properties={"is_stock_item": 1}).name
+		self.warehouse = "_Test Warehouse - _TC"
+		self.filters = frappe._dict(
+			company="_Test Company", to_date="2021-12-31", ranges=["30", "60", "90"], item_code=self.item_code
+		)
+
+		for qty, posting_date in [
+			(10, "2021-10-01"),
+			(5, "2021-11-01"),
+			(-12, "2021-11-15"),
+			(8, "2021-12-01"),
+		]:
+			args = {"from_warehouse": self.warehouse} if qty < 0 else {"to_warehouse": self.warehouse}
+			make_stock_entry(
+				item_code=self.item_code, qty=abs(qty), rate=100, posting_date=posting_date, **args
+			)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_stream_matches_generate(self):
+		for show_warehouse_wise_stock in (False, True):
+			self.filters.show_warehouse_wise_stock = show_warehouse_wise_stock
+			expected = FIFOSlots(self.filters).generate()
+			streamed = dict(FIFOSlots(self.filters).stream(batch_size=1))
+
+			self.assertEqual(expected.keys(), streamed.keys())
+			for key in expected:
+				self.assertEqual(expected[key]["fifo_queue"], streamed[key]["fifo_queue"])
+				self.assertEqual(expected[key]["total_qty"], streamed[key]["total_qty"])
+
+	def make_closing_balance(self, actual_qty):
+		closing_entry = frappe.get_doc(
+			{
+				"doctype": "Stock Closing Entry",
+				"company": "_Test Company",
+				"from_date": "2021-10-01",
+				"to_date": "2021-11-30",
+			}
+		).insert()
+		closing_entry.db_set("docstatus", 1)
+
+		frappe.get_doc(
+			{
+				"doctype": "Stock Closing Balance",
+				"stock_closing_entry": closing_entry.name,
+				"company": "_Test Company",
+				"item_code": self.item_code,
+				"warehouse": self.warehouse,
+				"posting_date": "2021-11-30",
+				"actual_qty": actual_qty,
+				"stock_value_difference": actual_qty * 100,
+				"fifo_queue": frappe.as_json([[actual_qty, "2021-11-01"]]),
+			}
+		).insert()
+
+	def test_stream_from_stock_closing_balance(self):
+		self.make_closing_balance(3)
+
+		expected = FIFOSlots(self.filters).generate()[self.item_code]
+		self.filters.use_stock_closing_balance = 1
+		streamed = dict(FIFOSlots(self.filters).stream())[self.item_code]
+
+		self.assertEqual(streamed["fifo_queue"], expected["fifo_queue"])
+		self.assertEqual(streamed["total_qty"], expected["total_qty"])
+
+	def test_stream_from_stock_closing_balance_with_reconciliation(self):
+		from erpnext.stock.doctype.stock_reconciliation.test_stock_reconciliation import (
+			create_stock_reconciliation,
+		)
+
+		create_stock_reconciliation(
+			item_code=self.item_code, warehouse=self.warehouse, qty=6, rate=100, posting_date="2021-11-20"
+		)
+		# summed actual qty of the closing balance ignores the reconciliation
+		self.make_closing_balance(3)
+
+		expected = FIFOSlots(self.filters).generate()[self.item_code]
+		self.filters.use_stock_closing_balance = 1
+		streamed = dict(FIFOSlots(self.filters).stream())[self.item_code]
+
+		self.assertEqual(streamed["fifo_queue"], expected["fifo_queue"])
+		self.assertEqual(streamed["total_qty"], expected["total_qty"])
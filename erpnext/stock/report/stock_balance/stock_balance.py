@@ -3,14 +3,16 @@
 
 
 import json
+import time
+from contextlib import contextmanager
 from operator import itemgetter
 from typing import Any, TypedDict
 
 import frappe
 from frappe import _
-from frappe.query_builder import Order
-from frappe.query_builder.functions import Coalesce
-from frappe.utils import add_days, cint, date_diff, flt, getdate
+from frappe.query_builder import Case, Order, Tuple
+from frappe.query_builder.functions import Abs, Coalesce, IfNull, Max, Round, Sum
+from frappe.utils import add_days, cint, create_batch, date_diff, flt, getdate
 from frappe.utils.nestedset import get_descendants_of
 
 import erpnext
@@ -51,6 +53,7 @@ class StockBalanceReport:
 		self.data = []
 		self.columns = []
 		self.sle_entries: list[SLEntry] = []
+		self.timings = {}
 		self.set_company_currency()
 
 	def set_company_currency(self) -> None:
@@ -64,17 +67,51 @@ class StockBalanceReport:
 
 		self.item_warehouse_map = frappe._dict({})
 		self.inventory_dimensions = self.get_inventory_dimension_fields()
-		self.prepare_opening_stock()
-		self.prepare_sle_query()
-		self.prepare_item_warehouse_map_for_current_period()
-		self.prepare_new_data()
+
+		with self.timer("opening_stock"):
+			self.prepare_opening_stock()
+
+		with self.timer("current_period"):
+			self.prepare_sle_query()
+			if self.can_aggregate_in_database():
+				self.prepare_item_warehouse_map_from_aggregates()
+			else:
+				self.prepare_item_warehouse_map_for_current_period()
+
+		with self.timer("report_data"):
+			self.prepare_new_data()
 
 		if not self.columns:
 			self.columns = self.get_columns()
 
 		self.add_additional_uom_columns()
 
-		return self.columns, self.data
+		return self.columns, self.data, self.get_timings_message()
+
+	@contextmanager
+	def timer(self, phase):
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.timings[phase] = time.perf_counter() - start
+
+	def get_timings_message(self):
+		mode = _("aggregated in database") if self.aggregated_in_database else _("row by row")
+		return _("Opening stock: {0}s, Current period ({1}): {2}s, Report data: {3}s").format(
+			flt(self.timings.get("opening_stock"), 3),
+			mode,
+			flt(self.timings.get("current_period"), 3),
+			flt(self.timings.get("report_data"), 3),
+		)
+
+	def can_aggregate_in_database(self) -> bool:
+		"""Balances can be summed per item-warehouse in the database unless the report
+		needs FIFO queues (stock ageing) or balances per inventory dimension."""
+		if self.filters.get("show_stock_ageing_data") or self.filters.get("show_dimension_wise_stock"):
+			return False
+
+		return not any(self.filters.get(field) for field in self.inventory_dimensions)
 
 	def prepare_opening_stock(self) -> None:
 		opening_entries = self.get_entries_from_stock_closing_balance()
@@ -186,6 +223,7 @@ class StockBalanceReport:
 		self.sle_query = query
 
 	def prepare_item_warehouse_map_for_current_period(self):
+		self.aggregated_in_database = False
 		self.opening_vouchers = self.get_opening_vouchers()
 
 		if self.filters.get("show_stock_ageing_data"):
@@ -197,17 +235,145 @@ class StockBalanceReport:
 			if not self.filters.get("show_stock_ageing_data"):
 				self.sle_entries = self.sle_query.run(as_dict=True, as_iterator=True)
 
-			for entry in self.sle_entries:
-				group_by_key = self.get_group_by_key(entry)
-				if group_by_key not in self.item_warehouse_map:
-					self.initialize_data(group_by_key, entry)
+			self.process_sle_entries(self.sle_entries)
+
+		self.item_warehouse_map = filter_items_with_no_transactions(
+			self.item_warehouse_map, self.float_precision, self.inventory_dimensions
+		)
+
+	def process_sle_entries(self, sle_entries):
+		for entry in sle_entries:
+			group_by_key = self.get_group_by_key(entry)
+			if group_by_key not in self.item_warehouse_map:
+				self.initialize_data(group_by_key, entry)
+
+			self.prepare_item_warehouse_map(entry, group_by_key)
+
+	def prepare_item_warehouse_map_from_aggregates(self):
+		"""Sum the entries of the period per item-warehouse in the database.
+
+		Stock Reconciliation entries (except batch-wise ones) set the balance qty instead of
+		adding to it, item-warehouses having such entries are processed row by row."""
+		self.aggregated_in_database = True
+		self.opening_vouchers = self.get_opening_vouchers()
+
+		reconciled_item_warehouses = []
+		last_posting_datetimes = {}
+		for row in self.get_aggregated_sle_query().run(as_dict=True):
+			group_by_key = (row.item_code, row.warehouse)
+			if row.reconciliation_entries:
+				reconciled_item_warehouses.append(group_by_key)
+				continue
+
+			if group_by_key not in self.item_warehouse_map:
+				self.initialize_data(group_by_key, row)
+
+			qty_dict = self.item_warehouse_map[group_by_key]
+			for field in ("opening_qty", "opening_val", "in_qty", "in_val", "out_qty", "out_val"):
+				qty_dict[field] += flt(row[field])
 
-				self.prepare_item_warehouse_map(entry, group_by_key)
+			qty_dict.bal_qty += flt(row.bal_qty)
+			qty_dict.bal_val += flt(row.bal_val)
+			last_posting_datetimes[group_by_key] = row.last_posting_datetime
+
+		self.set_last_valuation_rates(last_posting_datetimes)
+
+		# HACK: This is required to avoid causing db query in flt
+		_system_settings = frappe.get_cached_doc("System Settings")
+		sle = frappe.qb.DocType("Stock Ledger Entry")
+		for item_warehouses in create_batch(reconciled_item_warehouses, 500):
+			query = self.sle_query.where(Tuple(sle.item_code, sle.warehouse).isin(item_warehouses))
+			self.process_sle_entries(query.run(as_dict=True))
 
 		self.item_warehouse_map = filter_items_with_no_transactions(
 			self.item_warehouse_map, self.float_precision, self.inventory_dimensions
 		)
 
+	def get_aggregated_sle_query(self):
+		sle = frappe.qb.DocType("Stock Ledger Entry")
+		item_table = frappe.qb.DocType("Item")
+
+		is_opening = sle.posting_date < self.from_date
+		for voucher_type, vouchers in self.opening_vouchers.items():
+			if vouchers:
+				is_opening |= (sle.voucher_type == voucher_type) & sle.voucher_no.isin(vouchers)
+
+		rounded_qty = Round(sle.actual_qty, self.float_precision)
+		rounded_value = Round(sle.stock_value_difference, self.float_precision)
+
+		def conditional_sum(condition, value):
+			return Sum(Case().when(is_opening, 0).when(condition, value).else_(0))
+
+		query = (
+			frappe.qb.from_(sle)
+			.inner_join(item_table)
+			.on(sle.item_code == item_table.name)
+			.select(
+				sle.item_code,
+				sle.warehouse,
+				sle.company,
+				item_table.item_group,
+				item_table.stock_uom,
+				item_table.item_name,
+				Sum(Case().when(is_opening, sle.actual_qty).else_(0)).as_("opening_qty"),
+				Sum(Case().when(is_opening, sle.stock_value_difference).else_(0)).as_("opening_val"),
+				conditional_sum(rounded_qty >= 0, sle.actual_qty).as_("in_qty"),
+				conditional_sum(rounded_qty < 0, Abs(sle.actual_qty)).as_("out_qty"),
+				conditional_sum(rounded_value >= 0, sle.stock_value_difference).as_("in_val"),
+				conditional_sum(rounded_value < 0, Abs(sle.stock_value_difference)).as_("out_val"),
+				Sum(sle.actual_qty).as_("bal_qty"),
+				Sum(sle.stock_value_difference).as_("bal_val"),
+				Max(sle.posting_datetime).as_("last_posting_datetime"),
+				Sum(
+					Case()
+					.when(
+						(sle.voucher_type == "Stock Reconciliation")
+						& ((IfNull(sle.batch_no, "") == "") | (IfNull(sle.serial_no, "") != "")),
+						1,
+					)
+					.else_(0)
+				).as_("reconciliation_entries"),
+			)
+			.where((sle.docstatus < 2) & (sle.is_cancelled == 0))
+			.groupby(
+				sle.item_code,
+				sle.warehouse,
+				sle.company,
+				item_table.item_group,
+				item_table.stock_uom,
+				item_table.item_name,
+			)
+		)
+
+		query = self.apply_warehouse_filters(query, sle)
+		query = self.apply_items_filters(query, item_table)
+		query = self.apply_date_filters(query, sle)
+
+		if self.filters.get("company"):
+			query = query.where(sle.company == self.filters.get("company"))
+
+		return query
+
+	def set_last_valuation_rates(self, last_posting_datetimes):
+		"""Valuation rate of the last entry of each item-warehouse, looked up by
+		(item_code, warehouse, posting_datetime) which is covered by an index."""
+		sle = frappe.qb.DocType("Stock Ledger Entry")
+		keys = [(*key, posting_datetime) for key, posting_datetime in last_posting_datetimes.items()]
+
+		for batch in create_batch(keys, 500):
+			entries = (
+				frappe.qb.from_(sle)
+				.select(sle.item_code, sle.warehouse, sle.valuation_rate)
+				.where(
+					(sle.is_cancelled == 0)
+					& Tuple(sle.item_code, sle.warehouse, sle.posting_datetime).isin(batch)
+				)
+				.orderby(sle.creation)
+			).run(as_dict=True)
+
+			for entry in entries:
+				self.item_warehouse_map[(entry.item_code, entry.warehouse)].val_rate = entry.valuation_rate
+
 	def prepare_new_data(self):
 		if self.filters.get("show_stock_ageing_data"):
 			self.filters["show_warehouse_wise_stock"] = True
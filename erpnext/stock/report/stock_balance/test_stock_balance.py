@@ -1,4 +1,5 @@
 from typing import Any
+from unittest.mock import patch
 
 import frappe
 from frappe import _dict
@@ -7,7 +8,10 @@ from frappe.utils import today
 
 from erpnext.stock.doctype.item.test_item import make_item
 from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
-from erpnext.stock.report.stock_balance.stock_balance import execute
+from erpnext.stock.doctype.stock_reconciliation.test_stock_reconciliation import (
+	create_stock_reconciliation,
+)
+from erpnext.stock.report.stock_balance.stock_balance import StockBalanceReport, execute
 
 
 def stock_balance(filters):
@@ -168,3 +172,68 @@ class TestStockBalance(IntegrationTestCase):
 		rows = stock_balance(self.filters.update({"show_variant_attributes": 1, "item_code": variant.name}))
 		self.assertPartialDictEq(attributes, rows[0])
 		self.assertInvariants(rows)
+
+	def test_aggregated_and_row_by_row_parity(self):
+		"""Balances summed in the database should match the row by row computation"""
+		reconciled_item = make_item().name
+		self.generate_stock_ledger(
+			self.item.name,
+			[
+				_dict(qty=5, rate=10, posting_date="2021-01-01"),
+				_dict(qty=3, rate=20, posting_date="2021-01-02"),
+				_dict(
+					qty=4,
+					from_warehouse="_Test Warehouse - _TC",
+					to_warehouse=None,
+					posting_date="2021-01-03",
+				),
+			],
+		)
+		self.generate_stock_ledger(reconciled_item, [_dict(qty=5, rate=10, posting_date="2021-01-01")])
+		create_stock_reconciliation(
+			item_code=reconciled_item,
+			warehouse="_Test Warehouse - _TC",
+			qty=8,
+			rate=15,
+			posting_date="2021-01-02",
+		)
+
+		self.filters.pop("item_code", None)
+		self.filters.update({"from_date": "2021-01-02", "to_date": "2021-01-31"})
+
+		report = StockBalanceReport(_dict(self.filters))
+		aggregated = [_dict(row) for row in report.run()[1]]
+		self.assertTrue(report.aggregated_in_database)
+
+		with patch.object(StockBalanceReport, "can_aggregate_in_database", return_value=False):
+			row_by_row = [_dict(row) for row in execute(_dict(self.filters))[1]]
+
+		key = lambda row: (row.item_code, row.warehouse)  # noqa: E731
+		row_by_row = {key(row): row for row in row_by_row}
+		aggregated = {key(row): row for row in aggregated}
+		self.assertEqual(set(row_by_row), set(aggregated))
+
+		for item_code in (self.item.name, reconciled_item):
+			expected = row_by_row[(item_code, "_Test Warehouse - _TC")]
+			actual = aggregated[(item_code, "_Test Warehouse - _TC")]
+			for field in (
+				"opening_qty",
+				"opening_val",
+				"in_qty",
+				"in_val",
+				"out_qty",
+				"out_val",
+				"bal_qty",
+				"bal_val",
+				"val_rate",
+			):
+				self.assertAlmostEqual(expected[field], actual[field], 3, msg=f"{item_code} {field}")
+
+		self.assertPartialDictEq(
+			{"opening_qty": 5, "in_qty": 3, "out_qty": 4, "bal_qty": 4},
+			aggregated[(self.item.name, "_Test Warehouse - _TC")],
+		)
+		self.assertPartialDictEq(
+			{"opening_qty": 5, "in_qty": 3, "bal_qty": 8},
+			aggregated[(reconciled_item, "_Test Warehouse - _TC")],
+		)
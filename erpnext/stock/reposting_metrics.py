@@ -0,0 +1,110 @@
+# Copyright (c) 2026, Frappe Technologies Pvt. Ltd. and Contributors
+# License: GNU General Public License v3. See license.txt
+
+"""Per-phase timings and counters of a Repost Item Valuation.
+
+Metrics are collected in `frappe.local.reposting_metrics` while `repost` runs and are
+persisted on the Repost Item Valuation along with the estimated completion of the current phase.
+Outside of reposting jobs (e.g. while submitting a transaction) nothing is collected.
+
+Phase timings are exclusive: time spent in a nested phase is not counted in the outer phase,
+so the phases add up to the total time of the repost."""
+
+import json
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import add_to_date, now_datetime
+
+
+@contextmanager
+def collect_reposting_metrics(doc):
+	"""Collect metrics of `doc`, continuing from the metrics of its previous run (if any)"""
+	previous_metrics = get_reposting_metrics()
+	metrics = json.loads(doc.reposting_metrics or "{}")
+	frappe.local.reposting_metrics = frappe._dict(
+		phases=metrics.get("phases", {}),
+		counters=metrics.get("counters", {}),
+		stack=[],
+		progress={},
+	)
+
+	if not doc.reposting_started_at:
+		doc.db_set("reposting_started_at", now_datetime(), update_modified=False)
+
+	try:
+		yield
+	finally:
+		# chains are reposted inline in tests, restore the metrics of the parent
+		frappe.local.reposting_metrics = previous_metrics
+
+
+def get_reposting_metrics():
+	return getattr(frappe.local, "reposting_metrics", None)
+
+
+@contextmanager
+def track_phase(phase):
+	metrics = get_reposting_metrics()
+	if not metrics:
+		yield
+		return
+
+	frame = [time.monotonic(), 0.0]
+	metrics.stack.append(frame)
+	try:
+		yield
+	finally:
+		metrics.stack.pop()
+		elapsed = time.monotonic() - frame[0]
+		metrics.phases[phase] = metrics.phases.get(phase, 0.0) + elapsed - frame[1]
+		if metrics.stack:
+			metrics.stack[-1][1] += elapsed
+
+
+def increment_counter(counter, value=1):
+	if metrics := get_reposting_metrics():
+		metrics.counters[counter] = metrics.counters.get(counter, 0) + value
+
+
+def update_reposting_progress(doc, phase, processed, total):
+	"""Persist the metrics and the estimated completion of `phase` on the Repost Item Valuation.
+
+	The estimate is based on the rate of progress of the phase in the current job."""
+	metrics = get_reposting_metrics()
+	if not metrics:
+		return
+
+	started_at, processed_at_start = metrics.progress.setdefault(phase, (time.monotonic(), processed))
+	processed_in_job = processed - processed_at_start
+
+	estimated_completion = None
+	if processed_in_job > 0 and total > processed:
+		seconds_per_row = (time.monotonic() - started_at) / processed_in_job
+		estimated_completion = add_to_date(now_datetime(), seconds=seconds_per_row * (total - processed))
+
+	doc.db_set(
+		{
+			"reposting_metrics": get_metrics_json(metrics),
+			"estimated_completion": estimated_completion,
+		},
+		update_modified=False,
+	)
+
+
+def save_reposting_metrics(doc):
+	if metrics := get_reposting_metrics():
+		doc.db_set(
+			{"reposting_metrics": get_metrics_json(metrics), "estimated_completion": None},
+			update_modified=False,
+		)
+
+
+def get_metrics_json(metrics):
+	return frappe.as_json(
+		{
+			"phases": {phase: round(seconds, 3) for phase, seconds in metrics.phases.items()},
+			"counters": metrics.counters,
+		}
+	)
@@ -29,10 +29,14 @@ from erpnext.stock.doctype.inventory_dimension.inventory_dimension import get_in
 from erpnext.stock.doctype.serial_and_batch_bundle.serial_and_batch_bundle import (
 	get_available_batches,
 )
+from erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot import (
+	refresh_stock_balance_snapshots,
+)
 from erpnext.stock.doctype.stock_reservation_entry.stock_reservation_entry import (
 	get_sre_reserved_batch_nos_details,
 	get_sre_reserved_serial_nos_details,
 )
+from erpnext.stock.reposting_metrics import increment_counter, track_phase, update_reposting_progress
 from erpnext.stock.utils import (
 	get_combine_datetime,
 	get_incoming_outgoing_rate_for_cancel,
@@ -43,6 +47,7 @@ from erpnext.stock.utils import (
 	get_valuation_method,
 )
 from erpnext.stock.valuation import FIFOValuation, LIFOValuation, round_off_if_near_zero
+from erpnext.utilities.bulk_insert import insert_docs, set_creation, validate_docs
 
 
 class NegativeStockError(frappe.ValidationError):
@@ -53,6 +58,22 @@ class SerialNoExistsInFutureTransaction(frappe.ValidationError):
 	pass
 
 
+# Fields recalculated by `update_entries_after.process_sle` which are written back in bulk
+# when batched reposting is enabled
+BATCHED_REPOST_SLE_FIELDS = (
+	"qty_after_transaction",
+	"valuation_rate",
+	"stock_value",
+	"stock_queue",
+	"stock_value_difference",
+	"incoming_rate",
+	"outgoing_rate",
+)
+
+# latest stock ledger entries memoized per item-warehouse for `get_valuation_rate`
+VALUATION_RATE_CACHE_ENTRIES = 5
+
+
 def make_sl_entries(sl_entries, allow_negative_stock=False, via_landed_cost_voucher=False):
 	"""Create SL entries from SL entry dicts
 
@@ -75,24 +96,14 @@ def make_sl_entries(sl_entries, allow_negative_stock=False, via_landed_cost_vouc
 		args = get_args_for_future_sle(sl_entries[0])
 		future_sle_exists(args, sl_entries)
 
-		for sle in sl_entries:
-			if sle.serial_no and not via_landed_cost_voucher:
-				validate_serial_no(sle)
-
-			if cancel:
-				sle["actual_qty"] = -flt(sle.get("actual_qty"))
-
-				if sle["actual_qty"] < 0 and not sle.get("outgoing_rate"):
-					sle["outgoing_rate"] = get_incoming_outgoing_rate_for_cancel(
-						sle.item_code, sle.voucher_type, sle.voucher_no, sle.voucher_detail_no
-					)
-					sle["incoming_rate"] = 0.0
+		if len(sl_entries) > 1 and frappe.db.get_single_value(
+			"Stock Settings", "bulk_insert_stock_ledger_entries"
+		):
+			make_sl_entries_in_bulk(sl_entries, cancel, allow_negative_stock, via_landed_cost_voucher)
+			return
 
-				if sle["actual_qty"] > 0 and not sle.get("incoming_rate"):
-					sle["incoming_rate"] = get_incoming_outgoing_rate_for_cancel(
-						sle.item_code, sle.voucher_type, sle.voucher_no, sle.voucher_detail_no
-					)
-					sle["outgoing_rate"] = 0.0
+		for sle in sl_entries:
+			prepare_sl_entry(sle, cancel, via_landed_cost_voucher)
 
 			if sle.get("actual_qty") or sle.get("voucher_type") == "Stock Reconciliation":
 				sle_doc = make_entry(sle, allow_negative_stock, via_landed_cost_voucher)
@@ -116,6 +127,126 @@ def make_sl_entries(sl_entries, allow_negative_stock=False, via_landed_cost_vouc
 				)
 
 
+def prepare_sl_entry(sle, cancel=False, via_landed_cost_voucher=False):
+	if sle.serial_no and not via_landed_cost_voucher:
+		validate_serial_no(sle)
+
+	if cancel:
+		sle["actual_qty"] = -flt(sle.get("actual_qty"))
+
+		if sle["actual_qty"] < 0 and not sle.get("outgoing_rate"):
+			sle["outgoing_rate"] = get_incoming_outgoing_rate_for_cancel(
+				sle.item_code, sle.voucher_type, sle.voucher_no, sle.voucher_detail_no
+			)
+			sle["incoming_rate"] = 0.0
+
+		if sle["actual_qty"] > 0 and not sle.get("incoming_rate"):
+			sle["incoming_rate"] = get_incoming_outgoing_rate_for_cancel(
+				sle.item_code, sle.voucher_type, sle.voucher_no, sle.voucher_detail_no
+			)
+			sle["outgoing_rate"] = 0.0
+
+
+def make_sl_entries_in_bulk(
+	sl_entries, cancel=False, allow_negative_stock=False, via_landed_cost_voucher=False
+):
+	"""Bulk version of `make_sl_entries`.
+
+	All the entries are validated in one pass and inserted with multi-row inserts, bins are
+	updated once per item-warehouse. The current voucher is still reposted entry by entry.
+
+	Entries are inserted in consecutive waves having at most one entry per item-warehouse, so that
+	reposting an entry never sees a later entry of the same item-warehouse, same as the per-row path.
+	"""
+	sle_docs = []
+	for sle in sl_entries:
+		prepare_sl_entry(sle, cancel, via_landed_cost_voucher)
+		if sle.get("actual_qty") or sle.get("voucher_type") == "Stock Reconciliation":
+			sle_docs.append(get_sle_doc(sle, allow_negative_stock, via_landed_cost_voucher))
+
+	if not sle_docs:
+		return
+
+	validate_docs(sle_docs)
+	set_sle_creation(sle_docs)
+
+	bins = {}
+	for wave in get_sle_waves(sle_docs):
+		for sle_doc in wave:
+			clear_valuation_rate_cache(sle_doc.item_code, sle_doc.warehouse)
+
+		insert_docs(wave)
+
+		for sle_doc in wave:
+			args = sle_doc.as_dict()
+			args["posting_datetime"] = get_combine_datetime(args.posting_date, args.posting_time)
+
+			if sle_doc.voucher_type == "Stock Reconciliation":
+				# preserve previous_qty_after_transaction for qty reposting
+				args.previous_qty_after_transaction = sle_doc.get("previous_qty_after_transaction")
+
+			if not frappe.get_cached_value("Item", args.item_code, "is_stock_item"):
+				frappe.msgprint(_("Item {0} ignored since it is not a stock item").format(args.item_code))
+				continue
+
+			key = (args.item_code, args.warehouse)
+			if key not in bins:
+				bin_name = get_or_make_bin(args.item_code, args.warehouse)
+				bins[key] = frappe._dict(
+					name=bin_name,
+					reserved_stock=flt(frappe.db.get_value("Bin", bin_name, "reserved_stock")),
+					args=None,
+					qty_dict=frappe._dict(),
+				)
+
+			args.reserved_stock = bins[key].reserved_stock
+			repost_current_voucher(args, allow_negative_stock, via_landed_cost_voucher)
+
+			for field in ("ordered_qty", "reserved_qty", "indented_qty", "planned_qty"):
+				bins[key].qty_dict[field] = flt(bins[key].qty_dict.get(field)) + flt(args.get(field))
+
+			bins[key].args = args
+
+	for bin_details in bins.values():
+		update_bin_qty(bin_details.name, frappe._dict(bin_details.args, **bin_details.qty_dict))
+
+
+def get_sle_doc(args, allow_negative_stock=False, via_landed_cost_voucher=False):
+	args["doctype"] = "Stock Ledger Entry"
+	sle = frappe.get_doc(args)
+	sle.flags.ignore_permissions = 1
+	sle.allow_negative_stock = allow_negative_stock
+	sle.via_landed_cost_voucher = via_landed_cost_voucher
+	sle.docstatus = 1
+	sle.set_new_name()
+
+	return sle
+
+
+def get_sle_waves(sle_docs):
+	"""Split entries into consecutive groups having at most one entry per item-warehouse"""
+	waves, keys = [[]], set()
+	for sle in sle_docs:
+		key = (sle.item_code, sle.warehouse)
+		if key in keys:
+			waves.append([])
+			keys.clear()
+
+		waves[-1].append(sle)
+		keys.add(key)
+
+	return waves
+
+
+def set_sle_creation(sle_docs):
+	set_creation(sle_docs)
+
+	for sle in sle_docs:
+		if sle.get("creation_time") and sle.voucher_type == "Stock Reconciliation":
+			# Added to handle the case when the stock ledger entry is created from the repostig
+			sle.creation = sle.get("creation_time")
+
+
 def repost_current_voucher(args, allow_negative_stock=False, via_landed_cost_voucher=False):
 	if args.get("actual_qty") or args.get("voucher_type") == "Stock Reconciliation":
 		if not args.get("posting_date"):
@@ -220,6 +351,7 @@ def set_as_cancel(voucher_type, voucher_no):
 		where voucher_type=%s and voucher_no=%s and is_cancelled = 0""",
 		(now(), frappe.session.user, voucher_type, voucher_no),
 	)
+	clear_valuation_rate_cache()
 
 
 def make_entry(args, allow_negative_stock=False, via_landed_cost_voucher=False):
@@ -229,6 +361,7 @@ def make_entry(args, allow_negative_stock=False, via_landed_cost_voucher=False):
 	sle.allow_negative_stock = allow_negative_stock
 	sle.via_landed_cost_voucher = via_landed_cost_voucher
 	sle.submit()
+	clear_valuation_rate_cache(sle.item_code, sle.warehouse)
 
 	# Added to handle the case when the stock ledger entry is created from the repostig
 	if args.get("creation_time") and args.get("voucher_type") == "Stock Reconciliation":
@@ -280,6 +413,7 @@ def repost_future_sle(
 			via_landed_cost_voucher=via_landed_cost_voucher,
 		)
 		affected_transactions.update(obj.affected_transactions)
+		increment_counter("item_warehouses_reposted")
 
 		key = (args[i].get("item_code"), args[i].get("warehouse"))
 		if distinct_item_warehouses.get(key):
@@ -378,6 +512,8 @@ def update_args_in_repost_item_valuation(doc, index, args, distinct_item_warehou
 			}
 		)
 
+	update_reposting_progress(doc, "repost_sl_entries", index, len(args))
+
 	if not frappe.flags.in_test:
 		frappe.db.commit()
 
@@ -388,6 +524,7 @@ def update_args_in_repost_item_valuation(doc, index, args, distinct_item_warehou
 			"items_to_be_repost": json.dumps(args, default=str),
 			"current_index": index,
 			"total_reposting_count": len(args),
+			"estimated_completion": doc.get("estimated_completion"),
 		},
 		doctype=doc.doctype,
 		docname=doc.name,
@@ -454,7 +591,7 @@ def get_items_to_be_repost(voucher_type=None, voucher_no=None, doc=None, reposti
 	items_to_be_repost = []
 
 	if doc and doc.items_to_be_repost:
-		items_to_be_repost = json.loads(doc.items_to_be_repost) or []
+		items_to_be_repost = [frappe._dict(d) for d in json.loads(doc.items_to_be_repost) or []]
 
 	if not items_to_be_repost and voucher_type and voucher_no:
 		items_to_be_repost = frappe.db.get_all(
@@ -565,6 +702,7 @@ class update_entries_after:
 		self.distinct_item_warehouses = args.get("distinct_item_warehouses", frappe._dict())
 		self.affected_transactions: set[tuple[str, str]] = set()
 		self.reserved_stock = self.get_reserved_stock()
+		self.set_batched_reposting()
 
 		self.data = frappe._dict()
 		self.initialize_previous_data(self.args)
@@ -589,6 +727,19 @@ class update_entries_after:
 
 		return flt(query[0][0]) if query else 0.0
 
+	def set_batched_reposting(self):
+		"""Batched reposting only applies to future entries, current voucher is always processed row by row."""
+		self.use_batched_reposting = False
+		self.defer_sle_update = False
+		self.pending_sle_updates = {}
+
+		if self.args.get("sle_id"):
+			return
+
+		settings = frappe.get_cached_doc("Stock Reposting Settings")
+		self.use_batched_reposting = cint(settings.use_batched_reposting)
+		self.reposting_batch_size = cint(settings.reposting_batch_size) or 1000
+
 	def set_precision(self):
 		self.flt_precision = cint(frappe.db.get_default("float_precision")) or 2
 		self.currency_precision = get_field_precision(
@@ -638,8 +789,12 @@ class update_entries_after:
 			self.process_sle_against_current_timestamp()
 			if not future_sle_exists(self.args):
 				self.update_bin()
+		elif self.use_batched_reposting:
+			self.process_future_entries_in_batches()
 		else:
-			entries_to_fix = self.get_future_entries_to_fix()
+			increment_counter("sle_queries")
+			with track_phase("fetch_sles"):
+				entries_to_fix = self.get_future_entries_to_fix()
 
 			i = 0
 			while i < len(entries_to_fix):
@@ -655,6 +810,10 @@ class update_entries_after:
 		if self.exceptions:
 			self.raise_exceptions()
 
+		refresh_stock_balance_snapshots(
+			self.item_code, self.args.warehouse, self.args.posting_date, company=self.company
+		)
+
 	def has_stock_reco_with_serial_batch(self, sle):
 		if (
 			sle.voucher_type == "Stock Reconciliation"
@@ -702,6 +861,89 @@ class update_entries_after:
 
 		return list(self.get_sle_after_datetime(args))
 
+	def process_future_entries_in_batches(self):
+		"""Reposting mode for long ledgers.
+
+		Future entries are streamed in keyset paginated batches and the recalculated
+		values are written back with a single bulk update per batch. Entries whose
+		valuation reads back the ledger of the same item-warehouse (serial / batch nos,
+		stock reconciliation, recalculated rates etc) flush the pending updates first
+		and are written immediately, exactly as in the row by row path.
+		"""
+		last_sle_by_warehouse = {}
+
+		for entries_to_fix in self.get_future_entries_in_batches():
+			for sle in entries_to_fix:
+				self.defer_sle_update = not self.is_ledger_dependent_sle(sle)
+				if not self.defer_sle_update:
+					self.flush_sle_updates()
+
+				self.process_sle(sle)
+				last_sle_by_warehouse[sle.warehouse] = sle
+
+				if sle.dependant_sle_voucher_detail_no:
+					self.get_dependent_entries_to_fix(entries_to_fix, sle)
+
+			self.flush_sle_updates()
+
+		self.defer_sle_update = False
+		for sle in last_sle_by_warehouse.values():
+			self.update_bin_data(sle)
+
+	def get_future_entries_in_batches(self):
+		args = self.data[self.args.warehouse].previous_sle or frappe._dict(
+			{"item_code": self.item_code, "warehouse": self.args.warehouse}
+		)
+
+		last_sle = None
+		while True:
+			increment_counter("sle_queries")
+			with track_phase("fetch_sles"):
+				entries = get_future_sle_batch(args, last_sle, self.reposting_batch_size)
+			if not entries:
+				break
+
+			yield entries
+
+			if len(entries) < self.reposting_batch_size:
+				break
+
+			last_sle = entries[-1]
+
+	def is_ledger_dependent_sle(self, sle):
+		return bool(
+			sle.serial_no
+			or sle.batch_no
+			or sle.serial_and_batch_bundle
+			or sle.is_adjustment_entry
+			or sle.recalculate_rate
+			or sle.dependant_sle_voucher_detail_no
+			or sle.voucher_type == "Stock Reconciliation"
+			or self.has_landed_cost_based_on_pi(sle)
+		)
+
+	def update_sle(self, sle):
+		update_valuation_rate_cache(sle)
+		if self.defer_sle_update:
+			self.pending_sle_updates[sle.name] = {
+				fieldname: sle.get(fieldname) for fieldname in BATCHED_REPOST_SLE_FIELDS
+			}
+		else:
+			sle.doctype = "Stock Ledger Entry"
+			frappe.get_doc(sle).db_update()
+
+	def flush_sle_updates(self):
+		if not self.pending_sle_updates:
+			return
+
+		frappe.db.bulk_update(
+			"Stock Ledger Entry",
+			self.pending_sle_updates,
+			chunk_size=self.reposting_batch_size,
+			update_modified=False,
+		)
+		self.pending_sle_updates = {}
+
 	def get_dependent_entries_to_fix(self, entries_to_fix, sle):
 		dependant_sle = get_sle_by_voucher_detail_no(
 			sle.dependant_sle_voucher_detail_no, excluded_sle=sle.name
@@ -802,6 +1044,11 @@ class update_entries_after:
 			)
 
 	def process_sle(self, sle):
+		increment_counter("sles_processed")
+		with track_phase("process_sle"):
+			self._process_sle(sle)
+
+	def _process_sle(self, sle):
 		# previous sle data for this warehouse
 		self.wh_data = self.data[sle.warehouse]
 
@@ -910,13 +1157,14 @@ class update_entries_after:
 				sle.item_code, sle.warehouse, sle.posting_date, sle.posting_time, sle.voucher_no
 			)
 
-		sle.doctype = "Stock Ledger Entry"
-		frappe.get_doc(sle).db_update()
+		self.update_sle(sle)
 
 		if not self.args.get("sle_id") or (
 			sle.serial_and_batch_bundle and sle.auto_created_serial_and_batch_bundle
 		):
-			self.update_outgoing_rate_on_transaction(sle)
+			increment_counter("outgoing_rate_updates")
+			with track_phase("update_outgoing_rate"):
+				self.update_outgoing_rate_on_transaction(sle)
 
 	def get_serialized_values(self, sle):
 		from erpnext.stock.serial_batch_bundle import SerialNoValuation
@@ -1201,6 +1449,8 @@ class update_entries_after:
 
 		# Update outgoing item's rate, recalculate FG Item's rate and total incoming/outgoing amount
 		if not sle.dependant_sle_voucher_detail_no or self.is_manufacture_entry_with_sabb(sle):
+			# rates are recalculated from the ledger, write the deferred updates of the batch first
+			self.flush_sle_updates()
 			self.recalculate_amounts_in_stock_entry(sle.voucher_no, sle.voucher_detail_no)
 
 	def is_manufacture_entry_with_sabb(self, sle):
@@ -1488,6 +1738,9 @@ class update_entries_after:
 	def get_fallback_rate(self, sle) -> float:
 		"""When exact incoming rate isn't available use any of other "average" rates as fallback.
 		This should only get used for negative stock."""
+		# fallback rate is looked up from the ledger, pending batched updates must be visible
+		self.flush_sle_updates()
+
 		return get_valuation_rate(
 			sle.item_code,
 			sle.warehouse,
@@ -1539,9 +1792,7 @@ class update_entries_after:
 					allowed_qty = abs(exceptions[0]["actual_qty"]) - abs(exceptions[0]["diff"])
 
 					if allowed_qty > 0:
-						msg = "{} As {} units are reserved for other sales orders, you are allowed to consume only {} units.".format(
-							msg, frappe.bold(self.reserved_stock), frappe.bold(allowed_qty)
-						)
+						msg = f"{msg} As {frappe.bold(self.reserved_stock)} units are reserved for other sales orders, you are allowed to consume only {frappe.bold(allowed_qty)} units."
 					else:
 						msg = f"{msg} As the full stock is reserved for other transactions, you're not allowed to consume the stock."
 
@@ -1639,7 +1890,7 @@ def get_previous_sle(args, for_update=False, extra_cond=None):
 	sle = get_stock_ledger_entries(
 		args, "<=", "desc", "limit 1", for_update=for_update, extra_cond=extra_cond
 	)
-	return sle and sle[0] or {}
+	return (sle and sle[0]) or {}
 
 
 def get_stock_ledger_entries(
@@ -1705,7 +1956,7 @@ def get_stock_ledger_entries(
 		{limit} {for_update}""".format(
 			conditions=conditions,
 			limit=limit or "",
-			for_update=for_update and "for update" or "",
+			for_update=(for_update and "for update") or "",
 			order=order,
 		),
 		previous_sle,
@@ -1714,6 +1965,59 @@ def get_stock_ledger_entries(
 	)
 
 
+def get_future_sle_batch(previous_sle, last_sle=None, batch_size=1000):
+	"""Get a batch of Stock Ledger Entries after `previous_sle` for reposting.
+
+	Batches are paginated on (posting_datetime, creation, name), `last_sle` is the
+	last entry of the previous batch."""
+	conditions = ""
+	if last_sle:
+		conditions = """
+			and (
+				posting_datetime > %(last_posting_datetime)s
+				or (
+					posting_datetime = %(last_posting_datetime)s
+					and (
+						creation > %(last_creation)s
+						or (creation = %(last_creation)s and name > %(last_name)s)
+					)
+				)
+			)"""
+
+	if not previous_sle.get("posting_date"):
+		posting_datetime = "1900-01-01 00:00:00"
+	else:
+		posting_datetime = get_combine_datetime(
+			previous_sle.get("posting_date"), previous_sle.get("posting_time") or "00:00:00"
+		)
+
+	return frappe.db.sql(  # nosemgrep
+		f"""
+		select *, posting_datetime as "timestamp"
+		from `tabStock Ledger Entry`
+		where item_code = %(item_code)s
+			and warehouse = %(warehouse)s
+			and is_cancelled = 0
+			and posting_datetime > %(posting_datetime)s
+			and name != %(name)s
+			{conditions}
+		order by posting_datetime asc, creation asc, name asc
+		limit %(batch_size)s
+		for update""",
+		{
+			"item_code": previous_sle.get("item_code"),
+			"warehouse": previous_sle.get("warehouse"),
+			"posting_datetime": posting_datetime,
+			"name": previous_sle.get("name") or "",
+			"last_posting_datetime": last_sle and last_sle.posting_datetime,
+			"last_creation": last_sle and last_sle.creation,
+			"last_name": last_sle and last_sle.name,
+			"batch_size": cint(batch_size),
+		},
+		as_dict=1,
+	)
+
+
 def get_sle_by_voucher_detail_no(voucher_detail_no, excluded_sle=None):
 	return frappe.db.get_value(
 		"Stock Ledger Entry",
@@ -1814,27 +2118,18 @@ def get_valuation_rate(
 		return batch_obj.get_incoming_rate()
 
 	# Get valuation rate from last sle for the same item and warehouse
-	if last_valuation_rate := frappe.db.sql(  # nosemgrep
-		"""select valuation_rate
-		from `tabStock Ledger Entry` force index (item_warehouse)
-		where
-			item_code = %s
-			AND warehouse = %s
-			AND valuation_rate >= 0
-			AND is_cancelled = 0
-			AND NOT (voucher_no = %s AND voucher_type = %s)
-		order by posting_datetime desc, creation desc limit 1""",
-		(item_code, warehouse, voucher_no, voucher_type),
-	):
-		return flt(last_valuation_rate[0][0])
+	last_valuation_rate = get_last_valuation_rate(item_code, warehouse, voucher_type, voucher_no)
+	if last_valuation_rate is not None:
+		return last_valuation_rate
 
 	# If negative stock allowed, and item delivered without any incoming entry,
 	# system does not found any SLE, then take valuation rate from Item
-	valuation_rate = frappe.db.get_value("Item", item_code, "valuation_rate")
+	item_rates = frappe.db.get_value("Item", item_code, ["valuation_rate", "standard_rate"], as_dict=True)
+	valuation_rate = item_rates and item_rates.valuation_rate
 
 	if not valuation_rate:
 		# try Item Standard rate
-		valuation_rate = frappe.db.get_value("Item", item_code, "standard_rate")
+		valuation_rate = item_rates and item_rates.standard_rate
 
 		if not valuation_rate:
 			# try in price list
@@ -1877,6 +2172,116 @@ def get_valuation_rate(
 	return valuation_rate
 
 
+def get_last_valuation_rate(item_code, warehouse, voucher_type, voucher_no):
+	"""Valuation rate of the last stock ledger entry of the item-warehouse, excluding the given voucher.
+
+	The latest entries of every item-warehouse are memoized in `frappe.local.valuation_rate_cache`,
+	so repeated lookups of a transaction (zero rate rows during reposting etc) don't hit the database.
+	Returns None if there is no such entry."""
+	cache = get_valuation_rate_cache()
+	key = (item_code, warehouse)
+
+	if key in cache.entries:
+		cache.hits += 1
+	else:
+		cache.misses += 1
+		cache.entries[key] = get_last_stock_ledger_entries(item_code, warehouse)
+
+	entries = cache.entries[key]
+	for entry in entries:
+		if flt(entry.valuation_rate) >= 0 and not (
+			entry.voucher_no == voucher_no and entry.voucher_type == voucher_type
+		):
+			return flt(entry.valuation_rate)
+
+	if len(entries) < VALUATION_RATE_CACHE_ENTRIES:
+		return None
+
+	# all memoized entries belong to the voucher
+	if last_valuation_rate := frappe.db.sql(  # nosemgrep
+		"""select valuation_rate
+		from `tabStock Ledger Entry` force index (item_warehouse)
+		where
+			item_code = %s
+			AND warehouse = %s
+			AND valuation_rate >= 0
+			AND is_cancelled = 0
+			AND NOT (voucher_no = %s AND voucher_type = %s)
+		order by posting_datetime desc, creation desc limit 1""",
+		(item_code, warehouse, voucher_no, voucher_type),
+	):
+		return flt(last_valuation_rate[0][0])
+
+
+def get_last_stock_ledger_entries(item_code, warehouse):
+	return frappe.db.sql(  # nosemgrep
+		"""select name, voucher_type, voucher_no, valuation_rate
+		from `tabStock Ledger Entry` force index (item_warehouse)
+		where
+			item_code = %s
+			AND warehouse = %s
+			AND is_cancelled = 0
+		order by posting_datetime desc, creation desc limit %s""",
+		(item_code, warehouse, VALUATION_RATE_CACHE_ENTRIES),
+		as_dict=True,
+	)
+
+
+def get_valuation_rate_cache():
+	"""Transaction scoped memo of the last stock ledger entries of item-warehouses.
+	Dropped on commit and rollback, entries of an item-warehouse are dropped when a stock ledger entry
+	is added to it."""
+	if not hasattr(frappe.local, "valuation_rate_cache"):
+		frappe.local.valuation_rate_cache = frappe._dict(entries={}, hits=0, misses=0, in_transaction=False)
+
+	track_valuation_rate_cache_transaction()
+	return frappe.local.valuation_rate_cache
+
+
+def track_valuation_rate_cache_transaction():
+	"""Drop the cache when the current transaction ends, entries committed by other transactions
+	(reposting of the same item-warehouse in another job etc) are read again by the next one.
+
+	Callbacks are cleared on every commit, so they are added again in each transaction."""
+	cache = frappe.local.valuation_rate_cache
+	if not cache.in_transaction:
+		cache.in_transaction = True
+		frappe.db.after_commit.add(reset_valuation_rate_cache)
+		frappe.db.after_rollback.add(reset_valuation_rate_cache)
+
+
+def reset_valuation_rate_cache():
+	if hasattr(frappe.local, "valuation_rate_cache"):
+		del frappe.local.valuation_rate_cache
+
+
+def get_valuation_rate_cache_stats():
+	cache = get_valuation_rate_cache()
+	return frappe._dict(hits=cache.hits, misses=cache.misses, size=len(cache.entries))
+
+
+def clear_valuation_rate_cache(item_code=None, warehouse=None):
+	if not hasattr(frappe.local, "valuation_rate_cache"):
+		return
+
+	if item_code and warehouse:
+		frappe.local.valuation_rate_cache.entries.pop((item_code, warehouse), None)
+	else:
+		frappe.local.valuation_rate_cache.entries.clear()
+
+
+def update_valuation_rate_cache(sle):
+	"""Keep memoized entries in sync with the valuation rates recalculated by reposting"""
+	if not hasattr(frappe.local, "valuation_rate_cache"):
+		return
+
+	# rates updated by this transaction are gone on rollback
+	track_valuation_rate_cache_transaction()
+	for entry in frappe.local.valuation_rate_cache.entries.get((sle.item_code, sle.warehouse)) or []:
+		if entry.name == sle.name:
+			entry.valuation_rate = flt(sle.valuation_rate)
+
+
 def update_qty_in_future_sle(args, allow_negative_stock=False):
 	"""Recalculate Qty after Transaction in future SLEs based on current SLE."""
 	datetime_limit_condition = ""
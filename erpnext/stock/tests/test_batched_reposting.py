@@ -0,0 +1,137 @@
+import frappe
+from frappe.tests import IntegrationTestCase
+from frappe.utils import add_days
+
+from erpnext.stock.doctype.item.test_item import make_item
+from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
+
+WAREHOUSE = "_Test Warehouse - _TC"
+LEDGER_FIELDS = [
+	"qty_after_transaction",
+	"valuation_rate",
+	"stock_value",
+	"stock_value_difference",
+	"stock_queue",
+]
+
+
+def get_ledger(item_code):
+	return frappe.get_all(
+		"Stock Ledger Entry",
+		filters={"item_code": item_code, "warehouse": WAREHOUSE, "is_cancelled": 0},
+		fields=LEDGER_FIELDS,
+		order_by="posting_datetime, creation",
+		as_list=True,
+	)
+
+
+def make_ledger(item_code, entries, start_date="2024-01-02"):
+	"""Create alternating receipts and issues, one per day."""
+	for idx in range(entries):
+		posting_date = add_days(start_date, idx)
+		if idx % 3 == 2:
+			make_stock_entry(item_code=item_code, from_warehouse=WAREHOUSE, qty=2, posting_date=posting_date)
+		else:
+			make_stock_entry(
+				item_code=item_code, to_warehouse=WAREHOUSE, qty=3, rate=100 + idx, posting_date=posting_date
+			)
+
+
+def make_manufacture_ledger(raw_item, fg_item, entries, start_date="2024-01-02"):
+	"""Create receipts of the raw material at increasing rates, each followed by a manufacture."""
+	for idx in range(entries):
+		posting_date = add_days(start_date, idx)
+		make_stock_entry(
+			item_code=raw_item, to_warehouse=WAREHOUSE, qty=3, rate=100 + idx, posting_date=posting_date
+		)
+		frappe.get_doc(
+			doctype="Stock Entry",
+			purpose="Manufacture",
+			stock_entry_type="Manufacture",
+			company="_Test Company",
+			posting_date=posting_date,
+			set_posting_time=1,
+			items=[
+				frappe._dict(item_code=raw_item, qty=2, s_warehouse=WAREHOUSE),
+				frappe._dict(item_code=fg_item, qty=1, t_warehouse=WAREHOUSE, is_finished_item=1),
+			],
+		).submit()
+
+
+class TestBatchedReposting(IntegrationTestCase):
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def assertParity(self, valuation_method):
+		row_item = make_item(properties={"is_stock_item": 1, "valuation_method": valuation_method}).name
+		batched_item = make_item(properties={"is_stock_item": 1, "valuation_method": valuation_method}).name
+
+		with self.change_settings("Stock Reposting Settings", {"use_batched_reposting": 0}):
+			make_ledger(row_item, 10)
+			make_stock_entry(
+				item_code=row_item, to_warehouse=WAREHOUSE, qty=5, rate=50, posting_date="2024-01-01"
+			)
+
+		with self.change_settings(
+			"Stock Reposting Settings", {"use_batched_reposting": 1, "reposting_batch_size": 3}
+		):
+			make_ledger(batched_item, 10)
+			make_stock_entry(
+				item_code=batched_item, to_warehouse=WAREHOUSE, qty=5, rate=50, posting_date="2024-01-01"
+			)
+
+		self.assertEqual(get_ledger(row_item), get_ledger(batched_item))
+		self.assertEqual(
+			frappe.db.get_value(
+				"Bin", {"item_code": row_item, "warehouse": WAREHOUSE}, ["actual_qty", "stock_value"]
+			),
+			frappe.db.get_value(
+				"Bin", {"item_code": batched_item, "warehouse": WAREHOUSE}, ["actual_qty", "stock_value"]
+			),
+		)
+
+	def test_batched_reposting_parity_fifo(self):
+		self.assertParity("FIFO")
+
+	def test_batched_reposting_parity_moving_average(self):
+		self.assertParity("Moving Average")
+
+	def test_batched_reposting_across_batches(self):
+		item_code = make_item(properties={"is_stock_item": 1, "valuation_method": "FIFO"}).name
+
+		with self.change_settings(
+			"Stock Reposting Settings", {"use_batched_reposting": 1, "reposting_batch_size": 2}
+		):
+			make_stock_entry(
+				item_code=item_code, to_warehouse=WAREHOUSE, qty=10, rate=100, posting_date="2024-01-02"
+			)
+			make_stock_entry(item_code=item_code, from_warehouse=WAREHOUSE, qty=10, posting_date="2024-01-03")
+			make_stock_entry(
+				item_code=item_code, to_warehouse=WAREHOUSE, qty=5, rate=200, posting_date="2024-01-04"
+			)
+			make_stock_entry(
+				item_code=item_code, to_warehouse=WAREHOUSE, qty=5, rate=200, posting_date="2024-01-01"
+			)
+
+		qty_after_transaction = [row[0] for row in get_ledger(item_code)]
+		self.assertEqual(qty_after_transaction, [5, 15, 5, 10])
+
+	def test_batched_reposting_parity_manufacture(self):
+		ledgers = []
+		for use_batched_reposting in (0, 1):
+			raw_item = make_item(properties={"is_stock_item": 1, "valuation_method": "FIFO"}).name
+			fg_item = make_item(properties={"is_stock_item": 1, "valuation_method": "FIFO"}).name
+
+			with self.change_settings(
+				"Stock Reposting Settings",
+				{"use_batched_reposting": use_batched_reposting, "reposting_batch_size": 3},
+			):
+				make_manufacture_ledger(raw_item, fg_item, 6)
+				# backdated receipt changes the consumed rates and so the rates of the finished good
+				make_stock_entry(
+					item_code=raw_item, to_warehouse=WAREHOUSE, qty=5, rate=50, posting_date="2024-01-01"
+				)
+
+			ledgers.append((get_ledger(raw_item), get_ledger(fg_item)))
+
+		self.assertEqual(ledgers[0], ledgers[1])
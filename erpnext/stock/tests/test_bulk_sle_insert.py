@@ -0,0 +1,142 @@
+import frappe
+from frappe.tests import IntegrationTestCase
+
+from erpnext.stock.doctype.item.test_item import make_item
+from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
+from erpnext.stock.doctype.stock_reconciliation.test_stock_reconciliation import (
+	create_stock_reconciliation,
+)
+from erpnext.stock.stock_ledger import get_sle_waves
+
+WAREHOUSE = "_Test Warehouse - _TC"
+LEDGER_FIELDS = [
+	"actual_qty",
+	"qty_after_transaction",
+	"valuation_rate",
+	"stock_value",
+	"stock_value_difference",
+	"stock_queue",
+	"is_cancelled",
+]
+
+
+def get_ledger(item_codes):
+	"""Ledger of each item, items are compared by position"""
+	return [
+		frappe.get_all(
+			"Stock Ledger Entry",
+			filters={"item_code": item_code, "warehouse": WAREHOUSE},
+			fields=LEDGER_FIELDS,
+			order_by="posting_datetime, creation",
+			as_list=True,
+		)
+		for item_code in item_codes
+	]
+
+
+def get_bins(item_codes):
+	return [
+		frappe.db.get_value(
+			"Bin",
+			{"item_code": item_code, "warehouse": WAREHOUSE},
+			["actual_qty", "projected_qty", "stock_value"],
+		)
+		for item_code in item_codes
+	]
+
+
+def make_multi_row_entry(rows, posting_date, source=False):
+	"""Stock Entry with one row per (item_code, qty, rate)"""
+	item_code, qty, rate = rows[0]
+	warehouse_field = "from_warehouse" if source else "to_warehouse"
+	se = make_stock_entry(
+		item_code=item_code,
+		qty=qty,
+		rate=rate,
+		posting_date=posting_date,
+		do_not_submit=True,
+		**{warehouse_field: WAREHOUSE},
+	)
+
+	for item_code, qty, rate in rows[1:]:
+		row = se.items[0].as_dict(no_default_fields=True)
+		row.update({"item_code": item_code, "qty": qty, "transfer_qty": qty, "basic_rate": rate})
+		se.append("items", row)
+
+	se.save()
+	se.submit()
+	return se
+
+
+def make_multi_row_reconciliation(rows, posting_date):
+	"""Stock Reconciliation with one row per (item_code, qty, rate)"""
+	item_code, qty, rate = rows[0]
+	sr = create_stock_reconciliation(
+		item_code=item_code,
+		warehouse=WAREHOUSE,
+		qty=qty,
+		rate=rate,
+		posting_date=posting_date,
+		do_not_save=True,
+	)
+
+	for item_code, qty, rate in rows[1:]:
+		sr.append(
+			"items", {"item_code": item_code, "warehouse": WAREHOUSE, "qty": qty, "valuation_rate": rate}
+		)
+
+	sr.insert()
+	sr.submit()
+	return sr
+
+
+def make_transactions(item_codes):
+	first, second, third = item_codes
+	make_multi_row_entry([(first, 10, 100), (second, 5, 200), (first, 5, 150)], "2024-01-02")
+	make_multi_row_entry([(third, 20, 50), (second, 5, 250)], "2024-01-03")
+	make_multi_row_entry([(first, 8, 0), (third, 5, 0)], "2024-01-04", source=True)
+	make_multi_row_reconciliation([(second, 4, 300), (third, 25, 60)], "2024-01-05")
+
+	# backdated entry
+	se = make_multi_row_entry([(first, 2, 120), (second, 1, 220), (third, 3, 40)], "2024-01-01")
+	se.cancel()
+
+
+class TestBulkSLEInsert(IntegrationTestCase):
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def make_items(self, valuation_method):
+		return [
+			make_item(properties={"is_stock_item": 1, "valuation_method": valuation_method}).name
+			for _ in range(3)
+		]
+
+	def assertParity(self, valuation_method):
+		row_items = self.make_items(valuation_method)
+		bulk_items = self.make_items(valuation_method)
+
+		with self.change_settings("Stock Settings", {"bulk_insert_stock_ledger_entries": 0}):
+			make_transactions(row_items)
+
+		with self.change_settings("Stock Settings", {"bulk_insert_stock_ledger_entries": 1}):
+			make_transactions(bulk_items)
+
+		self.assertEqual(get_ledger(row_items), get_ledger(bulk_items))
+		self.assertEqual(get_bins(row_items), get_bins(bulk_items))
+
+	def test_bulk_insert_parity_fifo(self):
+		self.assertParity("FIFO")
+
+	def test_bulk_insert_parity_moving_average(self):
+		self.assertParity("Moving Average")
+
+	def test_sle_waves(self):
+		sles = [
+			frappe._dict(item_code=item_code, warehouse=warehouse)
+			for item_code, warehouse in [("A", "W1"), ("B", "W1"), ("A", "W2"), ("A", "W1"), ("B", "W1")]
+		]
+
+		waves = get_sle_waves(sles)
+		self.assertEqual([len(wave) for wave in waves], [3, 2])
+		self.assertEqual([sle for wave in waves for sle in wave], sles)
@@ -1,7 +1,7 @@
 import frappe
 from frappe.tests import IntegrationTestCase
 
-from erpnext.stock.get_item_details import get_item_details
+from erpnext.stock.get_item_details import filter_item_prices, get_item_details, get_item_details_batch
 
 EXTRA_TEST_RECORD_DEPENDENCIES = ["Customer", "Supplier", "Item", "Price List", "Item Price"]
 
@@ -91,3 +91,39 @@ class TestGetItemDetail(IntegrationTestCase):
 		dn.save()
 		self.assertEqual(dn.items[0].batch_no, "BATCH01")
 		self.assertEqual(dn.items[0].rate, 50)
+
+	def test_get_item_details_batch(self):
+		ctx = {
+			"company": "_Test Company",
+			"customer": "_Test Customer",
+			"conversion_rate": 1.0,
+			"currency": "INR",
+			"price_list_currency": "INR",
+			"plc_conversion_rate": 1.0,
+			"doctype": "Sales Order",
+			"name": None,
+			"transaction_date": frappe.utils.nowdate(),
+			"price_list": "_Test Price List",
+			"warehouse": "_Test Warehouse - _TC",
+		}
+		items = [
+			{"item_code": "_Test Item", "qty": 1},
+			{"item_code": "_Test Item 2", "qty": 5},
+			{"item_code": "_Test Item", "qty": 2, "uom": "_Test UOM"},
+		]
+
+		per_row = [get_item_details(frappe._dict(ctx, **item)) for item in items]
+		self.assertEqual(get_item_details_batch(ctx, items), per_row)
+
+	def test_filter_item_prices_ignores_case(self):
+		item_prices = [
+			frappe._dict(name="customer price", price_list_rate=90, uom="Nos", customer="_Test Customer"),
+			frappe._dict(name="price", price_list_rate=100, uom="Nos"),
+		]
+
+		pctx = frappe._dict(uom="nos", customer="_test customer")
+		self.assertEqual(filter_item_prices(item_prices, pctx)[0].name, "customer price")
+
+		pctx = frappe._dict(uom="NOS", customer="_Test Customer 1")
+		self.assertEqual(filter_item_prices(item_prices, pctx), [])
+		self.assertEqual(filter_item_prices(item_prices, pctx, ignore_party=True)[0].name, "customer price")
@@ -1,5 +1,4 @@
 import json
-import unittest
 
 import frappe
 from frappe.tests import IntegrationTestCase
@@ -124,6 +123,24 @@ class TestFIFOValuation(IntegrationTestCase):
 		self.queue.add_stock(5, 17)
 		self.queue.add_stock(8, 11)
 
+	def test_coalesce_bins_after_rate_specific_removal(self):
+		self.queue.add_stock(1, 10)
+		self.queue.add_stock(1, 20)
+		self.queue.add_stock(1, 10)
+
+		self.queue.remove_stock(1, 20)
+		self.assertEqual(self.queue, [[2, 10]])
+
+	def test_state_after_consuming_front_bins(self):
+		state = [[1, 10], [2, 20], [3, 30]]
+		self.queue = FIFOValuation(state)
+
+		consumed = self.queue.remove_stock(2)
+		self.assertEqual(consumed, [[1, 10], [1, 20]])
+		self.assertEqual(self.queue.state, [[1, 20], [3, 30]])
+		# state is updated in place
+		self.assertIs(self.queue.state, state)
+
 	@given(stock_queue_generator)
 	def test_fifo_qty_hypothesis(self, stock_queue):
 		self.queue = FIFOValuation([])
@@ -0,0 +1,67 @@
+import frappe
+from frappe.tests import IntegrationTestCase
+
+from erpnext.stock.doctype.item.test_item import make_item
+from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
+from erpnext.stock.stock_ledger import (
+	get_valuation_rate,
+	get_valuation_rate_cache_stats,
+	reset_valuation_rate_cache,
+)
+
+WAREHOUSE = "_Test Warehouse - _TC"
+
+
+class TestValuationRateCache(IntegrationTestCase):
+	def setUp(self):
+		reset_valuation_rate_cache()
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def get_rate(self, item_code, voucher_no="_Test Voucher"):
+		return get_valuation_rate(
+			item_code, WAREHOUSE, "Stock Entry", voucher_no, allow_zero_rate=True, company="_Test Company"
+		)
+
+	def test_repeated_lookups_are_memoized(self):
+		item_code = make_item(properties={"is_stock_item": 1, "valuation_method": "FIFO"}).name
+		make_stock_entry(item_code=item_code, to_warehouse=WAREHOUSE, qty=10, rate=100)
+
+		self.assertEqual(self.get_rate(item_code), 100)
+		self.assertEqual(self.get_rate(item_code), 100)
+
+		stats = get_valuation_rate_cache_stats()
+		self.assertEqual((stats.hits, stats.misses), (1, 1))
+
+	def test_cache_is_invalidated_on_new_entries(self):
+		item_code = make_item(properties={"is_stock_item": 1, "valuation_method": "FIFO"}).name
+		make_stock_entry(item_code=item_code, to_warehouse=WAREHOUSE, qty=10, rate=100)
+		self.assertEqual(self.get_rate(item_code), 100)
+
+		se = make_stock_entry(item_code=item_code, to_warehouse=WAREHOUSE, qty=10, rate=300)
+		self.assertEqual(self.get_rate(item_code), 200)
+
+		# entries of the voucher itself are skipped
+		self.assertEqual(self.get_rate(item_code, voucher_no=se.name), 100)
+
+		se.cancel()
+		self.assertEqual(self.get_rate(item_code), 100)
+
+	def test_cache_is_reset_on_rollback(self):
+		item_code = make_item(properties={"is_stock_item": 1}).name
+		make_stock_entry(item_code=item_code, to_warehouse=WAREHOUSE, qty=10, rate=100)
+		self.assertEqual(self.get_rate(item_code), 100)
+		self.assertEqual(get_valuation_rate_cache_stats().size, 1)
+
+		frappe.db.rollback()
+		self.assertEqual(get_valuation_rate_cache_stats().size, 0)
+
+	def test_cache_is_reset_on_commit(self):
+		item_code = make_item(properties={"is_stock_item": 1}).name
+		make_stock_entry(item_code=item_code, to_warehouse=WAREHOUSE, qty=10, rate=100)
+		self.assertEqual(self.get_rate(item_code), 100)
+
+		# callbacks run by frappe.db.commit, rates committed by other jobs are read again afterwards
+		frappe.db.after_commit.run()
+		self.assertEqual(get_valuation_rate_cache_stats().size, 0)
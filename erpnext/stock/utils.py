@@ -63,6 +63,10 @@ def get_stock_value_on(
 	item_code: str | None = None,
 	company: str | None = None,
 ) -> float:
+	from erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot import (
+		get_stock_value_from_snapshot,
+	)
+
 	if not posting_date:
 		posting_date = nowdate()
 
@@ -84,6 +88,12 @@ def get_stock_value_on(
 
 		query = query.where(sle.warehouse.isin(warehouses))
 
+	if company:
+		# answer from the stock balance snapshot instead of scanning the whole ledger
+		stock_value = get_stock_value_from_snapshot(company, posting_date, list(warehouses or []), item_code)
+		if stock_value is not None:
+			return stock_value
+
 	if item_code:
 		query = query.where(sle.item_code == item_code)
 
@@ -57,20 +57,35 @@ class FIFOValuation(BinWiseValuation):
 	Queue is implemented using "bins" of [qty, rate].
 
 	ref: https://en.wikipedia.org/wiki/FIFO_and_LIFO_accounting
+	Implementation detail: consumed bins are not popped from the front of the list,
+	a head offset is moved instead and the list is compacted when state is read.
+	This makes consumption O(1) amortized per bin.
 	"""
 
 	# specifying the attributes to save resources
 	# ref: https://docs.python.org/3/reference/datamodel.html#slots
-	__slots__ = ["queue"]
+	__slots__ = ["head", "queue"]
 
 	def __init__(self, state: list[StockBin] | None):
 		self.queue: list[StockBin] = state if state is not None else []
+		# index of first unconsumed bin in queue
+		self.head: int = 0
 
 	@property
 	def state(self) -> list[StockBin]:
 		"""Get current state of queue."""
+		self.compact()
 		return self.queue
 
+	def compact(self) -> None:
+		"""Drop consumed bins from the front of the queue."""
+		if self.head:
+			del self.queue[: self.head]
+			self.head = 0
+
+	def is_empty(self) -> bool:
+		return self.head >= len(self.queue)
+
 	def add_stock(self, qty: float, rate: float) -> None:
 		"""Update fifo queue with new stock.
 
@@ -78,7 +93,8 @@ class FIFOValuation(BinWiseValuation):
 		        qty: new quantity to add
 		        rate: incoming rate of new quantity"""
 
-		if not len(self.queue):
+		if self.is_empty():
+			self.compact()
 			self.queue.append([0, 0])
 
 		# last row has the same rate, merge new bin.
@@ -110,35 +126,35 @@ class FIFOValuation(BinWiseValuation):
 
 		consumed_bins = []
 		while qty:
-			if not len(self.queue):
+			if self.is_empty():
 				# rely on rate generator.
+				self.compact()
 				self.queue.append([0, rate_generator()])
 
-			index = None
+			index = self.head
 			if outgoing_rate > 0:
 				# Find the entry where rate matched with outgoing rate
-				for idx, fifo_bin in enumerate(self.queue):
-					if fifo_bin[RATE] == outgoing_rate:
+				for idx in range(self.head, len(self.queue)):
+					if self.queue[idx][RATE] == outgoing_rate:
 						index = idx
 						break
 
-				# If no entry found with outgoing rate, consume as per FIFO
-				if index is None:  # nosemgrep
-					index = 0
-			else:
-				index = 0
-
 			# select first bin or the bin with same rate
 			fifo_bin = self.queue[index]
 			if qty >= fifo_bin[QTY]:
 				# consume current bin
 				qty = round_off_if_near_zero(qty - fifo_bin[QTY])
-				to_consume = self.queue.pop(index)
-				consumed_bins.append(list(to_consume))
-
-				if not self.queue and qty:
+				consumed_bins.append(list(fifo_bin))
+				if index == self.head:
+					self.head += 1
+				else:
+					self.queue.pop(index)
+					self.coalesce_at(index)
+
+				if self.is_empty() and qty:
 					# stock finished, qty still remains to be withdrawn
 					# negative stock, keep in as a negative bin
+					self.compact()
 					self.queue.append([-qty, outgoing_rate or fifo_bin[RATE]])
 					consumed_bins.append([qty, outgoing_rate or fifo_bin[RATE]])
 					break
@@ -148,8 +164,21 @@ class FIFOValuation(BinWiseValuation):
 				consumed_bins.append([qty, fifo_bin[RATE]])
 				qty = 0
 
+		if self.is_empty():
+			self.compact()
+
 		return consumed_bins
 
+	def coalesce_at(self, index: int) -> None:
+		"""Merge bins at `index - 1` and `index` if they have same rate, they became adjacent after a pop."""
+		if index <= self.head or index >= len(self.queue):
+			return
+
+		previous_bin, current_bin = self.queue[index - 1], self.queue[index]
+		if previous_bin[RATE] == current_bin[RATE] and previous_bin[QTY] > 0 and current_bin[QTY] > 0:
+			previous_bin[QTY] += current_bin[QTY]
+			self.queue.pop(index)
+
 
 class LIFOValuation(BinWiseValuation):
 	"""Valuation method where a *stack* of all the incoming stock is maintained.
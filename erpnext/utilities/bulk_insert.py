@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+import frappe
+from frappe import _
+from frappe.utils import cstr, now_datetime
+
+# hooks of `Document.insert` for a submitted document, before and after the row is inserted
+VALIDATE_METHODS = ("before_insert", "before_validate", "validate", "before_submit")
+AFTER_INSERT_METHODS = ("after_insert", "on_update", "on_submit", "on_change")
+
+
+def validate_docs(docs):
+	"""Validate new submitted documents of a doctype to be inserted with `insert_docs`.
+
+	Link fields are checked with one query per field for all the documents, then controller
+	methods and doc_events hooks run for every document, followed by the check of mandatory fields."""
+	if not docs:
+		return
+
+	validate_links(docs)
+
+	for doc in docs:
+		for method in VALIDATE_METHODS:
+			doc.run_method(method)
+
+	validate_mandatory(docs)
+
+
+def insert_docs(docs):
+	"""Insert validated documents of a doctype with a multi-row insert and run the hooks which
+	follow the insert of a submitted document"""
+	if not docs:
+		return
+
+	values = [doc.get_valid_dict(convert_dates_to_str=True) for doc in docs]
+	fields = list(values[0])
+	frappe.db.bulk_insert(
+		docs[0].doctype, fields=fields, values=[tuple(row[field] for field in fields) for row in values]
+	)
+
+	for doc in docs:
+		for method in AFTER_INSERT_METHODS:
+			doc.run_method(method)
+
+
+def set_creation(docs):
+	"""Set the owner and timestamps of new documents, distinct creation keeps their order"""
+	timestamp = now_datetime()
+	user = frappe.session.user
+
+	for idx, doc in enumerate(docs):
+		doc.creation = timestamp + timedelta(microseconds=idx)
+		doc.modified = timestamp
+		doc.owner = doc.modified_by = user
+
+
+def validate_links(docs):
+	meta = frappe.get_meta(docs[0].doctype)
+	for df in meta.get_link_fields():
+		values = {doc.get(df.fieldname) for doc in docs if doc.get(df.fieldname)}
+		if not values:
+			continue
+
+		existing = set(frappe.get_all(df.options, filters={"name": ("in", list(values))}, pluck="name"))
+		if missing := values - existing:
+			frappe.throw(
+				_("Could not find {0}: {1}").format(_(df.label), ", ".join(sorted(missing))),
+				frappe.LinkValidationError,
+			)
+
+
+def validate_mandatory(docs):
+	meta = frappe.get_meta(docs[0].doctype)
+	for df in meta.get("fields", {"reqd": 1}):
+		for doc in docs:
+			if doc.flags.ignore_mandatory:
+				continue
+
+			if not cstr(doc.get(df.fieldname)).strip():
+				frappe.throw(
+					_("Error: Value missing for {0}: {1}").format(_(doc.doctype), _(df.label)),
+					frappe.MandatoryError,
+				)